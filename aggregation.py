@@ -0,0 +1,277 @@
+"""
+KPL compatible record aggregation
+
+an aggregated record is the 4 magic bytes, an AggregatedRecord protobuf message and the md5 digest of that message:
+
+    message AggregatedRecord {
+        repeated string partition_key_table = 1;
+        repeated string explicit_hash_key_table = 2;
+        repeated Record records = 3;
+    }
+    message Record {
+        required uint64 partition_key_index = 1;
+        optional uint64 explicit_hash_key_index = 2;
+        required bytes data = 3;
+        repeated Tag tags = 4;
+    }
+
+uncompressed aggregated records can be read by any KPL aware consumer. compressed ones wrap the whole aggregated
+record in gzip or zstd and have to be read with deaggregate.
+"""
+import gzip
+import hashlib
+
+from batching import MAX_RECORD_BYTES
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+KPL_MAGIC = b'\xf3\x89\x9a\xc2'
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+DIGEST_SIZE = 16
+
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_LENGTH_DELIMITED = 2
+WIRE_FIXED32 = 5
+
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(buffer, position):
+    """
+    :return: (value, position after the varint)
+    """
+    result = 0
+    shift = 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, position
+        shift += 7
+
+
+def encode_field(field_number, payload: bytes) -> bytes:
+    """
+    a length delimited protobuf field
+    """
+    return encode_varint(field_number << 3 | WIRE_LENGTH_DELIMITED) + encode_varint(len(payload)) + payload
+
+
+def iter_fields(buffer):
+    """
+    the fields of a protobuf message, unknown wire types raise ValueError
+    :return: generator of (field_number, value), value is an int or a memoryview
+    """
+    buffer = memoryview(buffer)
+    position = 0
+    while position < len(buffer):
+        key, position = decode_varint(buffer, position)
+        field_number, wire_type = key >> 3, key & 0x7
+        if wire_type == WIRE_VARINT:
+            value, position = decode_varint(buffer, position)
+        elif wire_type == WIRE_LENGTH_DELIMITED:
+            length, position = decode_varint(buffer, position)
+            value = buffer[position:position + length]
+            position += length
+        elif wire_type == WIRE_FIXED64:
+            value = buffer[position:position + 8]
+            position += 8
+        elif wire_type == WIRE_FIXED32:
+            value = buffer[position:position + 4]
+            position += 4
+        else:
+            raise ValueError(f'Unsupported protobuf wire type {wire_type}')
+        yield field_number, value
+
+
+def encode_user_record(data: bytes, explicit_hash_key_index=None) -> bytes:
+    message = encode_varint(1 << 3 | WIRE_VARINT) + encode_varint(0)
+    if explicit_hash_key_index is not None:
+        message += encode_varint(2 << 3 | WIRE_VARINT) + encode_varint(explicit_hash_key_index)
+    return encode_field(3, message + encode_field(3, data))
+
+
+def to_bytes(data) -> bytes:
+    return data.encode('utf-8') if isinstance(data, str) else bytes(data)
+
+
+def compress(data: bytes, compression=None) -> bytes:
+    if compression is None:
+        return data
+    if compression == 'gzip':
+        return gzip.compress(data)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError('zstd compression needs the zstandard package')
+        return zstandard.ZstdCompressor().compress(data)
+
+    raise ValueError(f'Unknown compression {compression}')
+
+
+def decompress(data: bytes) -> bytes:
+    if data[:2] == GZIP_MAGIC:
+        return gzip.decompress(data)
+    if data[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise ImportError('zstd compressed records need the zstandard package')
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+    return data
+
+
+class Aggregator(object):
+    """
+    collects user records sharing a partition key (and explicit hash key) into one aggregated record
+    """
+
+    def __init__(self, partition_key, explicit_hash_key=None, max_bytes=MAX_RECORD_BYTES):
+        self.partition_key = partition_key
+        self.explicit_hash_key = explicit_hash_key
+        self.header = encode_field(1, partition_key.encode('utf-8'))
+        if explicit_hash_key is not None:
+            self.header += encode_field(2, explicit_hash_key.encode('utf-8'))
+        self.record_max_bytes = max_bytes
+        # the partition key of the kinesis record counts against the record limit as well
+        self.max_bytes = max_bytes - len(partition_key.encode('utf-8'))
+        self.user_records = []
+        self.size = len(KPL_MAGIC) + len(self.header) + DIGEST_SIZE
+
+    def __len__(self):
+        return len(self.user_records)
+
+    def encode(self, data) -> bytes:
+        return encode_user_record(to_bytes(data), 0 if self.explicit_hash_key is not None else None)
+
+    def fits(self, user_record: bytes):
+        return self.size + len(user_record) <= self.max_bytes
+
+    def add(self, user_record: bytes):
+        self.user_records.append(user_record)
+        self.size += len(user_record)
+
+    def to_record(self, compression=None):
+        message = self.header + b''.join(self.user_records)
+        data = KPL_MAGIC + message + hashlib.md5(message).digest()
+        record = {'Data': compress(data, compression), 'PartitionKey': self.partition_key}
+        if self.explicit_hash_key is not None:
+            record['ExplicitHashKey'] = self.explicit_hash_key
+        return record
+
+    def to_records(self, indices, compression=None):
+        """
+        the aggregated record, split in halves while compression leaves it over max_bytes, which incompressible
+        data can do. a single user record that compression grows is sent uncompressed, it fits by construction.
+
+        :param indices: list, what each user record was built from
+        :return: list of (kinesis record, the indices it holds)
+        """
+        record = self.to_record(compression)
+        if len(record['Data']) <= self.max_bytes:
+            return [(record, indices)]
+        if len(self) == 1:
+            return [(self.to_record(), indices)]
+
+        half = len(self) // 2
+        records = []
+        for start, end in ((0, half), (half, len(self))):
+            part = Aggregator(self.partition_key, self.explicit_hash_key, self.record_max_bytes)
+            for user_record in self.user_records[start:end]:
+                part.add(user_record)
+            records += part.to_records(indices[start:end], compression)
+        return records
+
+
+def aggregate_records(records, compression=None, max_bytes=MAX_RECORD_BYTES):
+    """
+    aggregate records that share a partition key, keeping the order of the records within each key
+
+    a record too large to be aggregated with others is passed through unchanged. the size limit is checked before
+    compression and once more after it, see Aggregator.to_records.
+
+    :param records: list of kinesis records
+    :param compression: None, 'gzip' or 'zstd'
+    :return: list of (kinesis record, list of indices into records it holds), in order of first appearance
+    """
+    # results are keyed by the index of their first user record
+    aggregated = {}
+    open_aggregators = {}
+
+    for index, record in enumerate(records):
+        key = (record['PartitionKey'], record.get('ExplicitHashKey'))
+        if key not in open_aggregators:
+            open_aggregators[key] = (Aggregator(*key, max_bytes=max_bytes), [])
+
+        aggregator, indices = open_aggregators[key]
+        user_record = aggregator.encode(record['Data'])
+        if not aggregator.fits(user_record):
+            if len(aggregator):
+                for result in aggregator.to_records(indices, compression):
+                    aggregated[result[1][0]] = result
+                aggregator, indices = open_aggregators[key] = (Aggregator(*key, max_bytes=max_bytes), [])
+            if not aggregator.fits(user_record):
+                aggregated[index] = (record, [index])
+                continue
+
+        aggregator.add(user_record)
+        indices.append(index)
+
+    for aggregator, indices in open_aggregators.values():
+        if len(aggregator):
+            for result in aggregator.to_records(indices, compression):
+                aggregated[result[1][0]] = result
+
+    return [aggregated[index] for index in sorted(aggregated)]
+
+
+def deaggregate(data, partition_key=None, explicit_hash_key=None):
+    """
+    split a kinesis record's data back into the user records it was aggregated from
+
+    data that is not an aggregated record, or whose digest does not match, is returned as a single record.
+
+    :param data: bytes, the Data of a kinesis record as the consumer received it
+    :param partition_key: the PartitionKey of the kinesis record
+    :return: list of dicts with Data, PartitionKey and, when set, ExplicitHashKey
+    """
+    data = decompress(bytes(data))
+    message = data[len(KPL_MAGIC):-DIGEST_SIZE]
+    if data[:len(KPL_MAGIC)] != KPL_MAGIC or len(data) < len(KPL_MAGIC) + DIGEST_SIZE or hashlib.md5(message).digest() != data[-DIGEST_SIZE:]:
+        record = {'Data': data, 'PartitionKey': partition_key}
+        if explicit_hash_key is not None:
+            record['ExplicitHashKey'] = explicit_hash_key
+        return [record]
+
+    partition_keys = []
+    explicit_hash_keys = []
+    user_records = []
+    for field_number, value in iter_fields(message):
+        if field_number == 1:
+            partition_keys.append(bytes(value).decode('utf-8'))
+        elif field_number == 2:
+            explicit_hash_keys.append(bytes(value).decode('utf-8'))
+        elif field_number == 3:
+            user_records.append(value)
+
+    records = []
+    for user_record in user_records:
+        fields = dict(iter_fields(user_record))
+        record = {'Data': bytes(fields[3]), 'PartitionKey': partition_keys[fields[1]]}
+        if 2 in fields:
+            record['ExplicitHashKey'] = explicit_hash_keys[fields[2]]
+        records.append(record)
+
+    return records
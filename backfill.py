@@ -0,0 +1,313 @@
+"""
+replay DynamoDB export or stream record files through the publisher, e.g. to re-sync the streams after an outage
+
+    python -m backfill export-part-0001.json.gz export-part-0002.json.gz --checkpoint backfill.json --rate 2000
+
+every line of an input file, optionally gzip compressed, is either
+- a DynamoDB export item, {"Item": {...}}, published like an INSERT of the application
+- a DynamoDB stream record, as lambda receives it
+- a whole lambda event, {"Records": [...]}
+
+files are read line by line and batch_size lines at a time are built into kinesis records by a pool of processes,
+with at most two batches per worker pending, so memory stays constant however large the input is. the records go
+through the same Publisher, chunking and retries as the lambda. after every batch that was published completely
+the checkpoint file records the line to resume from. a batch with records that could not be published stops the
+backfill, running it again resumes from that batch. lines that fail to build are appended as they are to the failed
+file, --failed or <checkpoint>.failed.jsonl, which is itself valid input for a later backfill. the exit status is
+non-zero when any line failed to build or publish.
+
+--fake publishes to an in-memory FakeKinesisClient instead of kinesis and prints what it received.
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+
+import kinesis_client
+from dedup import get_deduplicator
+from fake_kinesis import FakeKinesisClient
+from handler import drop_oversized, get_stream_name, iter_fingerprinted_records
+from metrics import metrics
+from publisher import Publisher
+
+
+DEFAULT_BATCH_SIZE = 500
+EXPORT_KEYS = ('application_uuid', 'email')
+
+
+def open_lines(path):
+    """
+    :return: text file object, decompressed when path ends with .gz
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+
+    return open(path, encoding='utf-8')
+
+
+def export_item_record(item, position):
+    """
+    the stream record of an INSERT of an exported item
+    :param item: dict, the Item of a DynamoDB export line
+    :param position: str, the item's place in the input, used as its eventID and SequenceNumber
+    :return: dict
+    """
+    return {
+        'eventID': f'backfill-{position}',
+        'eventName': 'INSERT',
+        'dynamodb': {
+            'Keys': {key: item[key] for key in EXPORT_KEYS if key in item},
+            'NewImage': item,
+            'SequenceNumber': position,
+        },
+    }
+
+
+def iter_stream_records(line, position):
+    """
+    :param line: str, a line of an input file
+    :param position: str
+    :return: generator of (position, stream record)
+    """
+    data = json.loads(line)
+    if 'Item' in data:
+        yield position, export_item_record(data['Item'], position)
+    elif 'Records' in data:
+        for index, record in enumerate(data['Records']):
+            yield f'{position}.{index}', record
+    else:
+        yield position, data
+
+
+def iter_batches(path, start_line=0, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    :return: generator of (line number after the batch, list of (position, line))
+    """
+    batch = []
+    line_number = 0
+    with open_lines(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if line_number <= start_line or not line.strip():
+                continue
+            batch.append((f'{os.path.basename(path)}:{line_number}', line))
+            if len(batch) == batch_size:
+                yield line_number, batch
+                batch = []
+
+    if batch:
+        yield line_number, batch
+
+
+def build_batch(batch):
+    """
+    build the kinesis records of a batch of input lines, run in the worker processes
+
+    a line is built completely or not at all, so a failed line can be replayed as it is
+
+    :param batch: list of (position, line)
+    :return: (list of (stream name, source, fingerprinted records), list of the lines that failed to build)
+    """
+    built = []
+    failed = []
+    for position, line in batch:
+        line_built = []
+        try:
+            for source, record in iter_stream_records(line, position):
+                if record.get('eventName') not in ('INSERT', 'MODIFY'):
+                    continue
+                line_built.append((get_stream_name(record), source, drop_oversized(list(iter_fingerprinted_records(record)), source)))
+        except Exception as e:
+            print (e, position, 'failed to build kinesis records', file=sys.stderr)
+            failed.append(line)
+            continue
+        built += line_built
+
+    return built, failed
+
+
+def load_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return {}
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    """
+    written to a temporary file and renamed so an interrupted write never leaves a corrupt checkpoint
+    """
+    if not path:
+        return
+
+    with open(f'{path}.tmp', 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def failed_path_for(checkpoint_path):
+    """
+    :return: the default file lines that failed to build are written to, next to the checkpoint
+    """
+    return f'{checkpoint_path}.failed.jsonl' if checkpoint_path else 'backfill.failed.jsonl'
+
+
+def save_failed(path, lines):
+    """
+    append lines that failed to build, so the file can be backfilled once they are fixed
+    """
+    if not path or not lines:
+        return
+
+    with open(path, 'a', encoding='utf-8') as f:
+        for line in lines:
+            f.write(line if line.endswith('\n') else line + '\n')
+
+
+class Pacer(object):
+    """
+    keeps the publishing rate at or below rate records per second, 0 for unlimited
+    """
+
+    def __init__(self, rate=0, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.clock = clock
+        self.sleep = sleep
+        self.start = clock()
+        self.count = 0
+
+    def wait(self, count):
+        if not self.rate:
+            return
+        self.count += count
+        delay = self.count / self.rate - (self.clock() - self.start)
+        if delay > 0:
+            self.sleep(delay)
+
+
+def publish_batch(built, stream_name=None, deduplicator=None):
+    """
+    :param built: the records of a batch, see build_batch
+    :param stream_name: str, publish every record to this stream instead of the one the handler picks
+    :return: (number of records, set of the sources with records that were not published)
+    """
+    publisher = Publisher(deduplicator=deduplicator)
+    count = 0
+    for record_stream_name, source, fingerprinted in built:
+        if deduplicator is not None and fingerprinted:
+            published = deduplicator.published([key for key, _ in fingerprinted])
+            fingerprinted = [(key, record) for key, record in fingerprinted if key not in published]
+        for key, record in fingerprinted:
+            publisher.add(stream_name or record_stream_name, record, (source,), (key,))
+        count += len(fingerprinted)
+
+    return count, publisher.wait()
+
+
+def iter_built(batches, executor=None, window=2):
+    """
+    build batches in the executor, keeping at most window batches pending, or in this process without one
+
+    batches still pending when the generator is closed are cancelled.
+
+    :return: generator of (line number after the batch, number of lines, build_batch result), in input order
+    """
+    if executor is None:
+        for line_number, batch in batches:
+            yield line_number, len(batch), build_batch(batch)
+        return
+
+    pending = deque()
+    try:
+        for line_number, batch in batches:
+            pending.append((line_number, len(batch), executor.submit(build_batch, batch)))
+            if len(pending) >= window:
+                line_number, lines, future = pending.popleft()
+                yield line_number, lines, future.result()
+
+        while pending:
+            line_number, lines, future = pending.popleft()
+            yield line_number, lines, future.result()
+    finally:
+        # Executor.shutdown(cancel_futures=True) needs python 3.9
+        for _, _, future in pending:
+            future.cancel()
+
+
+def backfill(paths, checkpoint_path=None, workers=None, batch_size=DEFAULT_BATCH_SIZE, rate=0, stream_name=None, failed_path=None):
+    """
+    :param paths: list of input files
+    :param workers: number of processes building records, 0 builds them in this process
+    :param failed_path: file the lines that failed to build are appended to, with the checkpoint of their batch
+    :return: dict of counts
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    deduplicator = get_deduplicator()
+    pacer = Pacer(rate)
+    totals = {'lines': 0, 'records': 0, 'build_failures': 0, 'publish_failures': 0}
+    workers = os.cpu_count() if workers is None else workers
+    executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+
+    try:
+        for path in paths:
+            batches = iter_batches(path, checkpoint.get(path, 0), batch_size)
+            with closing(iter_built(batches, executor, workers * 2)) as built_batches:
+                for line_number, lines, (built, build_failed) in built_batches:
+                    count, failed = publish_batch(built, stream_name, deduplicator)
+                    pacer.wait(count)
+
+                    totals['lines'] += lines
+                    totals['records'] += count
+                    totals['build_failures'] += len(build_failed)
+                    if failed:
+                        totals['publish_failures'] += len(failed)
+                        print (len(failed), f'input records of {path} failed to publish, resume from line {checkpoint.get(path, 0)}', file=sys.stderr)
+                        return totals
+
+                    # saved only once the batch is done, a resumed backfill builds the batch and its failures again
+                    save_failed(failed_path, build_failed)
+                    checkpoint[path] = line_number
+                    save_checkpoint(checkpoint_path, checkpoint)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='replay DynamoDB export or stream record files through the kinesis publisher')
+    parser.add_argument('paths', nargs='+', help='json lines files, optionally .gz')
+    parser.add_argument('--checkpoint', help='json file the progress is saved to and resumed from')
+    parser.add_argument('--workers', type=int, default=None, help='processes building records, default one per core, 0 for none')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='input lines per batch')
+    parser.add_argument('--rate', type=float, default=0, help='kinesis records per second, default unlimited')
+    parser.add_argument('--stream-name', help='publish to this stream instead of the one the handler picks')
+    parser.add_argument('--failed', help='json lines file the lines that fail to build are appended to, default <checkpoint>.failed.jsonl')
+    parser.add_argument('--fake', action='store_true', help='publish to an in-memory FakeKinesisClient')
+    args = parser.parse_args()
+
+    metrics.enabled = False
+    client = None
+    if args.fake:
+        client = FakeKinesisClient(store_records=False)
+        kinesis_client.set_client(client)
+
+    failed_path = args.failed or failed_path_for(args.checkpoint)
+    totals = backfill(args.paths, args.checkpoint, args.workers, args.batch_size, args.rate, args.stream_name, failed_path)
+    if totals['build_failures']:
+        print (totals['build_failures'], f'input lines failed to build, they were written to {failed_path}', file=sys.stderr)
+    if client is not None:
+        totals['fake_streams'] = dict(client.published)
+        totals['fake_calls'] = len(client.calls)
+    print(json.dumps(totals, indent=2))
+    return 1 if totals['publish_failures'] or totals['build_failures'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
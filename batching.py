@@ -0,0 +1,95 @@
+from exceptions import RecordTooLargeException
+
+
+# https://docs.aws.amazon.com/kinesis/latest/APIReference/API_PutRecords.html
+MAX_RECORDS_PER_REQUEST = 500
+MAX_RECORD_BYTES = 1024 * 1024
+MAX_REQUEST_BYTES = 5 * 1024 * 1024
+
+
+def record_size(record):
+    """
+    the number of bytes kinesis counts against the limits for a record: data blob plus partition key
+    :param record: dict
+    :return: int
+    """
+    data = record['Data']
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+
+    return len(data) + len(record['PartitionKey'].encode('utf-8'))
+
+
+class Chunker(object):
+    """
+    incrementally fills put_records sized chunks, for records that are produced one at a time
+
+    add returns the chunk that became full, so at most one chunk per Chunker is held in memory.
+
+    :param max_records: int
+    :param max_bytes: int
+    :param max_record_bytes: int
+    """
+
+    def __init__(self, max_records=MAX_RECORDS_PER_REQUEST, max_bytes=MAX_REQUEST_BYTES, max_record_bytes=MAX_RECORD_BYTES):
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.max_record_bytes = max_record_bytes
+        self.count = 0
+        self.records = []
+        self.sources = []
+        self.size = 0
+
+    def add(self, record, sources=None):
+        """
+        :param record: kinesis record
+        :param sources: tuple of stream record SequenceNumbers the record was built from
+        :return: (records, sources) of the chunk the record did not fit in, or None
+        """
+        size = record_size(record)
+        if size > self.max_record_bytes:
+            raise RecordTooLargeException(f'Record {self.count} is {size} bytes, the limit is {self.max_record_bytes} bytes')
+        self.count += 1
+
+        chunk = None
+        if self.records and (len(self.records) == self.max_records or self.size + size > self.max_bytes):
+            chunk = self.flush()
+
+        self.records.append(record)
+        self.sources.append(sources)
+        self.size += size
+        return chunk
+
+    def flush(self):
+        """
+        :return: (records, sources) of the current chunk, or None when it is empty
+        """
+        if not self.records:
+            return None
+
+        chunk = (self.records, self.sources)
+        self.records = []
+        self.sources = []
+        self.size = 0
+        return chunk
+
+
+def chunk_records(records, max_records=MAX_RECORDS_PER_REQUEST, max_bytes=MAX_REQUEST_BYTES, max_record_bytes=MAX_RECORD_BYTES):
+    """
+    split records into put_records sized chunks, keeping the original order
+
+    each chunk is filled greedily until the next record would exceed the record count or byte limit,
+    which gives the fewest possible calls for an order preserving split.
+
+    :param records: iterable of kinesis records
+    :return: generator of lists of kinesis records
+    """
+    chunker = Chunker(max_records, max_bytes, max_record_bytes)
+    for record in records:
+        chunk = chunker.add(record)
+        if chunk:
+            yield chunk[0]
+
+    chunk = chunker.flush()
+    if chunk:
+        yield chunk[0]
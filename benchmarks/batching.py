@@ -0,0 +1,44 @@
+"""
+calls-per-event and bytes-per-call for put_records chunking
+
+run from the repository root: python -m benchmarks.batching
+"""
+import time
+
+from batching import chunk_records, record_size
+from handler import get_stream_records
+from benchmarks.synthetic import stream_event
+
+
+SCENARIOS = [
+    # (records in batch, medicaid details per record, bytes per detail value)
+    (100, 10, 64),
+    (1000, 10, 64),
+    (100, 200, 512),
+    (500, 50, 2048),
+]
+
+
+def run(record_count, attribute_count, value_size):
+    event = stream_event(record_count, attribute_count, value_size)
+    records = []
+    for record in event['Records']:
+        records += get_stream_records(record)
+
+    start = time.perf_counter()
+    chunks = list(chunk_records(records))
+    elapsed = time.perf_counter() - start
+
+    chunk_bytes = [sum(record_size(record) for record in chunk) for chunk in chunks]
+    return {
+        'records': len(records),
+        'calls': len(chunks),
+        'avg_bytes_per_call': sum(chunk_bytes) // len(chunks) if chunks else 0,
+        'max_bytes_per_call': max(chunk_bytes) if chunks else 0,
+        'chunking_ms': round(elapsed * 1000, 3),
+    }
+
+
+if __name__ == '__main__':
+    for scenario in SCENARIOS:
+        print(scenario, run(*scenario))
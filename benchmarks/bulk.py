@@ -0,0 +1,56 @@
+"""
+throughput of serializing many entities of one type per object, get_entity(...).to_json(), and in bulk with
+to_json_many, with and without datetime and int normalization
+
+run from the repository root: python -m benchmarks.bulk
+"""
+import timeit
+
+import stream
+from benchmarks.synthetic import random_text
+
+
+def sample_rows(count=10000):
+    """
+    Referral data with nested entities and a handful of distinct datetimes, like a backfill page
+    """
+    dates = [f'2020-01-{day:02}T10:00:00.000+0000' for day in range(1, 29)]
+    return [
+        {
+            'uuid': random_text(36),
+            'applicant': {'uuid': random_text(36), 'first_name': random_text(8), 'last_name': random_text(12), 'state': {'name': 'New York', 'abbr': 'NY'}},
+            'created_by': {'uuid': random_text(36), 'first_name': random_text(8), 'nickname': random_text(6)},
+            'created_date': dates[ii % len(dates)],
+            'last_modified_date': dates[(ii * 7) % len(dates)],
+            'track_id': str(ii),
+            'status': 'Open',
+            'income': str(ii * 100),
+            'attributes': {'type': 'Referral'},
+        }
+        for ii in range(count)
+    ]
+
+
+def per_object(rows, datetime_fields=(), int_fields=()):
+    records = []
+    for row in rows:
+        entity = stream.StreamModel.get_entity({'data': row})
+        for name in datetime_fields:
+            setattr(entity, name, entity.datetimeify(getattr(entity, name)))
+        for name in int_fields:
+            setattr(entity, name, entity.intify(getattr(entity, name)))
+        records.append(entity.to_json())
+    return records
+
+
+def bulk(rows, datetime_fields=(), int_fields=()):
+    return stream.Referral.to_json_many(rows, datetime_fields, int_fields)
+
+
+if __name__ == '__main__':
+    rows = sample_rows()
+    for datetime_fields, int_fields in (((), ()), (('created_date', 'last_modified_date'), ('track_id', 'income'))):
+        assert per_object(rows, datetime_fields, int_fields) == bulk(rows, datetime_fields, int_fields)
+        for function in (per_object, bulk):
+            seconds = min(timeit.repeat(lambda: function(rows, datetime_fields, int_fields), number=1, repeat=3))
+            print(f'{function.__name__:10} normalized {bool(datetime_fields)!s:5}  {len(rows) / seconds:10.0f} entities/s')
@@ -0,0 +1,49 @@
+"""
+cold vs warm cost of getting a kinesis client and of a small invocation, with metrics off so no EMF line is printed
+
+run from the repository root: python -m benchmarks.client
+"""
+import sys
+import time
+import subprocess
+
+import kinesis_client
+from fake_kinesis import FakeKinesisClient
+from handler import handler
+from metrics import metrics
+from benchmarks.synthetic import stream_event
+
+
+def time_per_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def cold_client():
+    # the session too, a cold start resolves credentials and loads the service model again
+    kinesis_client.reset_clients(session=True)
+    kinesis_client.get_client(stream_name='sps_data')
+
+
+def warm_client():
+    kinesis_client.get_client(stream_name='sps_data')
+
+
+def import_ms():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import handler'], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+if __name__ == '__main__':
+    metrics.enabled = False
+    print('import handler (new interpreter) ms', round(import_ms(), 3))
+    print('cold client ms', round(time_per_call(cold_client, 20), 3))
+    print('warm client ms', round(time_per_call(warm_client, 10000), 6))
+
+    event = stream_event(record_count=5, attribute_count=5)
+    kinesis_client.reset_clients()
+    kinesis_client.set_client(FakeKinesisClient())
+    print('warm invocation with a local client ms', round(time_per_call(lambda: handler(event, None), 200), 3))
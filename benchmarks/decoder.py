@@ -0,0 +1,84 @@
+"""
+micro-benchmarks for decoder.parse_value on NewImage shaped payloads, against the stack only
+decoder.parse_deep_value it falls back to past MAX_RECURSION_DEPTH and the recursive S/M/L only decoder
+
+run from the repository root: python -m benchmarks.decoder
+"""
+import timeit
+
+from decoder import parse_deep_value, parse_value
+
+
+def recursive_parse_value(value_entity):
+    """
+    the recursive S/M/L only decoder parse_value replaced, kept as the baseline
+    """
+    value = None
+    if 'S' in value_entity:
+        value = value_entity['S']
+    elif 'M' in value_entity:
+        value = {key: recursive_parse_value(val) for key, val in value_entity['M'].items()}
+    elif 'L' in value_entity:
+        value = [recursive_parse_value(ii) for ii in value_entity['L']]
+
+    return value
+
+
+def flat_detail():
+    return {'M': {'answer': {'S': 'yes'}, 'comment': {'S': 'verified by phone'}}}
+
+
+def nested_detail(width=5, depth=4):
+    value = {'S': 'leaf'}
+    for level in range(depth):
+        value = {'M': {f'field_{ii}': value if ii == 0 else {'S': f'value {level} {ii}'} for ii in range(width)}}
+    return value
+
+
+def list_detail(length=50):
+    return {'L': [{'M': {'name': {'S': f'asset {ii}'}, 'amount': {'S': str(ii * 100)}}} for ii in range(length)]}
+
+
+def typed_detail():
+    return {'M': {
+        'amount': {'N': '1250.75'},
+        'count': {'N': '3'},
+        'approved': {'BOOL': True},
+        'note': {'NULL': True},
+        'tags': {'SS': ['a', 'b', 'c']},
+        'history': {'L': [{'N': str(ii)} for ii in range(10)]},
+    }}
+
+
+def deep_detail(depth=5000):
+    value = {'S': 'bottom'}
+    for _ in range(depth):
+        value = {'M': {'child': value}}
+    return value
+
+
+PAYLOADS = {
+    'flat': flat_detail(),
+    'nested': nested_detail(),
+    'list': list_detail(),
+    'typed': typed_detail(),
+}
+
+
+if __name__ == '__main__':
+    for name, payload in PAYLOADS.items():
+        number = 20000
+        current = min(timeit.repeat(lambda: parse_value(payload), number=number, repeat=3)) / number * 1e6
+        stack = min(timeit.repeat(lambda: parse_deep_value(payload), number=number, repeat=3)) / number * 1e6
+        baseline = min(timeit.repeat(lambda: recursive_parse_value(payload), number=number, repeat=3)) / number * 1e6
+        print(f'{name:8} parse_value {current:8.3f} us  parse_deep_value {stack:8.3f} us  recursive baseline {baseline:8.3f} us')
+
+    deep = deep_detail()
+    try:
+        recursive_parse_value(deep)
+        baseline = 'ok'
+    except RecursionError:
+        baseline = 'RecursionError'
+    current = min(timeit.repeat(lambda: parse_value(deep), number=10, repeat=3)) / 10 * 1e3
+    stack = min(timeit.repeat(lambda: parse_deep_value(deep), number=10, repeat=3)) / 10 * 1e3
+    print(f'depth 5000 parse_value {current:8.3f} ms  parse_deep_value {stack:8.3f} ms  recursive baseline {baseline}')
@@ -0,0 +1,46 @@
+"""
+entity type dispatch cost over a mixed-type event stream
+
+compares the StreamModel.entity_types registry with the module attribute lookup it replaced, on dispatch alone
+and on full get_entity calls.
+
+run from the repository root: python -m benchmarks.dispatch
+"""
+import sys
+import timeit
+import random
+
+import stream
+from stream import StreamModel
+
+
+ENTITY_TYPES = ['Account', 'Contact', 'Referral', 'Applicant', 'Task', 'Event', 'FieldRepAppointment', 'MedicaidDetail']
+
+
+def mixed_stream(count=10000):
+    rnd = random.Random(0)
+    return [{'action': 'update', 'data': {'attributes': {'type': rnd.choice(ENTITY_TYPES)}, 'uuid': str(ii)}} for ii in range(count)]
+
+
+def module_lookup(events):
+    this_module = sys.modules[stream.__name__]
+    for event in events:
+        getattr(this_module, event['data']['attributes']['type'])
+
+
+def registry_lookup(events):
+    entity_types = StreamModel.entity_types
+    for event in events:
+        entity_types[event['data']['attributes']['type']]
+
+
+def get_entities(events):
+    for event in events:
+        StreamModel.get_entity(event)
+
+
+if __name__ == '__main__':
+    events = mixed_stream()
+    for name, func in (('module getattr', module_lookup), ('registry', registry_lookup), ('get_entity', get_entities)):
+        seconds = min(timeit.repeat(lambda: func(events), number=10, repeat=3)) / 10
+        print(f'{name:16} {seconds / len(events) * 1e9:8.1f} ns/event')
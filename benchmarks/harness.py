@@ -0,0 +1,118 @@
+"""
+end to end benchmark of handler.handler against an in-memory kinesis client
+
+every scenario generates synthetic DynamoDB stream batches, runs them through the full handler and reports
+records/sec, p50/p99 latency per batch, allocations and peak memory as json, e.g.
+
+    python -m benchmarks.harness --batches 20 --records 100 --attributes 50 --depth 2 --modify-ratio 0.5 --output bench.json
+
+compare two outputs to track regressions between versions.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from contextlib import redirect_stdout
+
+import kinesis_client
+from fake_kinesis import FakeKinesisClient
+from handler import handler
+from metrics import metrics
+from benchmarks.synthetic import stream_event
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = min(int(round(percent / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def run(batches=20, records=100, attributes=20, value_size=64, depth=1, modify_ratio=0.5, changed_ratio=0.1, seed=0):
+    """
+    :return: dict of the scenario and its results
+    """
+    events = [
+        stream_event(records, attributes, value_size, depth=depth, modify_ratio=modify_ratio, changed_ratio=changed_ratio, seed=seed + ii)
+        for ii in range(batches)
+    ]
+    client = FakeKinesisClient()
+    kinesis_client.reset_clients()
+    kinesis_client.set_client(client)
+    metrics.enabled = False
+
+    latencies = []
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        handler(events[0], None)  # warm up imports, the client and the thread pool
+        client.calls.clear()
+        client.streams.clear()
+
+        for event in events:
+            start = time.perf_counter()
+            handler(event, None)
+            latencies.append(time.perf_counter() - start)
+        records_out = sum(len(stream) for stream in client.streams.values())
+        put_records_calls = len(client.calls)
+
+        # a second pass under tracemalloc so tracing overhead does not skew the latencies
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for event in events:
+            handler(event, None)
+        after = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    allocations = sum(stat.count_diff for stat in after.compare_to(before, 'filename') if stat.count_diff > 0)
+    total_seconds = sum(latencies)
+    return {
+        'scenario': {
+            'batches': batches,
+            'records_per_batch': records,
+            'attributes': attributes,
+            'value_size': value_size,
+            'depth': depth,
+            'modify_ratio': modify_ratio,
+            'changed_ratio': changed_ratio,
+        },
+        'stream_records_per_sec': round(batches * records / total_seconds, 1),
+        'kinesis_records_out': records_out,
+        'kinesis_records_per_sec': round(records_out / total_seconds, 1),
+        'put_records_calls': put_records_calls,
+        'batch_latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'max': round(max(latencies) * 1000, 3),
+        },
+        'allocated_blocks_retained': allocations,
+        'peak_memory_bytes': peak,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batches', type=int, default=20)
+    parser.add_argument('--records', type=int, default=100, help='stream records per batch')
+    parser.add_argument('--attributes', type=int, default=20, help='medicaid details per record')
+    parser.add_argument('--value-size', type=int, default=64)
+    parser.add_argument('--depth', type=int, default=1, help='nesting depth of detail values')
+    parser.add_argument('--modify-ratio', type=float, default=0.5)
+    parser.add_argument('--changed-ratio', type=float, default=0.1, help='share of details changed by a MODIFY')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the json report here instead of stdout')
+    args = parser.parse_args()
+
+    result = run(args.batches, args.records, args.attributes, args.value_size, args.depth, args.modify_ratio, args.changed_ratio, args.seed)
+    result['python'] = platform.python_version()
+    report = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        sys.stdout.write(report + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+eager vs lazy Referral on a large payload: building it and reading a few top-level fields, the same followed by
+serializing it, and the peak memory of the built entities. lazy saves memory and the building, serializing converts
+every nested subtree either way
+
+run from the repository root: python -m benchmarks.lazy
+"""
+import timeit
+import tracemalloc
+
+from stream import Referral
+
+
+def user(ii):
+    return {'uuid': f'user-{ii}', 'first_name': 'Pat', 'last_name': 'Doe', 'email': 'pat@example.com', 'phone': '555-0100'}
+
+
+def account(ii, depth=2):
+    data = {'uuid': f'account-{ii}', 'name': 'Facility', 'state': {'name': 'New York', 'abbr': 'NY'}, 'city': 'Albany', 'zip': '12207'}
+    if depth:
+        data['parent_account'] = account(ii + 1, depth - 1)
+    return data
+
+
+def referral_payload(contacts=20):
+    return {
+        'uuid': 'referral',
+        'status': 'open',
+        'created_date': '2020-01-01T00:00:00.000+0000',
+        'created_by': user(0),
+        'intake_rep': user(1),
+        'marketing_rep': user(2),
+        'referring_party': account(0),
+        'referring_contact': {'uuid': 'contact', 'name': 'Sam', 'account': account(10)},
+        'applicant': {
+            'uuid': 'applicant',
+            'current_facility': account(20),
+            'state': {'name': 'New York', 'abbr': 'NY'},
+            'related_applicant_contacts': [
+                {'uuid': f'related-{ii}', 'created_by': user(ii), 'applicant_contact': {'uuid': f'contact-{ii}', 'created_by': user(ii)}}
+                for ii in range(contacts)
+            ],
+        },
+    }
+
+
+def read(build, payload):
+    referral = build(**payload)
+    referral.uuid, referral.status, referral.created_date
+    return referral
+
+
+def read_and_serialize(build, payload):
+    return read(build, payload).to_json()
+
+
+def peak_bytes(build, payload, count=100):
+    tracemalloc.start()
+    referrals = [build(**payload) for _ in range(count)]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del referrals
+    return peak // count
+
+
+if __name__ == '__main__':
+    payload = referral_payload()
+    number = 2000
+    for name, build in (('eager', Referral), ('lazy', Referral.lazy)):
+        read_seconds = min(timeit.repeat(lambda: read(build, payload), number=number, repeat=3)) / number
+        seconds = min(timeit.repeat(lambda: read_and_serialize(build, payload), number=number, repeat=3)) / number
+        print(f'{name:6} read {read_seconds * 1e6:8.1f} us/event  read and serialize {seconds * 1e6:8.1f} us/event  {peak_bytes(build, payload):8} peak bytes/event')
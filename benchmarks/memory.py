@@ -0,0 +1,64 @@
+"""
+peak memory of publishing a large DynamoDB stream batch, collecting every kinesis record before publishing versus
+streaming them into the publisher as they are built
+
+the event itself is built before measuring, so the peaks only cover the records produced from it.
+
+run from the repository root: python -m benchmarks.memory
+"""
+import os
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+import kinesis_client
+from fake_kinesis import FakeKinesisClient
+from handler import get_stream_name, get_stream_records, handler
+from metrics import metrics
+from publisher import Publisher
+from benchmarks.synthetic import stream_event
+
+
+def collected(event):
+    """
+    the previous handler: every record of the batch is built before the first put_records call
+    """
+    records = {}
+    sources = {}
+    for record in event['Records']:
+        stream_name = get_stream_name(record)
+        stream_records = get_stream_records(record)
+        records.setdefault(stream_name, []).extend(stream_records)
+        sources.setdefault(stream_name, []).extend([(record['dynamodb']['SequenceNumber'],)] * len(stream_records))
+
+    publisher = Publisher()
+    for stream_name, stream_records in records.items():
+        publisher.publish(stream_name, stream_records, sources[stream_name])
+    return publisher.wait()
+
+
+def streamed(event):
+    return handler(event, None)
+
+
+def measure(function, event):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(event)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+if __name__ == '__main__':
+    kinesis_client.set_client(FakeKinesisClient(store_records=False))
+    metrics.enabled = False
+    for record_count, attribute_count in ((1000, 20), (10000, 20)):
+        event = stream_event(record_count, attribute_count, value_size=256, modify_ratio=0.5, changed_ratio=0.5, seed=0)
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            streamed(event)  # warm up
+            results = [(function.__name__, measure(function, event)) for function in (collected, streamed)]
+
+        for name, (seconds, peak) in results:
+            print(f'{record_count:6} records  {name:10} peak {peak / 1024 / 1024:8.2f} MiB  {seconds * 1000:8.1f} ms')
@@ -0,0 +1,59 @@
+"""
+construction time, to_dict time and allocated bytes per instance for every StreamModel type
+
+the baseline is the same constructor on a class with a per-instance __dict__, like the hand-written models had.
+
+run from the repository root: python -m benchmarks.models
+"""
+import timeit
+import tracemalloc
+
+import stream
+
+
+def sample_kwargs(cls):
+    """
+    kwargs setting every declared field, nested models left unset
+    """
+    return {
+        field.source: f'{field.name} value'
+        for field in cls.fields
+        if isinstance(field, stream.Field) and field.model is None
+    }
+
+
+def dict_backed(cls):
+    """
+    a copy of cls without __slots__, serialized through __dict__
+    """
+    baseline = type(f'{cls.__name__}Baseline', (object,), {'__init__': cls.__init__, 'VALUE_NOT_SET': stream.VALUE_NOT_SET})
+    baseline.to_dict = lambda self: {name: stream.to_dict_value(value) for name, value in self.__dict__.items()}
+    return baseline
+
+
+def allocated_bytes(cls, kwargs, count=1000):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    instances = [cls(**kwargs) for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del instances
+    return sum(stat.size_diff for stat in after.compare_to(before, 'filename')) // count
+
+
+def model_types():
+    return [
+        cls for cls in vars(stream).values()
+        if isinstance(cls, type) and issubclass(cls, stream.StreamModel) and getattr(cls, 'fields', None) is not None
+    ]
+
+
+if __name__ == '__main__':
+    number = 20000
+    for cls in model_types():
+        kwargs = sample_kwargs(cls)
+        for label, model in (('slots', cls), ('__dict__', dict_backed(cls))):
+            construct = min(timeit.repeat(lambda: model(**kwargs), number=number, repeat=3)) / number * 1e6
+            instance = model(**kwargs)
+            to_dict = min(timeit.repeat(instance.to_dict, number=number, repeat=3)) / number * 1e6
+            print(f'{cls.__name__:24} {label:8} construct {construct:7.3f} us  to_dict {to_dict:7.3f} us  {allocated_bytes(model, kwargs):6} bytes/instance')
@@ -0,0 +1,39 @@
+"""
+wall-clock time of publishing multi-stream, multi-chunk batches sequentially and concurrently
+
+the fake kinesis client sleeps for every put_records call to stand in for the round trip.
+
+run from the repository root: python -m benchmarks.publisher
+"""
+import time
+
+import kinesis_client
+from fake_kinesis import FakeKinesisClient
+from publisher import Publisher, MAX_IN_FLIGHT
+from benchmarks.synthetic import random_text
+
+
+def batch(stream_count=2, records_per_stream=2000, record_size=512):
+    return {
+        f'stream-{ii}': [{'Data': random_text(record_size).encode(), 'PartitionKey': f'app-{jj % 50}'} for jj in range(records_per_stream)]
+        for ii in range(stream_count)
+    }
+
+
+def publish(records, max_in_flight):
+    publisher = Publisher(max_in_flight=max_in_flight)
+    start = time.perf_counter()
+    for stream_name, stream_records in records.items():
+        publisher.publish(stream_name, stream_records, [(str(ii),) for ii in range(len(stream_records))])
+    failed = publisher.wait()
+    return time.perf_counter() - start, failed
+
+
+if __name__ == '__main__':
+    client = FakeKinesisClient(latency=0.05)
+    kinesis_client.set_client(client)
+    records = batch()
+    for max_in_flight in (1, MAX_IN_FLIGHT):
+        client.calls.clear()
+        seconds, failed = publish(records, max_in_flight)
+        print(f'max_in_flight {max_in_flight:2}  {len(client.calls)} calls  {seconds * 1000:8.1f} ms  {len(failed)} failed')
@@ -0,0 +1,56 @@
+"""
+throughput and payload size of the kinesis Data encoding
+
+compares the previous double encoding (each detail json.dumps'd into a string inside the envelope) with
+serialization.dumps for every available encoder.
+
+run from the repository root: python -m benchmarks.serialization
+"""
+import json
+import time
+
+import serialization
+from decoder import json_default
+from stream import TurbocaidApplication
+from benchmarks.synthetic import random_text
+
+
+def envelope(detail_count=100, value_size=128):
+    details = [
+        {
+            'event_id': 'event',
+            'uuid': f'detail-{ii}',
+            'attribute_name': f'attribute_{ii}',
+            'attribute_value': {'answer': random_text(value_size), 'comment': 'a "quoted" comment'},
+            'created_at': '2020-01-01T00:00:00.000000',
+            'updated_at': '2020-01-02T00:00:00.000000',
+        }
+        for ii in range(detail_count)
+    ]
+    turbo_app = TurbocaidApplication(event_id='event', uuid='app', created_at='now', updated_at='now')
+    turbo_app.medicaid_details = details
+    return turbo_app
+
+
+def double_encoded(turbo_app):
+    data = turbo_app.to_dict()
+    data['medicaid_details'] = [json.dumps(ii, default=json_default) for ii in data['medicaid_details']]
+    return json.dumps(data, default=json_default).encode('utf-8')
+
+
+def measure(encode, turbo_app, number=200):
+    start = time.perf_counter()
+    for _ in range(number):
+        payload = encode(turbo_app)
+    elapsed = time.perf_counter() - start
+    return number / elapsed, len(payload)
+
+
+if __name__ == '__main__':
+    turbo_app = envelope()
+    per_second, size = measure(double_encoded, turbo_app)
+    print(f'{"double encoded":16} {per_second:10.0f} records/s {size:8} bytes')
+    for name in serialization.ENCODERS:
+        encoder = serialization.get_encoder(name)
+        per_second, size = measure(lambda app: encoder(app.to_dict()), turbo_app)
+        print(f'{name:16} {per_second:10.0f} records/s {size:8} bytes')
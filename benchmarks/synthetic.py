@@ -0,0 +1,92 @@
+"""
+synthetic DynamoDB stream batches in the shape of the turbocaid applications table
+"""
+import copy
+import uuid
+import random
+
+
+def random_text(length):
+    return random.getrandbits(4 * length + 4).to_bytes(length // 2 + 1, 'big').hex()[:length]
+
+
+def random_uuid():
+    return str(uuid.UUID(int=random.getrandbits(128), version=4))
+
+
+def detail_value(value_size=64, depth=1):
+    """
+    a raw medicaid detail value: a map nested depth levels deep with a string leaf of value_size characters
+    """
+    value = {'S': random_text(value_size)}
+    for level in range(depth):
+        value = {'M': {'answer': value, 'level': {'N': str(level)}}}
+    return value
+
+
+def medicaid_detail_attribute(value_size=64, depth=1):
+    """
+    build a NewImage attribute in the shape the turbocaid table stores medicaid details
+    :param value_size: int, length of the detail value
+    :param depth: int, nesting depth of the detail value
+    :return: dict
+    """
+    return {
+        'M': {
+            'type': {'S': 'medicaid_detail'},
+            'uuid': {'S': random_uuid()},
+            'created_date': {'S': '2020-01-01T00:00:00.000000'},
+            'updated_date': {'S': '2020-01-02T00:00:00.000000'},
+            'value': detail_value(value_size, depth),
+        }
+    }
+
+
+def stream_record(attribute_count=10, value_size=64, event_name='INSERT', email='someone@example.com', depth=1, changed_ratio=0.1):
+    """
+    build a single DynamoDB stream record for an application
+
+    a MODIFY record carries an OldImage in which changed_ratio of the medicaid details have a different value.
+
+    :return: dict
+    """
+    new_image = {f'attribute_{ii}': medicaid_detail_attribute(value_size, depth) for ii in range(attribute_count)}
+    old_image = {}
+    if event_name == 'MODIFY':
+        old_image = copy.deepcopy(new_image)
+        for attr in random.sample(sorted(old_image), int(attribute_count * changed_ratio)):
+            old_image[attr]['M']['value'] = detail_value(value_size, depth)
+
+    app_id = random_uuid()
+    return {
+        'eventID': random_uuid().replace('-', ''),
+        'eventName': event_name,
+        'dynamodb': {
+            'Keys': {
+                'application_uuid': {'S': app_id},
+                'email': {'S': email},
+            },
+            'NewImage': new_image,
+            'OldImage': old_image,
+            'SequenceNumber': str(random.randint(10 ** 20, 10 ** 21)),
+        },
+    }
+
+
+def stream_event(record_count=100, attribute_count=10, value_size=64, event_name='INSERT', depth=1, modify_ratio=None, changed_ratio=0.1, seed=None):
+    """
+    build a DynamoDB stream event as lambda receives it
+
+    :param modify_ratio: share of MODIFY records, when set it overrides event_name
+    :param seed: seed the generator so the same batch can be replayed
+    :return: dict
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    records = []
+    for _ in range(record_count):
+        name = event_name if modify_ratio is None else ('MODIFY' if random.random() < modify_ratio else 'INSERT')
+        records.append(stream_record(attribute_count, value_size, name, depth=depth, changed_ratio=changed_ratio))
+
+    return {'Records': records}
@@ -0,0 +1,42 @@
+"""
+StreamModel.datetimeify against the strptime/strftime conversion it replaced
+
+run from the repository root: python -m benchmarks.timestamps
+"""
+import random
+import timeit
+from datetime import datetime, timedelta
+
+from stream import StreamModel
+from timestamps import SALESFORCE_DATETIME_FORMAT, MYSQL_DATETIME_FORMAT, parse_salesforce_datetime, salesforce_to_mysql_datetime
+
+
+def strptime_datetimeify(datetime_string):
+    return datetime.strptime(datetime_string, SALESFORCE_DATETIME_FORMAT).strftime(MYSQL_DATETIME_FORMAT)
+
+
+def column(count, distinct):
+    """
+    count salesforce timestamps drawn from distinct values, like created/updated dates repeated across nested entities
+    """
+    start = datetime(2020, 1, 1)
+    values = [(start + timedelta(minutes=ii)).strftime('%Y-%m-%dT%H:%M:%S.000+0000') for ii in range(distinct)]
+    rnd = random.Random(0)
+    return [rnd.choice(values) for _ in range(count)]
+
+
+def per_value(func, values, number=5):
+    seconds = min(timeit.repeat(lambda: func(values), number=number, repeat=3)) / number
+    return seconds / len(values) * 1e9
+
+
+if __name__ == '__main__':
+    for distinct in (10000, 100):
+        values = column(10000, distinct)
+        print(f'{distinct} distinct values in 10000')
+        print(f'  strptime          {per_value(lambda vs: [strptime_datetimeify(v) for v in vs], values):8.1f} ns/value')
+        print(f'  fast path         {per_value(lambda vs: [parse_salesforce_datetime(v) for v in vs], values):8.1f} ns/value')
+        salesforce_to_mysql_datetime.cache_clear()
+        print(f'  datetimeify       {per_value(lambda vs: [StreamModel.datetimeify(v) for v in vs], values):8.1f} ns/value')
+        salesforce_to_mysql_datetime.cache_clear()
+        print(f'  datetimeify_many  {per_value(StreamModel.datetimeify_many, values):8.1f} ns/value')
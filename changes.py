@@ -0,0 +1,46 @@
+MEDICAID_DETAIL_TYPE = 'medicaid_detail'
+
+
+def is_medicaid_detail(attribute):
+    """
+    whether a raw dynamodb image attribute holds a medicaid detail
+    :param attribute: dict
+    :return: bool
+    """
+    members = attribute.get('M')
+    return members is not None and 'value' in members and members.get('type', {}).get('S') == MEDICAID_DETAIL_TYPE
+
+
+def changed_medicaid_details(new_image, old_image=None, is_detail=is_medicaid_detail, value_key='value'):
+    """
+    compare the medicaid detail attributes of two raw dynamodb images
+
+    values are compared in their raw attribute value form, so unchanged details are never decoded. dict
+    equality stops at the first differing size or key, which is cheaper than hashing both sides.
+
+    :param new_image: dict
+    :param old_image: dict, None when there is no previous image and every detail is new
+    :param is_detail: callable telling the detail attributes from the others, see projection.Projection.matches
+    :param value_key: the member holding the detail value
+    :return: generator of (attribute_name, new_attribute, old_attribute), new_attribute is None when removed
+    """
+    old_image = old_image or {}
+
+    for attr, new_attribute in new_image.items():
+        if not is_detail(new_attribute):
+            continue
+
+        old_attribute = old_image.get(attr)
+        if old_attribute is not None and is_detail(old_attribute):
+            new_value = new_attribute['M'][value_key]
+            old_value = old_attribute['M'][value_key]
+            if new_value == old_value:
+                continue
+        else:
+            old_attribute = None
+
+        yield attr, new_attribute, old_attribute
+
+    for attr, old_attribute in old_image.items():
+        if attr not in new_image and is_detail(old_attribute):
+            yield attr, None, old_attribute
@@ -0,0 +1,147 @@
+import base64
+from decimal import Decimal
+
+
+def parse_number(number_string: str):
+    """
+    decode a dynamodb N value without losing precision: int when integral, Decimal otherwise
+    """
+    if '.' in number_string or 'e' in number_string or 'E' in number_string:
+        return Decimal(number_string)
+
+    return int(number_string)
+
+
+def parse_binary(binary):
+    """
+    decode a dynamodb B value, which lambda stream events carry base64 encoded
+    """
+    if isinstance(binary, (bytes, bytearray)):
+        return bytes(binary)
+
+    return base64.b64decode(binary)
+
+
+def parse_scalar(value_entity):
+    """
+    decode a dynamodb attribute value that is not a map or a list
+    """
+    if 'S' in value_entity:
+        return value_entity['S']
+    if 'N' in value_entity:
+        return parse_number(value_entity['N'])
+    if 'BOOL' in value_entity:
+        return value_entity['BOOL']
+    if 'NULL' in value_entity:
+        return None
+    if 'SS' in value_entity:
+        return set(value_entity['SS'])
+    if 'NS' in value_entity:
+        return {parse_number(number) for number in value_entity['NS']}
+    if 'B' in value_entity:
+        return parse_binary(value_entity['B'])
+    if 'BS' in value_entity:
+        return {parse_binary(binary) for binary in value_entity['BS']}
+
+    return None
+
+
+# maps and lists nested deeper than this are decoded with an explicit stack instead of recursion
+MAX_RECURSION_DEPTH = 32
+
+
+def parse_value(value_entity):
+    """
+    build a valid value from a dynamodb attribute value of any type
+
+    scalars and shallow maps and lists are decoded recursively, which is the fastest for the documents dynamodb
+    streams usually carry. a subtree nested deeper than MAX_RECURSION_DEPTH is handed to parse_deep_value, so
+    deep documents do not hit the recursion limit. unknown types decode to None.
+
+    :param value_entity: dict, e.g. {'M': {'name': {'S': 'value'}}}
+    :return: the python value
+    """
+    return _parse_value(value_entity, MAX_RECURSION_DEPTH)
+
+
+def _parse_value(value_entity, depth):
+    if 'M' in value_entity:
+        value = {}
+        members = value_entity['M'].items()
+    elif 'L' in value_entity:
+        value = [None] * len(value_entity['L'])
+        members = enumerate(value_entity['L'])
+    else:
+        return parse_scalar(value_entity)
+
+    if not depth:
+        return parse_deep_value(value_entity)
+
+    depth -= 1
+    # as in parse_deep_value, strings, the most common members, are decoded in place
+    for name, member in members:
+        if 'S' in member:
+            value[name] = member['S']
+        elif 'M' in member or 'L' in member:
+            value[name] = _parse_value(member, depth)
+        else:
+            value[name] = parse_scalar(member)
+
+    return value
+
+
+def parse_deep_value(value_entity):
+    """
+    parse_value that walks nested maps and lists with an explicit stack, for documents of any depth
+    """
+    if 'M' not in value_entity and 'L' not in value_entity:
+        return parse_scalar(value_entity)
+
+    root = [None]
+    # only maps and lists go on the stack, scalar members are decoded in place
+    stack = [(value_entity, root, 0)]
+    pop = stack.pop
+    push = stack.append
+
+    while stack:
+        entity, target, key = pop()
+
+        if 'M' in entity:
+            value = target[key] = {}
+            members = entity['M'].items()
+        else:
+            items = entity['L']
+            value = target[key] = [None] * len(items)
+            members = enumerate(items)
+
+        for name, member in members:
+            if 'S' in member:
+                value[name] = member['S']
+            elif 'M' in member or 'L' in member:
+                # holds the member's position in the map until it is decoded
+                value[name] = None
+                push((member, value, name))
+            else:
+                value[name] = parse_scalar(member)
+
+    return root[0]
+
+
+def json_default(value):
+    """
+    json.dumps default for the types parse_value produces that json has no representation for
+
+    a Decimal is always a json number: an int when it is integral, which stays exact, and a float otherwise, which
+    keeps the nearest double, about 17 significant digits. a fraction with more digits than that is rounded.
+    """
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    if isinstance(value, (set, frozenset)):
+        try:
+            return sorted(value)
+        except TypeError:
+            return list(value)
+
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
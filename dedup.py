@@ -0,0 +1,201 @@
+"""
+skips kinesis records that were already published for a redelivered stream record
+
+lambda retries and dynamodb stream redelivery hand us the same eventIDs again. every record is fingerprinted by
+(eventID, attribute_name) and the fingerprints of records published successfully are remembered in a bounded
+in-process cache, which survives warm starts only, and optionally in a persistent store that also outlives the
+container, e.g. a sqlite database on an EFS mount.
+"""
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from metrics import metrics
+
+
+DEDUP_ENABLED = os.environ.get('DEDUP_ENABLED', '').lower() in ('1', 'true', 'yes')
+# none or sqlite, other stores (e.g. dynamodb) are added with register_store
+DEDUP_STORE = os.environ.get('DEDUP_STORE', 'none')
+# required for the sqlite store, a path on an EFS mount: /tmp is private to a container and lost with it
+DEDUP_SQLITE_PATH = os.environ.get('DEDUP_SQLITE_PATH')
+# dynamodb streams keep records for 24 hours, nothing older is redelivered
+DEDUP_TTL_SECONDS = float(os.environ.get('DEDUP_TTL_SECONDS', 24 * 60 * 60))
+DEDUP_CACHE_SIZE = int(os.environ.get('DEDUP_CACHE_SIZE', 100000))
+# how often a store deletes its expired fingerprints, on add, so a long lived container keeps the table small
+DEDUP_EVICT_SECONDS = float(os.environ.get('DEDUP_EVICT_SECONDS', 60 * 60))
+
+
+def fingerprint(event_id, attribute_name=None):
+    """
+    :param event_id: str, eventID of the stream record
+    :param attribute_name: str, the medicaid detail, None for the application record of an INSERT
+    :return: str
+    """
+    return f'{event_id}:{attribute_name or ""}'
+
+
+class TTLCache(object):
+    """
+    thread safe set of keys that expire after ttl seconds, evicting the least recently added beyond max_size
+    """
+
+    def __init__(self, max_size=DEDUP_CACHE_SIZE, ttl=DEDUP_TTL_SECONDS, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._expires = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._expires)
+
+    def __contains__(self, key):
+        with self._lock:
+            expires = self._expires.get(key)
+            if expires is None:
+                return False
+            if expires <= self.clock():
+                del self._expires[key]
+                return False
+            return True
+
+    def add(self, key):
+        with self._lock:
+            self._expires.pop(key, None)
+            self._expires[key] = self.clock() + self.ttl
+            while len(self._expires) > self.max_size:
+                self._expires.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._expires.clear()
+
+
+class SqliteStore(object):
+    """
+    fingerprint store in a sqlite database, persistent across cold starts and shared by concurrent containers when
+    path is on an EFS mount
+
+    a store only needs contains(keys) returning the subset already published and add(keys).
+
+    :param path: str, required
+    :param ttl: seconds a fingerprint is kept
+    :param evict_seconds: expired fingerprints are deleted on open and then by the first add every evict_seconds
+    """
+
+    def __init__(self, path=DEDUP_SQLITE_PATH, ttl=DEDUP_TTL_SECONDS, evict_seconds=DEDUP_EVICT_SECONDS, clock=time.monotonic):
+        if not path:
+            raise ValueError('DEDUP_STORE=sqlite needs DEDUP_SQLITE_PATH, a path on an EFS mount')
+        self.ttl = ttl
+        self.evict_seconds = evict_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        # the default rollback journal, WAL needs memory shared by every process and does not work over NFS
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS published (fingerprint TEXT PRIMARY KEY, expires REAL NOT NULL)')
+        self._next_evict = 0.0
+        self.evict()
+
+    def contains(self, keys):
+        keys = list(keys)
+        found = set()
+        with self._lock:
+            # stay below the sqlite limit on bound parameters
+            for offset in range(0, len(keys), 500):
+                batch = keys[offset:offset + 500]
+                rows = self._connection.execute(
+                    f'SELECT fingerprint FROM published WHERE expires > ? AND fingerprint IN ({",".join("?" * len(batch))})',
+                    [time.time()] + batch
+                )
+                found.update(row[0] for row in rows)
+
+        return found
+
+    def add(self, keys):
+        expires = time.time() + self.ttl
+        with self._lock:
+            with self._connection:
+                self._connection.execute('BEGIN')
+                self._connection.executemany('INSERT OR REPLACE INTO published VALUES (?, ?)', [(key, expires) for key in keys])
+        if self.clock() >= self._next_evict:
+            self.evict()
+
+    def evict(self):
+        with self._lock:
+            self._next_evict = self.clock() + self.evict_seconds
+            self._connection.execute('DELETE FROM published WHERE expires <= ?', (time.time(),))
+
+
+STORES = {
+    'none': lambda: None,
+    'sqlite': SqliteStore,
+}
+
+
+def register_store(name, factory):
+    """
+    :param name: str, value of DEDUP_STORE
+    :param factory: callable returning a store, see SqliteStore
+    """
+    STORES[name] = factory
+
+
+class Deduplicator(object):
+    """
+    :param cache: TTLCache
+    :param store: persistent store, see SqliteStore, or None for the in-process cache only
+    """
+
+    def __init__(self, cache=None, store=None):
+        self.cache = cache if cache is not None else TTLCache()
+        self.store = store
+
+    def published(self, keys):
+        """
+        :param keys: list of fingerprints
+        :return: set of the fingerprints that were already published
+        """
+        found = {key for key in keys if key in self.cache}
+        missing = [key for key in keys if key not in found]
+        if self.store is not None and missing:
+            try:
+                from_store = self.store.contains(missing)
+            except Exception as e:
+                # publishing a duplicate is better than failing the batch
+                print (e, 'dedup store lookup failed')
+                from_store = set()
+            for key in from_store:
+                self.cache.add(key)
+            found |= from_store
+
+        metrics.increment('DedupHits', len(found))
+        metrics.increment('DedupMisses', len(keys) - len(found))
+        return found
+
+    def mark_published(self, keys):
+        """
+        :param keys: iterable of fingerprints of records kinesis accepted
+        """
+        keys = list(keys)
+        if not keys:
+            return
+        for key in keys:
+            self.cache.add(key)
+        if self.store is not None:
+            self.store.add(keys)
+
+
+_deduplicator = None
+
+
+def get_deduplicator():
+    """
+    the deduplicator shared by warm invocations, None unless DEDUP_ENABLED is set
+    """
+    global _deduplicator
+    if DEDUP_ENABLED and _deduplicator is None:
+        _deduplicator = Deduplicator(store=STORES[DEDUP_STORE]())
+
+    return _deduplicator
@@ -4,3 +4,7 @@ class MissingEntityException(Exception):
 
 class InvalidEntityException(Exception):
     pass
+
+
+class RecordTooLargeException(Exception):
+    pass
@@ -0,0 +1,82 @@
+import time
+import random
+import threading
+from collections import defaultdict
+
+from batching import MAX_RECORDS_PER_REQUEST, MAX_REQUEST_BYTES, record_size
+
+
+class FakeKinesisClient(object):
+    """
+    in-memory stand-in for the boto3 kinesis client, for running the publisher offline
+
+    :param failure_rate: probability that any record fails with failure_code
+    :param throttled_keys: partition keys whose first throttle_attempts records are throttled
+    :param throttle_attempts: int
+    :param failure_code: the ErrorCode of injected failures
+    :param rejected_keys: partition keys whose records always fail with rejected_code, which is not retryable
+    :param rejected_code: str
+    :param seed: seed for the failure injection
+    :param latency: seconds every put_records call takes, to stand in for the round trip
+    :param store_records: keep the published records in streams, turn off to only count them in published
+    """
+
+    def __init__(self, failure_rate=0.0, throttled_keys=(), throttle_attempts=1, failure_code='ProvisionedThroughputExceededException', seed=None, latency=0.0, store_records=True, rejected_keys=(), rejected_code='ValidationException'):
+        self.failure_rate = failure_rate
+        self.throttled_keys = set(throttled_keys)
+        self.throttle_attempts = throttle_attempts
+        self.failure_code = failure_code
+        self.rejected_keys = set(rejected_keys)
+        self.rejected_code = rejected_code
+        self.random = random.Random(seed)
+        self.latency = latency
+        self.store_records = store_records
+        self.streams = defaultdict(list)
+        self.published = defaultdict(int)
+        self.calls = []
+        self._key_attempts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _fails(self, record):
+        key = record['PartitionKey']
+        if key in self.throttled_keys:
+            self._key_attempts[key] += 1
+            if self._key_attempts[key] <= self.throttle_attempts:
+                return True
+
+        return self.failure_rate and self.random.random() < self.failure_rate
+
+    def _error_code(self, record):
+        if record['PartitionKey'] in self.rejected_keys:
+            return self.rejected_code
+
+        return self.failure_code if self._fails(record) else None
+
+    def put_records(self, Records, StreamName):
+        if len(Records) > MAX_RECORDS_PER_REQUEST or sum(record_size(record) for record in Records) > MAX_REQUEST_BYTES:
+            raise ValueError('put_records request exceeds the kinesis limits')
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            return self._put_records(Records, StreamName)
+
+    def _put_records(self, Records, StreamName):
+        self.calls.append((StreamName, len(Records)))
+        results = []
+        failed = 0
+        for record in Records:
+            error_code = self._error_code(record)
+            if error_code is not None:
+                failed += 1
+                results.append({'ErrorCode': error_code, 'ErrorMessage': 'Injected by FakeKinesisClient'})
+                continue
+
+            sequence_number = str(self.published[StreamName])
+            self.published[StreamName] += 1
+            if self.store_records:
+                self.streams[StreamName].append(record)
+            results.append({'SequenceNumber': sequence_number, 'ShardId': 'shardId-000000000000'})
+
+        return {'FailedRecordCount': failed, 'Records': results}
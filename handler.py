@@ -1,63 +1,76 @@
 import os
-import json
+import time
 import datetime
 
-import boto3
-
+from aggregation import aggregate_records
+from batching import MAX_RECORD_BYTES, record_size
+from changes import changed_medicaid_details
+from decoder import parse_value
+from dedup import fingerprint, get_deduplicator
+from metrics import function_dimensions, metrics, should_log_payload
+from partitioning import get_partitioner
+from projection import get_projection
+from publisher import ORDERED, Publisher
+from retry import deadline_from_context
+from spill import SPILL_DRAIN_SECONDS, SPILL_MAX_ATTEMPTS, drain, get_sink, spill
 from stream import TurbocaidApplication, MedicaidDetail
 
 
 TEST_USER_EMAIL = os.environ.get('TEST_USER_EMAIL')
+# opt-in KPL style aggregation of the records sharing a partition key, optionally gzip or zstd compressed
+AGGREGATE_RECORDS = os.environ.get('KINESIS_AGGREGATION', '').lower() in ('1', 'true', 'yes')
+COMPRESSION = os.environ.get('KINESIS_COMPRESSION') or None
+default_partitioner = get_partitioner()
+
 
-def parse_value(value_entity):
+def iter_medicaid_details(entity, is_insert):
+    """
+    decode and diff the medicaid details of a stream record, projected by the table's projection
+    :param entity: dict
+    :param is_insert: bool
+    :return: generator of (image attribute name, medicaid detail dict)
     """
-    build a valid value from various format value data
+    projection = get_projection(entity)
+    old_image = None if is_insert else entity['dynamodb'].get('OldImage')
+    value_key = projection.value_key
+    event_id = entity['eventID']
+    decode_seconds = 0.0
+
+    for attr, new_attribute, old_attribute in changed_medicaid_details(entity['dynamodb']['NewImage'], old_image, projection.matches, value_key):
+        start = time.perf_counter()
+        value = parse_value(new_attribute['M'][value_key]) if new_attribute is not None else None
+        decode_seconds += time.perf_counter() - start
+        if value is not None and value in ('', {}, []):
+            value = None
+        if value is None and old_attribute is None:
+            continue
+
+        # a detail that was removed or cleared is published with a None value
+        detail, missing = projection.extract((new_attribute or old_attribute)['M'], event_id, attr, value)
+        if missing:
+            metrics.increment('ProjectionMissingFields', len(missing))
+        if detail is None:
+            metrics.increment('ProjectionSkippedDetails')
+            continue
+
+        yield attr, detail
+
+    metrics.add_time('DecodeTime', decode_seconds)
+
+
+def iter_fingerprinted_records(entity, partitioner=None):
     """
-    value = None
-    if 'S' in value_entity:
-        value = value_entity['S']
-    elif 'M' in value_entity:
-        value = {key: parse_value(val) for key, val in value_entity['M'].items()}
-    elif 'L' in value_entity:
-        value = [parse_value(ii) for ii in value_entity['L']]
-
-    return value
+    lazily generate the kinesis records of a stream record, one decoded, modelled and serialized detail at a time
 
+    an INSERT is published as a single application record, so its details are collected first.
 
-def get_stream_records(entity):
-    """
-    generate stream records for kinesis
     :param entity: dict
-    :return: dict
+    :param partitioner: partition key strategy, see partitioning.get_partitioner
+    :return: generator of (dedup fingerprint, kinesis record)
     """
-    records = []
-    details = []
-
     is_insert = entity['eventName'] == 'INSERT'
-    is_insert = True
     app_id = entity['dynamodb']['Keys']['application_uuid']['S']
-
-    for attr, val in entity['dynamodb']['NewImage'].items():
-        if 'M' in val:
-            if 'value' not in val['M'] or 'type' not in val['M'] or val['M']['type']['S'] != 'medicaid_detail':
-                continue
-
-            value_entity = val['M']['value']
-            if is_insert or attr not in entity['dynamodb']['OldImage'] or value_entity != entity['dynamodb']['OldImage'][attr]['M']['value']:
-                value = parse_value(value_entity)
-                if not value:
-                    continue
-
-                detail = {
-                    'event_id': entity['eventID'],
-                    'uuid': val['M']['uuid']['S'],
-                    'attribute_name': attr,
-                    'attribute_value': value,
-                    'created_at': val['M']['created_date']['S'],
-                    'updated_at': val['M']['updated_date']['S']
-                }
-                
-                details.append(detail)
+    details = iter_medicaid_details(entity, is_insert)
 
     if is_insert:
         # TODO: take care of country, state, status
@@ -67,32 +80,166 @@ def get_stream_records(entity):
             created_at=datetime.datetime.now().isoformat(),
             updated_at=datetime.datetime.now().isoformat()
         )
-        turbo_app.medicaid_details = [json.dumps(ii) for ii in details]
-        details = [turbo_app]
+        turbo_app.medicaid_details = [detail for _, detail in details]
+        details = [(None, turbo_app)]
     else:
-        details = [MedicaidDetail(**detail) for detail in details]
+        details = ((attr, MedicaidDetail(**detail)) for attr, detail in details)
+
+    partitioner = partitioner or default_partitioner
+    serialize_seconds = 0.0
+    # fingerprinted by the image attribute name, which a projection cannot rename or leave out
+    for sequence, (attr, detail) in enumerate(details):
+        start = time.perf_counter()
+        record = {'Data': detail.to_json()}
+        record.update(partitioner(app_id, sequence))
+        serialize_seconds += time.perf_counter() - start
+        yield fingerprint(entity['eventID'], attr), record
+
+    metrics.add_time('SerializeTime', serialize_seconds)
+
+
+def drop_oversized(fingerprinted, source):
+    """
+    drop the records kinesis can never accept, so they neither fail a put_records call nor block the shard by failing
+    their stream record on every retry
+
+    :param fingerprinted: list of (fingerprints, kinesis record)
+    :param source: the SequenceNumber, or input position, the records were built from, for the log
+    :return: list of (fingerprints, kinesis record) within MAX_RECORD_BYTES
+    """
+    fitting = []
+    for keys, record in fingerprinted:
+        size = record_size(record)
+        if size > MAX_RECORD_BYTES:
+            print (source, f'dropped a {size} byte kinesis record, the limit is {MAX_RECORD_BYTES} bytes')
+            metrics.increment('RecordsTooLarge')
+            continue
+        fitting.append((keys, record))
+
+    return fitting
+
+
+def iter_stream_records(entity, partitioner=None):
+    """
+    :param entity: dict
+    :param partitioner: partition key strategy, see partitioning.get_partitioner
+    :return: generator of kinesis records
+    """
+    return (record for _, record in iter_fingerprinted_records(entity, partitioner))
+
+
+def get_stream_records(entity, partitioner=None):
+    """
+    generate stream records for kinesis
+    :param entity: dict
+    :param partitioner: partition key strategy, see partitioning.get_partitioner
+    :return: list of kinesis records
+    """
+    return list(iter_stream_records(entity, partitioner))
+
+
+def batch_item_failures(event, failed_sequence_numbers):
+    """
+    build the ReportBatchItemFailures response for the stream records that were not published
 
-    for detail in details:
-        records.append({
-            'Data': json.dumps(detail.__dict__),
-            'PartitionKey': app_id
-        })
+    lambda restarts the batch from the lowest reported sequence number, so records before it are not retried.
 
-    return records
+    :param event: dict
+    :param failed_sequence_numbers: set of dynamodb SequenceNumber
+    :return: dict
+    """
+    return {
+        'batchItemFailures': [
+            {'itemIdentifier': record['dynamodb']['SequenceNumber']}
+            for record in event['Records']
+            if record['dynamodb']['SequenceNumber'] in failed_sequence_numbers
+        ]
+    }
+
+
+def get_stream_name(entity):
+    """
+    the kinesis stream a dynamodb stream record is published to
+    :param entity: dict
+    :return: str
+    """
+    email = entity['dynamodb']['Keys']['email']['S']
+    return 'sps-data-integration-test' if email == TEST_USER_EMAIL else 'sps_data'
 
 
 def handler(event, context):
-    print(event)
-    records = []
+    log_payload = should_log_payload()
+    if log_payload:
+        print(event)
+    # records are handed to the publisher as each stream record is processed, so memory is bounded by the open and
+    # in-flight chunks instead of the size of the batch
+    deadline = deadline_from_context(context)
+    deduplicator = get_deduplicator()
+    # spilled records are replayed after later ones, so ordered publishing fails their stream records instead
+    sink = None if ORDERED else get_sink()
+    if sink is None:
+        publisher = Publisher(deadline=deadline, deduplicator=deduplicator)
+    else:
+        # retry briefly, what is still unsent is spilled and replayed by a later invocation
+        def spilling_publisher():
+            return Publisher(deadline=deadline, deduplicator=deduplicator, max_attempts=SPILL_MAX_ATTEMPTS, keep_unsent=True)
+
+        try:
+            seconds = SPILL_DRAIN_SECONDS if deadline is None else min(SPILL_DRAIN_SECONDS, (deadline - time.monotonic()) / 2)
+            drain(sink, spilling_publisher, seconds)
+        except Exception as e:
+            print (e, 'failed to drain spilled records')
+        publisher = spilling_publisher()
+    failed_sequence_numbers = set()
     for record in event['Records']:
         if record['eventName'] in ['INSERT', 'MODIFY']:
-            records += get_stream_records(record)
-
-    print (json.dumps(records))
-    if records:
-        kinesis = boto3.client('kinesis', region_name='us-east-1')
-        email = event['Records'][0]['dynamodb']['Keys']['email']['S']
-        stream_name = 'sps-data-integration-test' if email == TEST_USER_EMAIL else 'sps_data'
-        res = kinesis.put_records(Records=records, StreamName=stream_name)
-        print (res, 'kinesis')
-    return records
+            sequence_number = record['dynamodb']['SequenceNumber']
+            metrics.increment('RecordsIn')
+            try:
+                stream_name = get_stream_name(record)
+                with metrics.timer('RecordBuildTime'):
+                    # bounded by the 400 KB dynamodb item size, and nothing is sent for a record that fails to build
+                    fingerprinted = list(iter_fingerprinted_records(record))
+            except Exception as e:
+                print (e, sequence_number, 'failed to build kinesis records')
+                metrics.increment('RecordBuildFailures')
+                failed_sequence_numbers.add(sequence_number)
+                continue
+
+            if deduplicator is not None and fingerprinted:
+                published = deduplicator.published([key for key, _ in fingerprinted])
+                fingerprinted = [(key, stream_record) for key, stream_record in fingerprinted if key not in published]
+
+            if log_payload:
+                print ([stream_record for _, stream_record in fingerprinted])
+            if AGGREGATE_RECORDS:
+                stream_records = [stream_record for _, stream_record in fingerprinted]
+                fingerprinted = [
+                    (tuple(fingerprinted[index][0] for index in indices), aggregated)
+                    for aggregated, indices in aggregate_records(stream_records, compression=COMPRESSION)
+                ]
+            else:
+                fingerprinted = [((key,), stream_record) for key, stream_record in fingerprinted]
+
+            # checked before the first record is added, aggregated and compressed records included
+            fingerprinted = drop_oversized(fingerprinted, sequence_number)
+
+            sources = (sequence_number,)
+            for keys, stream_record in fingerprinted:
+                publisher.add(stream_name, stream_record, sources, keys)
+
+    failed_sequence_numbers |= publisher.wait()
+    if publisher.unsent:
+        try:
+            spill(sink, publisher.unsent)
+        except Exception as e:
+            print (e, 'failed to spill unsent records')
+        else:
+            # a stream record with a record kinesis rejected still fails, whatever of it was spilled
+            spilled = {sequence_number for _, _, sources, _ in publisher.unsent for sequence_number in sources}
+            failed_sequence_numbers -= spilled - publisher.rejected
+    if failed_sequence_numbers:
+        print (len(failed_sequence_numbers), 'stream records failed to publish')
+    metrics.increment('StreamRecordsFailed', len(failed_sequence_numbers))
+    metrics.flush(function_dimensions())
+    return batch_item_failures(event, failed_sequence_numbers)
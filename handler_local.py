@@ -1,9 +1,11 @@
+import sys
 import json
 
 from handler import get_stream_records
 
 if __name__ == '__main__':
-    with open('./events/modify-2.json') as f:
+    path = sys.argv[1] if len(sys.argv) > 1 else './events/modify-2.json'
+    with open(path) as f:
         event = json.load(f)
 
     records = []
@@ -0,0 +1,83 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+
+DEFAULT_REGION = 'us-east-1'
+
+# a pool large enough for concurrent put_records calls, kept alive between warm invocations
+CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.environ.get('KINESIS_MAX_POOL_CONNECTIONS', 10)),
+    tcp_keepalive=True,
+    connect_timeout=5,
+    read_timeout=10,
+    retries={'mode': 'standard', 'max_attempts': 3},
+)
+
+_session = None
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_session():
+    """
+    the boto3 session shared by every client, so credentials are resolved once per container
+    :return: boto3.session.Session
+    """
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+
+    return _session
+
+
+def get_client(region_name=DEFAULT_REGION, stream_name=None):
+    """
+    the cached kinesis client for a region and stream, created on first use
+
+    streams in the same region share one client and with it the connection pool.
+
+    :param region_name: str
+    :param stream_name: str
+    :return: kinesis client
+    """
+    key = (region_name, stream_name)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key) or _clients.get((region_name, None))
+        if client is None:
+            client = get_session().client('kinesis', region_name=region_name, config=CLIENT_CONFIG)
+            _clients[(region_name, None)] = client
+        _clients[key] = client
+
+    return client
+
+
+def set_client(client, region_name=DEFAULT_REGION, stream_name=None):
+    """
+    use client for a region and stream instead of a boto3 client, e.g. a FakeKinesisClient when running locally
+
+    without a stream_name the client replaces the clients of every stream in the region.
+    """
+    with _lock:
+        if stream_name is None:
+            for key in [key for key in _clients if key[0] == region_name]:
+                del _clients[key]
+        _clients[(region_name, stream_name)] = client
+
+
+def reset_clients(session=False):
+    """
+    drop every cached and injected client
+    :param session: drop the shared boto3 session as well, so the next client starts as cold as after a cold start
+    """
+    global _session
+    with _lock:
+        _clients.clear()
+        if session:
+            _session = None
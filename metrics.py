@@ -0,0 +1,100 @@
+"""
+hot path counters and timers, emitted in CloudWatch Embedded Metric Format
+
+a flush prints one EMF json line, which CloudWatch Logs turns into metrics without any API call:
+https://docs.aws.amazon.com/AmazonCloudWatch/latest/monitoring/CloudWatch_Embedded_Metric_Format_Specification.html
+"""
+import os
+import json
+import time
+import random
+import threading
+from contextlib import contextmanager
+
+
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'TurbocaidKinesisPublisher')
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+# the share of invocations whose event and records are logged in full
+PAYLOAD_LOG_SAMPLE_RATE = float(os.environ.get('PAYLOAD_LOG_SAMPLE_RATE', 0))
+
+COUNT = 'Count'
+BYTES = 'Bytes'
+MILLISECONDS = 'Milliseconds'
+
+
+class Metrics(object):
+    """
+    thread safe accumulator of metric values between flushes
+    """
+
+    def __init__(self, namespace=NAMESPACE, enabled=METRICS_ENABLED):
+        self.namespace = namespace
+        self.enabled = enabled
+        self._values = {}
+        self._units = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, unit=COUNT):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+            self._units[name] = unit
+
+    def add_time(self, name, seconds):
+        self.increment(name, seconds * 1000, MILLISECONDS)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def get(self, name):
+        return self._values.get(name, 0)
+
+    def to_emf(self, dimensions=None):
+        """
+        :param dimensions: dict of dimension name to value
+        :return: dict, the EMF document for the accumulated values
+        """
+        dimensions = dimensions or {}
+        document = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': self.namespace,
+                    'Dimensions': [list(dimensions)],
+                    'Metrics': [{'Name': name, 'Unit': self._units[name]} for name in self._values],
+                }],
+            },
+        }
+        document.update(dimensions)
+        document.update({name: round(value, 3) for name, value in self._values.items()})
+        return document
+
+    def flush(self, dimensions=None):
+        """
+        print the accumulated values as an EMF log line and start over
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._values:
+                print(json.dumps(self.to_emf(dimensions)))
+            self._values = {}
+            self._units = {}
+
+
+metrics = Metrics()
+
+
+def function_dimensions():
+    return {'FunctionName': os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local')}
+
+
+def should_log_payload(sample_rate=None):
+    sample_rate = PAYLOAD_LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+    return sample_rate > 0 and random.random() < sample_rate
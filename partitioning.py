@@ -0,0 +1,127 @@
+"""
+partition key strategies for the kinesis records of an application
+
+- application: PartitionKey is the application uuid, every record of an application lands on one shard. kinesis
+  keeps the order of a shard's records, but the publisher sends chunks concurrently and retries failed records
+  after later ones, so records of an application only arrive in the order they were built with an ordered
+  Publisher, see KINESIS_ORDERED
+- explicit_hash: PartitionKey stays the application uuid, an ExplicitHashKey spreads the records over fanout
+  hash ranges
+- spread: like explicit_hash, with the PartitionKey tagged with the record's sequence within its stream record,
+  `<application uuid>#<sequence>`, for consumers that reorder
+
+the module can be run to replay a recorded DynamoDB stream event through a strategy and report the per-shard load:
+
+    python -m partitioning events/modify-2.json --shards 4 --strategy spread
+"""
+import os
+import json
+import hashlib
+import argparse
+from collections import Counter
+
+from batching import record_size
+
+
+HASH_KEY_RANGE = 2 ** 128
+DEFAULT_FANOUT = int(os.environ.get('KINESIS_PARTITION_FANOUT', 8))
+
+
+def hash_key(key: str) -> int:
+    """
+    the 128 bit hash key kinesis maps a partition key to
+    """
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest(), 'big')
+
+
+def application_partitioner(app_id, sequence):
+    return {'PartitionKey': app_id}
+
+
+class ExplicitHashPartitioner(object):
+    """
+    :param fanout: the number of hash ranges the records of one application are spread over
+    :param tag_sequence: add the sequence to the PartitionKey
+    """
+
+    def __init__(self, fanout=DEFAULT_FANOUT, tag_sequence=False):
+        self.fanout = fanout
+        self.tag_sequence = tag_sequence
+
+    def __call__(self, app_id, sequence):
+        return {
+            'PartitionKey': f'{app_id}#{sequence}' if self.tag_sequence else app_id,
+            'ExplicitHashKey': str(hash_key(f'{app_id}#{sequence % self.fanout}')),
+        }
+
+
+PARTITIONERS = {
+    'application': lambda: application_partitioner,
+    'explicit_hash': lambda: ExplicitHashPartitioner(),
+    'spread': lambda: ExplicitHashPartitioner(tag_sequence=True),
+}
+
+
+def get_partitioner(name=None):
+    """
+    the partitioner for a strategy name, KINESIS_PARTITIONING by default
+    :return: callable taking the application uuid and the record's sequence, returning the record's key fields
+    """
+    return PARTITIONERS[name or os.environ.get('KINESIS_PARTITIONING') or 'application']()
+
+
+def shard_for(record, shard_count):
+    """
+    the index of the shard a record lands on, for a stream with shard_count evenly split shards
+    """
+    explicit_hash_key = record.get('ExplicitHashKey')
+    key = int(explicit_hash_key) if explicit_hash_key is not None else hash_key(record['PartitionKey'])
+    return key * shard_count // HASH_KEY_RANGE
+
+
+def shard_load(records, shard_count):
+    """
+    :return: dict with the records and bytes per shard and the max/mean skew of both
+    """
+    shard_records = Counter()
+    shard_bytes = Counter()
+    for record in records:
+        shard = shard_for(record, shard_count)
+        shard_records[shard] += 1
+        shard_bytes[shard] += record_size(record)
+
+    def skew(counter):
+        mean = sum(counter.values()) / shard_count
+        return round(max(counter.values()) / mean, 3) if mean else 0.0
+
+    return {
+        'records': [shard_records[shard] for shard in range(shard_count)],
+        'bytes': [shard_bytes[shard] for shard in range(shard_count)],
+        'record_skew': skew(shard_records),
+        'byte_skew': skew(shard_bytes),
+    }
+
+
+def main():
+    from handler import get_stream_records
+
+    parser = argparse.ArgumentParser(description='replay a DynamoDB stream event through a partition key strategy')
+    parser.add_argument('event', help='json file with a lambda DynamoDB stream event')
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--strategy', choices=sorted(PARTITIONERS), default=None)
+    args = parser.parse_args()
+
+    with open(args.event) as f:
+        event = json.load(f)
+
+    partitioner = get_partitioner(args.strategy)
+    records = []
+    for record in event['Records']:
+        if record['eventName'] in ['INSERT', 'MODIFY']:
+            records += get_stream_records(record, partitioner=partitioner)
+
+    print(json.dumps(shard_load(records, args.shards), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+declarative projections of the detail attributes of a table's images into the dicts that are published
+
+a projection names the attribute type it picks out of an image and the fields of the dict built for each detail.
+MODIFY details are published as stream.MedicaidDetail and INSERT details as they are, in the application's
+medicaid_details, so the field names have to be fields of MedicaidDetail for both to publish the same fields.
+
+a projection is compiled once into an extractor that reads every field with a single lookup, turning a missing or
+mistyped member into None, or skipping the detail when the member is required, instead of failing the whole stream
+record with a KeyError. attributes of other types are skipped on their type member alone, their values are never
+decoded.
+
+projections are looked up by the table in a stream record's eventSourceARN, tables without one of their own use
+DEFAULT_PROJECTION:
+
+    register_projection('applications-v2', Projection('medicaid_detail', (
+        Meta('event_id'),
+        Member('uuid', required=True),
+        Meta('attribute_name'),
+        Meta('attribute_value'),
+        Member('updated_at', source='modified_date'),
+    )))
+"""
+from changes import MEDICAID_DETAIL_TYPE
+from stream import Field, MedicaidDetail
+
+
+EVENT_ID = 'event_id'
+ATTRIBUTE_NAME = 'attribute_name'
+ATTRIBUTE_VALUE = 'attribute_value'
+META_FIELDS = (EVENT_ID, ATTRIBUTE_NAME, ATTRIBUTE_VALUE)
+
+
+class Member(object):
+    """
+    a field read from a member of the detail attribute's map
+
+    :param name: the field name in the published dict
+    :param source: the member name, defaults to name
+    :param data_type: the dynamodb type of the member, e.g. S or N
+    :param required: the detail is skipped when the member is missing
+    """
+    __slots__ = ('name', 'source', 'data_type', 'required')
+
+    def __init__(self, name: str, source: str = None, data_type: str = 'S', required: bool = False):
+        self.name = name
+        self.source = source or name
+        self.data_type = data_type
+        self.required = required
+
+
+class Meta(object):
+    """
+    a field filled in by the pipeline: event_id, attribute_name or the decoded attribute_value
+    """
+    __slots__ = ('name', 'source')
+
+    def __init__(self, name: str, source: str = None):
+        self.name = name
+        self.source = source or name
+        if self.source not in META_FIELDS:
+            raise ValueError(f'Unknown meta field {self.source}, expected one of {", ".join(META_FIELDS)}')
+
+
+def compile_extractor(projection):
+    """
+    generate extract(members, event_id, attribute_name, attribute_value) -> (dict or None, list of missing members)
+    """
+    lines = ['def extract(members, event_id, attribute_name, attribute_value):', '    missing = []', '    skip = False']
+    items = []
+
+    for index, field in enumerate(projection.fields):
+        if isinstance(field, Meta):
+            items.append(f'{field.name!r}: {field.source}')
+            continue
+
+        lines += [
+            '    try:',
+            f'        value_{index} = members[{field.source!r}][{field.data_type!r}]',
+            '    except (KeyError, TypeError):',
+            f'        value_{index} = None',
+            f'        missing.append({field.source!r})',
+        ]
+        if field.required:
+            lines.append('        skip = True')
+        items.append(f'{field.name!r}: value_{index}')
+
+    lines += [
+        '    if skip:',
+        '        return None, missing',
+        f'    return {{{", ".join(items)}}}, missing',
+    ]
+
+    namespace = {}
+    exec(compile('\n'.join(lines), f'<{projection.attribute_type} projection>', 'exec'), {}, namespace)
+    return namespace['extract']
+
+
+class Projection(object):
+    """
+    :param attribute_type: the value of the type member of the attributes to publish
+    :param fields: tuple of Member and Meta, the fields of the published dict in order
+    :param type_key: the member holding the attribute type
+    :param value_key: the member holding the value, decoded into attribute_value
+    """
+
+    def __init__(self, attribute_type: str, fields: tuple, type_key: str = 'type', value_key: str = 'value'):
+        self.attribute_type = attribute_type
+        self.fields = fields
+        self.type_key = type_key
+        self.value_key = value_key
+        self.extract = compile_extractor(self)
+
+    def matches(self, attribute) -> bool:
+        """
+        whether a raw image attribute is one of the projected details, looking at its type member only
+        """
+        members = attribute.get('M')
+        if members is None or self.value_key not in members:
+            return False
+        attribute_type = members.get(self.type_key)
+        return attribute_type is not None and attribute_type.get('S') == self.attribute_type
+
+
+MEDICAID_DETAILS = Projection(MEDICAID_DETAIL_TYPE, (
+    Meta('event_id'),
+    Member('uuid', required=True),
+    Meta('attribute_name'),
+    Meta('attribute_value'),
+    Member('created_at', source='created_date'),
+    Member('updated_at', source='updated_date'),
+))
+
+DEFAULT_PROJECTION = MEDICAID_DETAILS
+# table name -> Projection
+PROJECTIONS = {}
+# the names a projection can publish, MedicaidDetail drops any other field of a MODIFY detail
+DETAIL_FIELDS = tuple(field.name for field in MedicaidDetail.fields if isinstance(field, Field))
+
+
+def register_projection(table_name: str, projection: Projection):
+    """
+    :raises ValueError: when a field of the projection is not a field of MedicaidDetail, or attribute_name is missing
+    """
+    names = [field.name for field in projection.fields]
+    unknown = [name for name in names if name not in DETAIL_FIELDS]
+    if unknown:
+        raise ValueError(f'Projection fields {", ".join(unknown)} are not MedicaidDetail fields, expected some of {", ".join(DETAIL_FIELDS)}')
+    # consumers tell the details of one application apart by it
+    if ATTRIBUTE_NAME not in names:
+        raise ValueError(f'Projection has no {ATTRIBUTE_NAME} field')
+
+    PROJECTIONS[table_name] = projection
+
+
+def table_name(entity):
+    """
+    the table of a stream record, from its eventSourceARN arn:aws:dynamodb:<region>:<account>:table/<table>/stream/...
+    :return: str or None
+    """
+    arn = entity.get('eventSourceARN')
+    if not arn:
+        return None
+
+    parts = arn.split(':', 5)[-1].split('/')
+    return parts[1] if len(parts) > 1 and parts[0] == 'table' else None
+
+
+def get_projection(entity):
+    """
+    :param entity: dict, a stream record
+    :return: Projection
+    """
+    if not PROJECTIONS:
+        return DEFAULT_PROJECTION
+
+    return PROJECTIONS.get(table_name(entity), DEFAULT_PROJECTION)
@@ -0,0 +1,200 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+from batching import Chunker, chunk_records, record_size
+from kinesis_client import get_client
+from metrics import BYTES, metrics
+from retry import AdaptiveRateLimiter, put_records_with_retry
+
+
+MAX_IN_FLIGHT = int(os.environ.get('KINESIS_MAX_IN_FLIGHT', 8))
+# send the records of a partition key one after the other, in the order they were added
+ORDERED = os.environ.get('KINESIS_ORDERED', '').lower() in ('1', 'true', 'yes')
+
+# kept at module level so throttling learned in one invocation carries over to the next warm one
+rate_limiter = AdaptiveRateLimiter()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    the thread pool put_records calls run on, shared by warm invocations
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT, thread_name_prefix='kinesis')
+
+    return _executor
+
+
+class Publisher(object):
+    """
+    publishes records to any number of streams, with up to max_in_flight put_records calls running at once
+
+    publish hands the chunks of a stream's records to the thread pool and returns, blocking only while
+    max_in_flight calls are already running. add does the same for records produced one at a time, holding at most
+    one open chunk per stream. wait returns once every call is done. chunks run concurrently, so
+    records of one partition key in different chunks can arrive out of order, as they can after a retry.
+
+    ordered keeps the order of each partition key's records: the chunks of a stream are sent one after the other,
+    with at most one record of a key per put_records call, and once a record of a key is not published none of the
+    key's later records are sent, they fail with it. streams are still sent concurrently.
+
+    :param deadline: time.monotonic() after which no retry is started, see retry.deadline_from_context
+    :param max_in_flight: int, at most MAX_IN_FLIGHT
+    :param deduplicator: dedup.Deduplicator the fingerprints of published records are marked in by wait
+    :param max_attempts: put_records calls per chunk, see retry.put_records_with_retry
+    :param keep_unsent: keep the records that were not published in unsent, e.g. to spill them. records kinesis
+        rejected with an error that is not retryable are never kept, their sources are collected in rejected
+    :param ordered: bool, default KINESIS_ORDERED
+    """
+
+    def __init__(self, deadline=None, max_in_flight=MAX_IN_FLIGHT, rate_limiter=rate_limiter, deduplicator=None, max_attempts=8, keep_unsent=False, ordered=ORDERED):
+        self.deadline = deadline
+        self.rate_limiter = rate_limiter
+        self.deduplicator = deduplicator
+        self.max_attempts = max_attempts
+        self.keep_unsent = keep_unsent
+        self.ordered = ordered
+        # (stream name, record, sources, fingerprints) of the records wait found unpublished
+        self.unsent = []
+        # sources of the records kinesis rejected, retrying or spilling them would fail again
+        self.rejected = set()
+        self._in_flight = threading.BoundedSemaphore(min(max_in_flight, MAX_IN_FLIGHT))
+        self._futures = []
+        self._chunkers = {}
+        # ordered, per stream the future of its last chunk and the partition keys no record is sent for anymore
+        self._last_futures = {}
+        self._stopped_keys = {}
+
+    def publish(self, stream_name, records, sources):
+        """
+        :param stream_name: str
+        :param records: list of kinesis records
+        :param sources: list, for each record the tuple of stream record SequenceNumbers it was built from
+        """
+        offset = 0
+        for chunk in chunk_records(records):
+            chunk_sources = [(record_sources, ()) for record_sources in sources[offset:offset + len(chunk)]]
+            offset += len(chunk)
+            self._submit(stream_name, chunk, chunk_sources)
+
+    def add(self, stream_name, record, sources, fingerprints=()):
+        """
+        queue a single record, the chunk is sent once it is full or on flush
+        :param stream_name: str
+        :param record: kinesis record
+        :param sources: tuple of stream record SequenceNumbers the record was built from
+        :param fingerprints: tuple of dedup fingerprints of the record
+        """
+        chunker = self._chunkers.get(stream_name)
+        if chunker is None:
+            chunker = self._chunkers[stream_name] = Chunker()
+
+        chunk = chunker.add(record, (sources, fingerprints))
+        if chunk:
+            self._submit(stream_name, *chunk)
+
+    def flush(self):
+        """
+        send the open chunks of every stream
+        """
+        for stream_name, chunker in self._chunkers.items():
+            chunk = chunker.flush()
+            if chunk:
+                self._submit(stream_name, *chunk)
+
+    def _submit(self, stream_name, chunk, chunk_sources):
+        # chunk_sources holds the (sources, fingerprints) of every record in chunk
+        previous = None
+        if self.ordered:
+            previous = self._last_futures.get(stream_name)
+            self._stopped_keys.setdefault(stream_name, set())
+        self._in_flight.acquire()
+        try:
+            future = get_executor().submit(self._put, stream_name, chunk, chunk_sources, previous)
+        except Exception:
+            self._in_flight.release()
+            raise
+        future.add_done_callback(lambda _: self._in_flight.release())
+        self._futures.append((future, chunk_sources))
+        if self.ordered:
+            self._last_futures[stream_name] = future
+
+    def _put(self, stream_name, chunk, chunk_sources, previous=None):
+        if previous is not None:
+            # the executor runs tasks in the order they were submitted, previous is already running or done
+            wait_futures([previous])
+        stopped_keys = self._stopped_keys.get(stream_name)
+        # positions in chunk of the records sent, when some are held back because an earlier record of their key failed
+        positions = None
+        stopped = []
+        if stopped_keys:
+            stopped = [index for index, record in enumerate(chunk) if record['PartitionKey'] in stopped_keys]
+            if stopped:
+                positions = [index for index, record in enumerate(chunk) if record['PartitionKey'] not in stopped_keys]
+
+        try:
+            with metrics.timer('PutRecordsTime'):
+                retryable, rejected = put_records_with_retry(
+                    get_client(stream_name=stream_name), chunk if positions is None else [chunk[index] for index in positions], stream_name,
+                    deadline=self.deadline, max_attempts=self.max_attempts, rate_limiter=self.rate_limiter, ordered=self.ordered
+                )
+            if positions is not None:
+                retryable = [positions[index] for index in retryable] + stopped
+                rejected = [positions[index] for index in rejected]
+        except Exception as e:
+            print (e, 'put_records failed')
+            retryable, rejected = list(range(len(chunk))), []
+        if stopped_keys is not None:
+            stopped_keys.update(chunk[index]['PartitionKey'] for index in retryable + rejected)
+        failed = retryable + rejected
+        metrics.increment('RecordsOut', len(chunk) - len(failed))
+        metrics.increment('RecordsFailed', len(failed))
+        metrics.increment('RecordsRejected', len(rejected))
+        metrics.increment('BytesOut', sum(record_size(record) for record in chunk), BYTES)
+        failed_indices = set(failed)
+        failed_sources = {sequence_number for index in failed for sequence_number in chunk_sources[index][0]}
+        published = [
+            key
+            for index, (_, fingerprints) in enumerate(chunk_sources) if index not in failed_indices
+            for key in fingerprints
+        ]
+        rejected_sources = {sequence_number for index in rejected for sequence_number in chunk_sources[index][0]}
+        unsent = [(stream_name, chunk[index]) + chunk_sources[index] for index in retryable] if self.keep_unsent else []
+        return failed_sources, rejected_sources, published, unsent
+
+    def wait(self):
+        """
+        send the open chunks, wait for every call and mark the published records in the deduplicator
+        :return: set of SequenceNumbers of the stream records with records that were not published
+        """
+        self.flush()
+        failed = set()
+        published = []
+        for future, chunk_sources in self._futures:
+            try:
+                chunk_failed, chunk_rejected, chunk_published, chunk_unsent = future.result()
+            except Exception as e:
+                print (e, 'put_records failed')
+                failed.update(sequence_number for sources, _ in chunk_sources for sequence_number in sources)
+                continue
+            failed |= chunk_failed
+            self.rejected |= chunk_rejected
+            published += chunk_published
+            self.unsent += chunk_unsent
+        self._futures = []
+        self._last_futures = {}
+
+        if self.deduplicator is not None:
+            try:
+                self.deduplicator.mark_published(published)
+            except Exception as e:
+                # the records are out, at worst they are published again on a retry
+                print (e, 'failed to mark records published')
+        return failed
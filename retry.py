@@ -0,0 +1,237 @@
+import time
+import random
+import threading
+from collections import OrderedDict
+
+from metrics import metrics
+
+
+RETRYABLE_ERROR_CODES = ('ProvisionedThroughputExceededException', 'InternalFailure')
+THROTTLED_ERROR_CODE = 'ProvisionedThroughputExceededException'
+
+
+def deadline_from_context(context, reserve_ms=1000):
+    """
+    the time.monotonic() by which publishing has to give up, leaving reserve_ms for the handler to finish
+    :param context: lambda context, or None when running locally
+    :return: float or None
+    """
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return None
+
+    return time.monotonic() + max(context.get_remaining_time_in_millis() - reserve_ms, 0) / 1000.0
+
+
+def backoff_delay(attempt, base=0.05, cap=2.0):
+    """
+    full jitter exponential backoff
+    :param attempt: int, 1 for the first retry
+    :return: float, seconds
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AdaptiveRateLimiter(object):
+    """
+    additive increase / multiplicative decrease of the records per second sent to each partition key
+
+    partition keys stand in for shards. a throttled key has its rate cut, once per put_records call however many of
+    its records were throttled, and gets increase records per second back for every increase_interval it is sent to
+    without being throttled. put_records_with_retry admits the records of a key below full speed at its rate, first
+    attempts included, and leaves the others for later calls, so a hot shard is fed at the rate it accepted while
+    records for healthy keys go straight through.
+
+    only keys below full speed are tracked, at most max_keys of them, and keys whose rate was not updated for
+    idle_seconds are dropped, so the one-off keys of the spread strategy do not pile up in a warm container.
+
+    :param burst_seconds: a key is sent the records due within this many seconds in one call
+    """
+
+    def __init__(self, initial_rate=1000.0, min_rate=10.0, max_rate=1000.0, increase=50.0, decrease=0.5, increase_interval=1.0, burst_seconds=0.1, max_keys=10000, idle_seconds=60.0, clock=time.monotonic):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.increase_interval = increase_interval
+        self.burst_seconds = burst_seconds
+        self.max_keys = max_keys
+        self.idle_seconds = idle_seconds
+        self.clock = clock
+        # key -> [rate, time the next record can be sent, time of the last rate update], least recently updated first
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def rate(self, key):
+        """
+        :return: float, the records per second key is sent, max_rate when it is not tracked
+        """
+        state = self._keys.get(key)
+        return self.max_rate if state is None else state[0]
+
+    def admit(self, keys):
+        """
+        pick the records that can be sent now and reserve their capacity
+
+        :param keys: list of the partition keys of the records waiting to be sent
+        :return: (list of positions in keys to send now, float seconds until the first of the others is due)
+        """
+        now = self.clock()
+        horizon = now + self.burst_seconds
+        admitted = []
+        wait = None
+        with self._lock:
+            for position, key in enumerate(keys):
+                state = self._keys.get(key)
+                if state is None:
+                    admitted.append(position)
+                    continue
+                send_at = max(state[1], now)
+                if send_at <= horizon:
+                    state[1] = send_at + 1.0 / state[0]
+                    admitted.append(position)
+                elif wait is None or send_at - horizon < wait:
+                    wait = send_at - horizon
+
+        return admitted, wait or 0.0
+
+    def throttled(self, keys):
+        """
+        :param keys: iterable of the partition keys throttled in one put_records call
+        """
+        now = self.clock()
+        with self._lock:
+            for key in set(keys):
+                state = self._keys.pop(key, None)
+                if state is None:
+                    state = [self.initial_rate, now, now]
+                state[0] = max(state[0] * self.decrease, self.min_rate)
+                state[1] = max(state[1], now)
+                state[2] = now
+                self._keys[key] = state
+            self._evict(now)
+
+    def succeeded(self, keys):
+        """
+        :param keys: iterable of the partition keys accepted in one put_records call
+        """
+        now = self.clock()
+        with self._lock:
+            for key in set(keys):
+                state = self._keys.get(key)
+                if state is None or now - state[2] < self.increase_interval:
+                    continue
+                state[0] += self.increase
+                if state[0] >= self.max_rate:
+                    # back to full speed, stop tracking the key
+                    del self._keys[key]
+                    continue
+                state[2] = now
+                self._keys.move_to_end(key)
+
+    def _evict(self, now):
+        while self._keys:
+            key, state = next(iter(self._keys.items()))
+            if len(self._keys) <= self.max_keys and now - state[2] < self.idle_seconds:
+                break
+            del self._keys[key]
+
+
+def put_records_with_retry(client, records, stream_name, deadline=None, max_attempts=8, rate_limiter=None, sleep=time.sleep, ordered=False):
+    """
+    put records to kinesis, resubmitting only the entries that failed
+
+    with a rate_limiter the records of throttled partition keys are spread over several calls at the rate the
+    limiter allows them, waiting for them does not count as an attempt.
+
+    put_records does not keep the order of the records of a call, so ordered sends at most one record of a partition
+    key per call, in the order of records. once a record of a key ran out of attempts or was rejected, the later
+    records of the key are not sent and returned as unsent, so none of them overtakes it.
+
+    :param client: kinesis client
+    :param records: list of kinesis records, already within the put_records limits
+    :param stream_name: str
+    :param deadline: time.monotonic() after which no further call is started
+    :param max_attempts: int, put_records calls a record is sent in at most
+    :param rate_limiter: AdaptiveRateLimiter
+    :param ordered: bool
+    :return: (list of indices into records still unsent when the attempts or the time ran out, list of indices into
+        records kinesis rejected with an error that is not retryable)
+    """
+    pending = list(range(len(records)))
+    attempts = [0] * len(records)
+    exhausted = []
+    rejected = []
+    failed_calls = 0
+
+    while pending:
+        send = pending
+        if ordered:
+            keys = set()
+            send = []
+            for index in pending:
+                key = records[index]['PartitionKey']
+                if key not in keys:
+                    keys.add(key)
+                    send.append(index)
+        if rate_limiter is not None:
+            admitted, wait = rate_limiter.admit([records[index]['PartitionKey'] for index in send])
+            if not admitted:
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    break
+                sleep(wait)
+                continue
+            send = [send[position] for position in admitted]
+
+        res = client.put_records(Records=[records[index] for index in send], StreamName=stream_name)
+        metrics.increment('PutRecordsCalls')
+        retries = sum(1 for index in send if attempts[index])
+        if retries:
+            metrics.increment('Retries', retries)
+
+        failed = set()
+        accepted_keys = []
+        throttled_keys = []
+        for index, result in zip(send, res['Records']):
+            attempts[index] += 1
+            error_code = result.get('ErrorCode')
+            key = records[index]['PartitionKey']
+            if error_code is None:
+                accepted_keys.append(key)
+                continue
+
+            if error_code not in RETRYABLE_ERROR_CODES:
+                print(error_code, result.get('ErrorMessage'), 'kinesis record not retryable')
+                rejected.append(index)
+                continue
+            if error_code == THROTTLED_ERROR_CODE:
+                metrics.increment('Throttles')
+                throttled_keys.append(key)
+            if attempts[index] >= max_attempts:
+                exhausted.append(index)
+            else:
+                failed.add(index)
+
+        if rate_limiter is not None:
+            rate_limiter.throttled(throttled_keys)
+            rate_limiter.succeeded(accepted_keys)
+
+        sent = set(send)
+        pending = [index for index in pending if index not in sent or index in failed]
+        if ordered and (exhausted or rejected):
+            stopped_keys = {records[index]['PartitionKey'] for index in exhausted + rejected}
+            exhausted += [index for index in pending if records[index]['PartitionKey'] in stopped_keys]
+            pending = [index for index in pending if records[index]['PartitionKey'] not in stopped_keys]
+        if not failed:
+            continue
+
+        failed_calls += 1
+        delay = backoff_delay(failed_calls)
+        if deadline is not None and time.monotonic() + delay > deadline:
+            break
+        sleep(delay)
+
+    return sorted(exhausted + pending), rejected
@@ -0,0 +1,60 @@
+import os
+import json
+
+from decoder import json_default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_dumps(obj) -> bytes:
+    """
+    stdlib encoder, compact separators, utf-8 bytes
+    """
+    return json.dumps(obj, default=json_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def orjson_dumps(obj) -> bytes:
+    """
+    orjson, falling back to json_dumps for what it cannot encode, e.g. ints beyond 64 bits
+    """
+    try:
+        return orjson.dumps(obj, default=json_default)
+    except (orjson.JSONEncodeError, TypeError):
+        return json_dumps(obj)
+
+
+ENCODERS = {'json': json_dumps}
+if orjson is not None:
+    ENCODERS['orjson'] = orjson_dumps
+
+
+def get_encoder(name=None):
+    """
+    the encoder registered under name, by default orjson when it is installed and the stdlib otherwise
+
+    KINESIS_JSON_ENCODER selects the encoder without a code change.
+    """
+    name = name or os.environ.get('KINESIS_JSON_ENCODER') or ('orjson' if 'orjson' in ENCODERS else 'json')
+    return ENCODERS[name]
+
+
+def register_encoder(name, encoder):
+    """
+    :param name: str
+    :param encoder: callable taking a json compatible object and returning bytes
+    """
+    ENCODERS[name] = encoder
+
+
+dumps = get_encoder()
+
+
+def set_encoder(name):
+    """
+    switch the encoder dumps uses, e.g. to compare encoders in benchmarks
+    """
+    global dumps
+    dumps = get_encoder(name)
@@ -0,0 +1,288 @@
+"""
+durable overflow for kinesis records that could not be published
+
+with SPILL_ENABLED set the handler gives put_records only SPILL_MAX_ATTEMPTS attempts, then appends the records
+that are still unsent to a spill sink and reports their stream records as processed, so a throttled stream does
+not hold the invocation in retries or make lambda retry the whole batch. the next invocation drains the sink first,
+replaying the spilled records in bulk through the publisher. drained records reach kinesis after newer ones of
+the same partition key, as they can after a retry.
+
+a spill is one segment: a sequence of frames, each a 4 byte length and a 4 byte crc32 of the payload followed by
+the payload, the json of a stream's records compressed with aggregation.compress. a frame cut short or failing its
+crc ends the segment, so a segment torn by a crash only loses its tail.
+
+SPILL_SINK has to name the sink that stores segments:
+- s3: objects under SPILL_S3_BUCKET / SPILL_S3_PREFIX, shared by every container. a segment is claimed before it is
+  replayed by moving it under <SPILL_S3_PREFIX>inflight/, so concurrent invocations do not replay it again, and a
+  claim older than SPILL_CLAIM_SECONDS is taken over from an invocation that died replaying it
+- local: append-only files in SPILL_DIRECTORY, which survive warm starts of the container only. records spilled there
+  are lost when lambda recycles the container, it is meant for local runs and tests
+other sinks, e.g. SQS, are added with register_sink.
+"""
+import os
+import json
+import time
+import uuid
+import zlib
+import base64
+import struct
+import threading
+
+from aggregation import compress, decompress
+from metrics import BYTES, metrics
+
+
+SPILL_ENABLED = os.environ.get('SPILL_ENABLED', '').lower() in ('1', 'true', 'yes')
+SPILL_SINK = os.environ.get('SPILL_SINK')
+SPILL_DIRECTORY = os.environ.get('SPILL_DIRECTORY', '/tmp/kinesis-spill')
+SPILL_S3_BUCKET = os.environ.get('SPILL_S3_BUCKET')
+SPILL_S3_PREFIX = os.environ.get('SPILL_S3_PREFIX', 'kinesis-spill/')
+# seconds after which a claimed segment that was not replayed is claimed again, the longest a lambda can run
+SPILL_CLAIM_SECONDS = float(os.environ.get('SPILL_CLAIM_SECONDS', 900))
+SPILL_COMPRESSION = os.environ.get('SPILL_COMPRESSION', 'gzip')
+# put_records attempts per chunk before its unsent records are spilled
+SPILL_MAX_ATTEMPTS = int(os.environ.get('SPILL_MAX_ATTEMPTS', 2))
+# seconds an invocation spends draining spilled records at most
+SPILL_DRAIN_SECONDS = float(os.environ.get('SPILL_DRAIN_SECONDS', 10))
+
+FRAME_HEADER = struct.Struct('>II')
+
+
+def encode_frame(stream_name, entries, compression=SPILL_COMPRESSION) -> bytes:
+    """
+    :param stream_name: str
+    :param entries: list of (kinesis record, dedup fingerprints)
+    :return: bytes, the framed and compressed records
+    """
+    records = []
+    for record, fingerprints in entries:
+        data = record['Data']
+        encoded = {
+            'Data': base64.b64encode(data.encode('utf-8') if isinstance(data, str) else data).decode('ascii'),
+            'PartitionKey': record['PartitionKey'],
+            'fingerprints': list(fingerprints),
+        }
+        if 'ExplicitHashKey' in record:
+            encoded['ExplicitHashKey'] = record['ExplicitHashKey']
+        records.append(encoded)
+
+    payload = compress(json.dumps({'stream_name': stream_name, 'records': records}).encode('utf-8'), compression)
+    return FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_frames(segment: bytes):
+    """
+    :return: generator of (stream name, list of (kinesis record, dedup fingerprints)), up to a torn or corrupt frame
+    """
+    position = 0
+    while position + FRAME_HEADER.size <= len(segment):
+        length, crc = FRAME_HEADER.unpack_from(segment, position)
+        payload = segment[position + FRAME_HEADER.size:position + FRAME_HEADER.size + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            print ('spill segment has a torn frame at byte', position)
+            metrics.increment('SpillTornFrames')
+            return
+        position += FRAME_HEADER.size + length
+
+        frame = json.loads(decompress(payload))
+        entries = []
+        for encoded in frame['records']:
+            record = {'Data': base64.b64decode(encoded['Data']), 'PartitionKey': encoded['PartitionKey']}
+            if 'ExplicitHashKey' in encoded:
+                record['ExplicitHashKey'] = encoded['ExplicitHashKey']
+            entries.append((record, tuple(encoded['fingerprints'])))
+        yield frame['stream_name'], entries
+
+
+class LocalSink(object):
+    """
+    segments in append-only files of a directory, at most max_segment_bytes each
+
+    :param directory: str
+    :param max_segment_bytes: int
+    """
+
+    def __init__(self, directory=SPILL_DIRECTORY, max_segment_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self._path = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, segment: bytes):
+        with self._lock:
+            if self._path is None or not os.path.exists(self._path) or os.path.getsize(self._path) + len(segment) > self.max_segment_bytes:
+                # named by creation time so segments drain oldest first
+                self._path = os.path.join(self.directory, f'{time.time_ns():020}-{uuid.uuid4().hex}.spill')
+            with open(self._path, 'ab') as f:
+                f.write(segment)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def segment_ids(self):
+        return sorted(name for name in os.listdir(self.directory) if name.endswith('.spill'))
+
+    def read(self, segment_id) -> bytes:
+        with self._lock:
+            # the segment is closed for appends once it is read
+            if self._path == os.path.join(self.directory, segment_id):
+                self._path = None
+        with open(os.path.join(self.directory, segment_id), 'rb') as f:
+            return f.read()
+
+    def delete(self, segment_id):
+        os.remove(os.path.join(self.directory, segment_id))
+
+
+class S3Sink(object):
+    """
+    a segment per object under prefix in bucket, claimed segments are kept under <prefix>inflight/<claim time>/
+
+    :param claim_seconds: seconds after which a claimed segment can be claimed again
+    """
+
+    def __init__(self, bucket=SPILL_S3_BUCKET, prefix=SPILL_S3_PREFIX, client=None, claim_seconds=SPILL_CLAIM_SECONDS):
+        if not bucket:
+            raise ValueError('SPILL_SINK=s3 needs SPILL_S3_BUCKET')
+        if client is None:
+            from kinesis_client import get_session
+            client = get_session().client('s3')
+        self.bucket = bucket
+        self.prefix = prefix
+        self.inflight_prefix = f'{prefix}inflight/'
+        self.client = client
+        self.claim_seconds = claim_seconds
+
+    def write(self, segment: bytes):
+        key = f'{self.prefix}{time.time_ns():020}-{uuid.uuid4().hex}.spill'
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=segment)
+
+    def segment_ids(self):
+        """
+        the unclaimed segments and those whose claim expired, oldest first
+        """
+        keys = []
+        expired = time.time_ns() - int(self.claim_seconds * 1e9)
+        for page in self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get('Contents', ()):
+                key = item['Key']
+                if not key.startswith(self.inflight_prefix) or int(key[len(self.inflight_prefix):].split('/', 1)[0]) < expired:
+                    keys.append(key)
+        return sorted(keys, key=lambda key: key.rsplit('/', 1)[-1])
+
+    def claim(self, segment_id):
+        """
+        move a segment under the inflight prefix, s3 has no rename so it is copied and the original deleted
+
+        two invocations copying a segment at the same moment can both claim it, the dedup fingerprints of its
+        records keep the second replay from publishing them again when dedup is enabled.
+
+        :return: the id of the claimed segment, None when another invocation claimed it first
+        """
+        key = f'{self.inflight_prefix}{time.time_ns():020}/{segment_id.rsplit("/", 1)[-1]}'
+        try:
+            self.client.copy_object(Bucket=self.bucket, Key=key, CopySource={'Bucket': self.bucket, 'Key': segment_id})
+        except self.client.exceptions.ClientError as e:
+            if e.response.get('Error', {}).get('Code') not in ('NoSuchKey', '404'):
+                raise
+            return None
+        self.client.delete_object(Bucket=self.bucket, Key=segment_id)
+        return key
+
+    def read(self, segment_id) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=segment_id)['Body'].read()
+
+    def delete(self, segment_id):
+        self.client.delete_object(Bucket=self.bucket, Key=segment_id)
+
+
+SINKS = {
+    'local': LocalSink,
+    's3': S3Sink,
+}
+
+
+def register_sink(name, factory):
+    """
+    :param name: str, value of SPILL_SINK
+    :param factory: callable returning a sink with write, segment_ids, read and delete, see LocalSink, and claim
+        when the sink is shared by concurrent invocations, see S3Sink
+    """
+    SINKS[name] = factory
+
+
+_sink = None
+
+
+def get_sink():
+    """
+    the sink of SPILL_SINK shared by warm invocations, None unless SPILL_ENABLED is set
+    """
+    global _sink
+    if SPILL_ENABLED and _sink is None:
+        if SPILL_SINK not in SINKS:
+            raise ValueError(f'SPILL_ENABLED needs SPILL_SINK set to one of {", ".join(SINKS)}, got {SPILL_SINK}')
+        _sink = SINKS[SPILL_SINK]()
+
+    return _sink
+
+
+def spill(sink, unsent):
+    """
+    write the unsent records of a publisher as one segment
+
+    :param sink: see LocalSink
+    :param unsent: list of (stream name, kinesis record, sources, fingerprints), see Publisher.unsent
+    """
+    streams = {}
+    for stream_name, record, _, fingerprints in unsent:
+        streams.setdefault(stream_name, []).append((record, fingerprints))
+
+    segment = b''.join(encode_frame(stream_name, entries) for stream_name, entries in streams.items())
+    sink.write(segment)
+    metrics.increment('RecordsSpilled', len(unsent))
+    metrics.increment('SpillBytes', len(segment), BYTES)
+
+
+def drain(sink, publisher_factory, seconds=SPILL_DRAIN_SECONDS):
+    """
+    replay spilled segments, oldest first, until they are all replayed or seconds have passed
+
+    a segment is claimed first when the sink supports it and skipped when another invocation claimed it. it is
+    deleted once it was replayed, records of it that were again not published are spilled to a new segment first.
+    records kinesis rejected with an error that is not retryable are logged and dropped, records the publisher's
+    deduplicator knows as published are skipped.
+
+    :param sink: see LocalSink
+    :param publisher_factory: callable returning a Publisher with keep_unsent set
+    :return: int, the number of records replayed
+    """
+    stop = time.monotonic() + seconds
+    replayed = 0
+    claim = getattr(sink, 'claim', None)
+    for segment_id in sink.segment_ids():
+        if time.monotonic() > stop:
+            break
+        if claim is not None:
+            segment_id = claim(segment_id)
+            if segment_id is None:
+                continue
+
+        publisher = publisher_factory()
+        for stream_name, entries in decode_frames(sink.read(segment_id)):
+            if publisher.deduplicator is not None:
+                published = publisher.deduplicator.published([key for _, fingerprints in entries for key in fingerprints])
+                entries = [(record, fingerprints) for record, fingerprints in entries if not fingerprints or not set(fingerprints) <= published]
+            for record, fingerprints in entries:
+                publisher.add(stream_name, record, (segment_id,), fingerprints)
+                replayed += 1
+        publisher.wait()
+
+        if publisher.rejected:
+            print ('kinesis rejected records of spill segment', segment_id, 'they are dropped')
+        if publisher.unsent:
+            spill(sink, publisher.unsent)
+        sink.delete(segment_id)
+
+    metrics.increment('RecordsDrained', replayed)
+    return replayed
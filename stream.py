@@ -1,38 +1,437 @@
-import sys
-from typing import List
 from datetime import datetime
+
+import serialization
+from timestamps import SALESFORCE_DATETIME_FORMAT, MYSQL_DATETIME_FORMAT, salesforce_to_mysql_datetime, salesforce_to_mysql_datetimes
 from exceptions import MissingEntityException, InvalidEntityException
 
 
-class StreamModel(object):
-    VALUE_NOT_SET = 'value_not_set'
-    salesforce_datetime_format = '%Y-%m-%dT%H:%M:%S.%f%z'
-    mysql_datetime_format = '%Y-%m-%d %H:%M:%S'
+VALUE_NOT_SET = 'value_not_set'
+
+
+class Field(object):
+    """
+    declaration of a StreamModel attribute that is read from the constructor kwargs
+
+    :param name: the attribute name
+    :param source: the kwarg the value is read from, defaults to name
+    :param model: name of the StreamModel class a nested value is built with
+    :param many: the kwarg holds a list of model values
+    :param default: the value when the kwarg is missing
+    :param none_as_not_set: a None value is stored as VALUE_NOT_SET, always the case for model fields
+    :param aliases: kwargs that take precedence over source when set, see StreamModel.set_from_alias
+    """
+    __slots__ = ('name', 'source', 'model', 'many', 'default', 'none_as_not_set', 'aliases')
+
+    def __init__(self, name: str, source: str = None, model: str = None, many: bool = False, default=VALUE_NOT_SET, none_as_not_set: bool = False, aliases: tuple = ()):
+        self.name = name
+        self.source = source or name
+        self.model = model
+        self.many = many
+        self.default = default
+        self.none_as_not_set = none_as_not_set or model is not None
+        self.aliases = aliases
+
+
+class Constant(object):
+    """
+    declaration of a StreamModel attribute with the same value on every instance, e.g. the entity type
+    """
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name: str, value):
+        self.name = name
+        self.value = value
+
+
+class RawEntity(object):
+    """
+    the unmaterialized data of a nested entity on a lazy model
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+
+class LazyField(object):
+    """
+    descriptor of a nested model field on a lazy model class
+
+    the raw data stays in the parent class's slot until the attribute is first read, then the entity is built,
+    lazily itself, and cached in the slot.
+    """
+    __slots__ = ('slot', 'model', 'many')
+
+    def __init__(self, slot, field: Field):
+        self.slot = slot
+        self.model = field.model
+        self.many = field.many
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        value = self.slot.__get__(instance, owner)
+        if type(value) is RawEntity:
+            decoder = StreamModel.entity_types[self.model]
+            decoder = getattr(decoder, 'lazy', decoder)
+            value = [decoder(**item) for item in value.data] if self.many else decoder(**value.data)
+            self.slot.__set__(instance, value)
+
+        return value
+
+    def __set__(self, instance, value):
+        self.slot.__set__(instance, value)
+
+
+def to_dict_value(value):
+    """
+    a json compatible form of an attribute value, nested models become dicts
+    """
+    if isinstance(value, StreamModel):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [to_dict_value(item) for item in value]
+
+    return value
+
+
+def lazy_to_dict_value(value, model: str, many: bool):
+    """
+    the to_dict value of a nested model field on a lazy model, nested data that was never read is converted in bulk
+    without building the entities, to the same dicts the eager model produces
+    """
+    if type(value) is RawEntity:
+        return nested_column(model, [value.data], many)[0]
+
+    return to_dict_value(value)
+
+
+def compile_model(cls, fields, lazy=False):
+    """
+    generate the __init__ and to_dict functions of a StreamModel class from its field declarations
+
+    the code is generated once per class so constructing an instance is a straight run of assignments. nested
+    models are looked up in the entity type registry when an instance is built, so models can refer to classes
+    defined after them and a decoder registered for a type is used wherever that type is nested.
+
+    for a lazy class nested model data is wrapped in a RawEntity and written to, and read from, the slots of the
+    eager class directly, bypassing the LazyField descriptors.
+    """
+    arguments = ['NOT_SET', 'ENTITY_TYPES']
+    values = [VALUE_NOT_SET, StreamModel.entity_types]
+    init = ['def __init__(self, **kwargs):', '    get = kwargs.get']
+    to_dict = ['def to_dict(self):', '    return {']
+
+    for index, field in enumerate(fields):
+        if isinstance(field, Constant):
+            init.append(f'    self.{field.name} = {field.value!r}')
+            to_dict.append(f'        {field.name!r}: self.{field.name},')
+            continue
+
+        if field.default is VALUE_NOT_SET:
+            default = 'NOT_SET'
+        else:
+            default = f'default_{index}'
+            arguments.append(default)
+            values.append(field.default)
+
+        if field.model is not None and lazy:
+            arguments.append(f'slot_{index}')
+            values.append(vars(cls.__base__)[field.name])
+            init.append(f'    value = get({field.source!r})')
+            init.append(f'    slot_{index}.__set__(self, RawEntity(value) if value is not None and value != NOT_SET else NOT_SET)')
+        elif field.model is not None and field.many:
+            init.append(f'    value = get({field.source!r})')
+            init.append(f'    self.{field.name} = [ENTITY_TYPES[{field.model!r}](**item) for item in value] if value is not None and value != NOT_SET else NOT_SET')
+        elif field.model is not None:
+            init.append(f'    value = get({field.source!r})')
+            init.append(f'    self.{field.name} = ENTITY_TYPES[{field.model!r}](**value) if value is not None and value != NOT_SET else NOT_SET')
+        elif field.none_as_not_set:
+            init.append(f'    value = get({field.source!r})')
+            init.append(f'    self.{field.name} = value if value is not None and value != NOT_SET else NOT_SET')
+        else:
+            init.append(f'    self.{field.name} = get({field.source!r}, {default})')
+
+        for position, alias in enumerate(field.aliases):
+            init.append(f'    value = get({alias!r}, NOT_SET)')
+            init.append(f'    {"if" if position == 0 else "elif"} value != NOT_SET:')
+            init.append(f'        self.{field.name} = value')
+
+        if field.model is not None and lazy:
+            to_dict.append(f'        {field.name!r}: lazy_to_dict_value(slot_{index}.__get__(self), {field.model!r}, {field.many!r}),')
+        elif field.model is not None:
+            to_dict.append(f'        {field.name!r}: to_dict_value(self.{field.name}),')
+        else:
+            to_dict.append(f'        {field.name!r}: self.{field.name},')
+
+    to_dict.append('    }')
+    source = '\n'.join([f'def make({", ".join(arguments)}):'] + ['    ' + line for line in init + to_dict] + ['    return __init__, to_dict'])
+
+    namespace = {}
+    exec(compile(source, f'<{cls.__name__} fields>', 'exec'), globals(), namespace)
+    return namespace['make'](*values)
+
+
+def compile_lazy_model(cls, fields):
+    """
+    the lazy variant of a StreamModel class: a subclass whose nested model fields are LazyField descriptors
+    """
+    lazy_cls = StreamModelMeta(f'Lazy{cls.__name__}', (cls,), {'__slots__': (), '__module__': cls.__module__}, register=False)
+    for field in fields:
+        if isinstance(field, Field) and field.model is not None:
+            setattr(lazy_cls, field.name, LazyField(vars(cls)[field.name], field))
+
+    lazy_cls.__init__, lazy_cls.to_dict = compile_model(lazy_cls, fields, lazy=True)
+    return lazy_cls
+
+
+def nested_column(model: str, values: list, many: bool) -> list:
+    """
+    the to_dict values of a column of nested model data, converted in bulk when the model is a StreamModel
+    """
+    present = [index for index, value in enumerate(values) if value is not None and value != VALUE_NOT_SET]
+    items = [values[index] for index in present]
+    if many:
+        lengths = [len(item) for item in items]
+        converted = iter(bulk_to_dicts(StreamModel.entity_types[model], [entity for item in items for entity in item]))
+        converted = [[next(converted) for _ in range(length)] for length in lengths]
+    else:
+        converted = bulk_to_dicts(StreamModel.entity_types[model], items)
+
+    column = [VALUE_NOT_SET] * len(values)
+    for index, value in zip(present, converted):
+        column[index] = value
+    return column
+
+
+def not_set_column(values: list) -> list:
+    return [value if value is not None and value != VALUE_NOT_SET else VALUE_NOT_SET for value in values]
+
+
+def alias_column(values: list, alias_values: list) -> list:
+    """
+    :param values: the column read from the field's source
+    :param alias_values: a column per alias, the first set alias of a row takes precedence
+    """
+    column = list(values)
+    for index, aliased in enumerate(zip(*alias_values)):
+        for value in aliased:
+            if value != VALUE_NOT_SET:
+                column[index] = value
+                break
+    return column
+
+
+def bulk_to_dicts(decoder, rows: list) -> list:
+    """
+    :param decoder: the decoder of an entity type, see StreamModel.register_entity_type
+    :param rows: list of entity data dicts
+    :return: list of to_dict values
+    """
+    if not rows:
+        # also ends the recursion of self referencing models, e.g. Account.parent_account
+        return []
+    # only a class that declares its own fields has a converter matching its __init__ and to_dict
+    if isinstance(decoder, StreamModelMeta) and 'bulk_to_dict' in vars(decoder):
+        return decoder.bulk_to_dict(rows)
+
+    return [to_dict_value(decoder(**row)) for row in rows]
+
+
+def compile_bulk(cls, fields):
+    """
+    generate a function converting a list of entity data dicts to the to_dict values of cls without building
+    instances
+
+    plain fields are read straight into each row's dict, nested models, aliases and none_as_not_set fields are
+    converted a whole column at a time.
+    """
+    arguments = ['NOT_SET', 'nested_column', 'not_set_column', 'alias_column']
+    values = [VALUE_NOT_SET, nested_column, not_set_column, alias_column]
+    body = ['def bulk_to_dict(rows):']
+    columns = []
+    names = ['row']
+    items = []
+
+    for index, field in enumerate(fields):
+        if isinstance(field, Constant):
+            items.append(f'{field.name!r}: {field.value!r}')
+            continue
+
+        if field.default is VALUE_NOT_SET:
+            default = 'NOT_SET'
+        else:
+            default = f'default_{index}'
+            arguments.append(default)
+            values.append(field.default)
+
+        if field.model is None and not field.none_as_not_set and not field.aliases:
+            items.append(f'{field.name!r}: row.get({field.source!r}, {default})')
+            continue
+
+        column = f'column_{index}'
+        if field.model is not None:
+            body.append(f'    {column} = nested_column({field.model!r}, [row.get({field.source!r}) for row in rows], {field.many!r})')
+        elif field.none_as_not_set:
+            body.append(f'    {column} = not_set_column([row.get({field.source!r}) for row in rows])')
+        else:
+            body.append(f'    {column} = [row.get({field.source!r}, {default}) for row in rows]')
+        if field.aliases:
+            aliases = ', '.join(f'[row.get({alias!r}, NOT_SET) for row in rows]' for alias in field.aliases)
+            body.append(f'    {column} = alias_column({column}, [{aliases}])')
+
+        columns.append(column)
+        names.append(f'value_{index}')
+        items.append(f'{field.name!r}: value_{index}')
+
+    names = ', '.join(names)
+    body.append(f'    return [{{{", ".join(items)}}} for {names} in zip(rows, {", ".join(columns)})]' if columns else f'    return [{{{", ".join(items)}}} for row in rows]')
+    source = '\n'.join([f'def make({", ".join(arguments)}):'] + ['    ' + line for line in body] + ['    return bulk_to_dict'])
+
+    namespace = {}
+    exec(compile(source, f'<{cls.__name__} bulk>', 'exec'), globals(), namespace)
+    return namespace['make'](*values)
+
+
+class StreamModelMeta(type):
+    """
+    turns the `fields` declaration of a StreamModel class into __slots__, generated __init__ and to_dict, a bulk
+    converter and a lazy variant of the class
+    """
+
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        fields = namespace.get('fields')
+        if fields is not None:
+            namespace['__slots__'] = tuple(field.name for field in fields)
+
+        cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+
+        if fields is not None:
+            cls.__init__, cls.to_dict = compile_model(cls, fields)
+            cls.__init__.__qualname__ = f'{name}.__init__'
+            cls.to_dict.__qualname__ = f'{name}.to_dict'
+            cls.bulk_to_dict = staticmethod(compile_bulk(cls, fields))
+            cls.lazy_class = compile_lazy_model(cls, fields)
+
+        return cls
+
+
+class StreamModel(object, metaclass=StreamModelMeta):
+    __slots__ = ()
+
+    VALUE_NOT_SET = VALUE_NOT_SET
+    # entity type name -> callable building the entity from the data kwargs, every subclass registers itself
+    entity_types = {}
+    salesforce_datetime_format = SALESFORCE_DATETIME_FORMAT
+    mysql_datetime_format = MYSQL_DATETIME_FORMAT
+
+    def __init_subclass__(cls, entity_type: str = None, register: bool = True, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if register:
+            StreamModel.entity_types[entity_type or cls.__name__] = cls
+
+    @classmethod
+    def lazy(cls, **kwargs):
+        """
+        build the entity with its nested entities kept as raw dicts until they are first read
+
+        this saves memory and construction time for entities that are held or only partly read. to_dict and to_json
+        still convert every nested subtree, without building it, to the same dicts as the eager entity, so
+        serializing costs about as much as it does eagerly.
+        """
+        return vars(cls).get('lazy_class', cls)(**kwargs)
+
+    @classmethod
+    def register_entity_type(cls, entity_type: str, decoder):
+        """
+        decode entity_type with decoder, for types defined outside this module or decoded differently
+
+        :param entity_type: the data -> attributes -> type value
+        :param decoder: callable taking the entity data as kwargs, e.g. a StreamModel class
+        """
+        StreamModel.entity_types[entity_type] = decoder
 
     @classmethod
     def datetimeify(cls, datetime_string: str):
-        return datetime.strptime(datetime_string, cls.salesforce_datetime_format).strftime(cls.mysql_datetime_format) if datetime_string is not None else None
+        if datetime_string is None:
+            return None
+        if cls.salesforce_datetime_format == SALESFORCE_DATETIME_FORMAT and cls.mysql_datetime_format == MYSQL_DATETIME_FORMAT:
+            return salesforce_to_mysql_datetime(datetime_string)
+
+        return datetime.strptime(datetime_string, cls.salesforce_datetime_format).strftime(cls.mysql_datetime_format)
+
+    @classmethod
+    def datetimeify_many(cls, datetime_strings) -> list:
+        """
+        datetimeify a whole column of values at once
+        """
+        if cls.salesforce_datetime_format == SALESFORCE_DATETIME_FORMAT and cls.mysql_datetime_format == MYSQL_DATETIME_FORMAT:
+            return salesforce_to_mysql_datetimes(datetime_strings)
+
+        return [cls.datetimeify(datetime_string) for datetime_string in datetime_strings]
 
     @classmethod
     def intify(cls, int_string: str):
         return int(int_string) if int_string else None
 
     @classmethod
-    def get_entity(cls, stream_data):
+    def intify_many(cls, int_strings) -> list:
+        return [int(int_string) if int_string else None for int_string in int_strings]
+
+    @classmethod
+    def to_dicts(cls, rows, datetime_fields=(), int_fields=()) -> list:
+        """
+        convert the data dicts of many entities of this type at once, the same as cls(**row).to_dict() for each
+        row but without building the entities
+
+        :param rows: list of entity data dicts
+        :param datetime_fields: fields whose set values are datetimeified a whole column at a time
+        :param int_fields: fields whose set values are intified a whole column at a time
+        :return: list of dicts
+        """
+        dicts = bulk_to_dicts(cls, rows)
+        for names, convert in ((datetime_fields, cls.datetimeify_many), (int_fields, cls.intify_many)):
+            for name in names:
+                present = [row for row in dicts if row[name] != VALUE_NOT_SET]
+                for row, value in zip(present, convert([row[name] for row in present])):
+                    row[name] = value
+
+        return dicts
+
+    @classmethod
+    def to_json_many(cls, rows, datetime_fields=(), int_fields=()) -> list:
+        """
+        :return: list of serialized records, see to_dicts
+        """
+        dumps = serialization.dumps
+        return [dumps(row) for row in cls.to_dicts(rows, datetime_fields, int_fields)]
+
+    @classmethod
+    def iter_json(cls, chunks, datetime_fields=(), int_fields=()):
+        """
+        serialize an iterator of chunks of entity data dicts, e.g. the pages of a backfill, one chunk at a time
+        :return: generator of lists of serialized records
+        """
+        for rows in chunks:
+            yield cls.to_json_many(rows, datetime_fields, int_fields)
+
+    @classmethod
+    def get_entity(cls, stream_data, lazy: bool = False):
 
         entity_type = stream_data.get('data').get('attributes').get('type')
 
         if not entity_type:
             raise MissingEntityException('A data -> attributes -> type must submitted.')
 
-        this_module = sys.modules[__name__]
-
         try:
-            cls_ = getattr(this_module, entity_type)
-        except AttributeError:
+            decoder = StreamModel.entity_types[entity_type]
+        except (KeyError, TypeError):
             raise InvalidEntityException(f'There is no class definition that corresponds to the entity type {entity_type}')
         else:
-            return cls_(**stream_data.get('data'))
+            if lazy:
+                decoder = getattr(decoder, 'lazy', decoder)
+            return decoder(**stream_data.get('data'))
 
     @classmethod
     def get_action_type(cls, stream_data):
@@ -59,399 +458,418 @@ class StreamModel(object):
 
         return
 
+    def to_dict(self):
+        """
+        the attributes of the model as a dict, nested models included
+
+        generated from the fields declaration, this fallback serves models that set their attributes by hand.
+        """
+        return {name: to_dict_value(value) for name, value in vars(self).items()}
+
+    def to_json(self) -> bytes:
+        return serialization.dumps(self.to_dict())
+
+
 class CountyOffice(StreamModel):
-    def __init__(self, **kwargs):
-        self.name = kwargs.get('name', self.VALUE_NOT_SET)
+    fields = (
+        Field('name'),
+    )
 
 
 class ShippingAddress(StreamModel):
-    def __init__(self, **kwargs):
-        self.city = kwargs.get('city', self.VALUE_NOT_SET)
-        self.country = kwargs.get('country', self.VALUE_NOT_SET)
-        self.latitude = kwargs.get('latitude', self.VALUE_NOT_SET)
-        self.longitude = kwargs.get('longitude', self.VALUE_NOT_SET)
-        self.postalCode = kwargs.get('postalCode', self.VALUE_NOT_SET)
-        self.state = kwargs.get('state', self.VALUE_NOT_SET)
-        self.street = kwargs.get('street', self.VALUE_NOT_SET)
+    fields = (
+        Field('city'),
+        Field('country'),
+        Field('latitude'),
+        Field('longitude'),
+        Field('postalCode'),
+        Field('state'),
+        Field('street'),
+    )
 
 
 class Account(StreamModel):
-    def __init__(self, **kwargs):
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.track_id = kwargs.get('track_id', self.VALUE_NOT_SET) # to be removed once we are all on uuids
-        self.state: State = State(**kwargs.get('state')) if kwargs.get('state') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.county_office = CountyOffice(**kwargs.get('county_office', self.VALUE_NOT_SET)) if kwargs.get('county_office') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.parent_account = Account(**kwargs.get('parent_account', self.VALUE_NOT_SET)) if kwargs.get('parent_account') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.type = kwargs.get('type', self.VALUE_NOT_SET)
-        self.name = kwargs.get('name', self.VALUE_NOT_SET)
-        self.address = kwargs.get('address', self.VALUE_NOT_SET)
-        self.city = kwargs.get('city', self.VALUE_NOT_SET)
-        self.zip = kwargs.get('zip', self.VALUE_NOT_SET)
-        self.phone1 = kwargs.get('phone1', self.VALUE_NOT_SET)
-        self.phone2 = kwargs.get('phone2', self.VALUE_NOT_SET)
-        self.fax = kwargs.get('fax', self.VALUE_NOT_SET)
-        self.email = kwargs.get('email', self.VALUE_NOT_SET)
-        self.latitude = kwargs.get('latitude', self.VALUE_NOT_SET)
-        self.longitude = kwargs.get('longitude', self.VALUE_NOT_SET)
-        self.shipping_address: ShippingAddress = ShippingAddress(**kwargs.get('shipping_address')) if kwargs.get('shipping_address') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.created_by_user_uuid = kwargs.get('created_by_user_uuid', self.VALUE_NOT_SET)
-        self.modified_by_user_uuid = kwargs.get('modified_by_user_uuid', self.VALUE_NOT_SET)
-        self.record_owner_user_uuid = kwargs.get('record_owner_user_uuid', self.VALUE_NOT_SET)
-        self.record_type_name = kwargs.get('record_type_name', self.VALUE_NOT_SET)
-        self.attributes = {'type': 'Account'}
+    fields = (
+        Field('uuid'),
+        Field('track_id'),  # to be removed once we are all on uuids
+        Field('state', model='State'),
+        Field('county_office', model='CountyOffice'),
+        Field('parent_account', model='Account'),
+        Field('type'),
+        Field('name'),
+        Field('address'),
+        Field('city'),
+        Field('zip'),
+        Field('phone1'),
+        Field('phone2'),
+        Field('fax'),
+        Field('email'),
+        Field('latitude'),
+        Field('longitude'),
+        Field('shipping_address', model='ShippingAddress'),
+        Field('created_by_user_uuid'),
+        Field('modified_by_user_uuid'),
+        Field('record_owner_user_uuid'),
+        Field('record_type_name'),
+        Constant('attributes', {'type': 'Account'}),
+    )
 
 
 class AccountContactRelation(StreamModel):
-    def __init__(self, **kwargs):
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.gets_sr = kwargs.get('gets_sr', self.VALUE_NOT_SET)
-        self.gets_referral_confirmation = kwargs.get('gets_referral_confirmation', self.VALUE_NOT_SET)
-        self.created_by_user_uuid = kwargs.get('created_by_user_uuid', self.VALUE_NOT_SET)
-        self.created_date = kwargs.get('created_date', self.VALUE_NOT_SET)
-        self.modified_by_user_uuid = kwargs.get('modified_by_user_uuid', self.VALUE_NOT_SET)
-        self.last_modified_date = kwargs.get('last_modified_date', self.VALUE_NOT_SET)
-        self.is_direct = kwargs.get('is_direct', self.VALUE_NOT_SET)
-        self.contact = Contact(**kwargs.get('contact')) if kwargs.get('contact') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.account = Account(**kwargs.get('account')) if kwargs.get('account') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.attributes = {'type': 'AccountContactRelation'}
+    fields = (
+        Field('uuid'),
+        Field('gets_sr'),
+        Field('gets_referral_confirmation'),
+        Field('created_by_user_uuid'),
+        Field('created_date'),
+        Field('modified_by_user_uuid'),
+        Field('last_modified_date'),
+        Field('is_direct'),
+        Field('contact', model='Contact'),
+        Field('account', model='Account'),
+        Constant('attributes', {'type': 'AccountContactRelation'}),
+    )
 
 
 class Contact(StreamModel):
-    def __init__(self, **kwargs):
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.track_id = kwargs.get('track_id', self.VALUE_NOT_SET)  # to be removed once we are all on uuids
-        self.click_to_call = kwargs.get('click_to_call', self.VALUE_NOT_SET)
-        self.clickable_phone = kwargs.get('clickable_phone', self.VALUE_NOT_SET)
-        self.relation_score_id = kwargs.get('relation_score_id', self.VALUE_NOT_SET)
-        self.position = kwargs.get('position', self.VALUE_NOT_SET)
-        self.old_position = kwargs.get('old_position', self.VALUE_NOT_SET)
-        self.notes = kwargs.get('notes', self.VALUE_NOT_SET)
-        self.name = kwargs.get('name', self.VALUE_NOT_SET)
-        self.account = Account(**kwargs.get('account')) if kwargs.get('account') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.no_longer_employed_at_facility = kwargs.get('no_longer_employed_at_facility', self.VALUE_NOT_SET)
-        self.marital_status = kwargs.get('marital_status', self.VALUE_NOT_SET)
-        self.is_marketer = kwargs.get('is_marketer', self.VALUE_NOT_SET)
-        self.is_keycontact = kwargs.get('is_keycontact', self.VALUE_NOT_SET)
-        self.is_corporate = kwargs.get('is_corporate', self.VALUE_NOT_SET)
-        self.gets_sr = kwargs.get('gets_sr', self.VALUE_NOT_SET)
-        self.gets_referral_confirmation = kwargs.get('gets_referral_confirmation', self.VALUE_NOT_SET)
-        self.full_name = kwargs.get('full_name', self.VALUE_NOT_SET)
-        self.extension = kwargs.get('extension', self.VALUE_NOT_SET)
-        self.jigsaw_contact_id = kwargs.get('jigsaw_contact_id', self.VALUE_NOT_SET)
-        self.jigsaw = kwargs.get('jigsaw', self.VALUE_NOT_SET)
-        self.photo_url = kwargs.get('photo_url', self.VALUE_NOT_SET)
-        self.do_not_call = kwargs.get('do_not_call', self.VALUE_NOT_SET)
-        self.has_opted_out_of_fax = kwargs.get('has_opted_out_of_fax', self.VALUE_NOT_SET)
-        self.has_opted_out_of_email = kwargs.get('has_opted_out_of_email', self.VALUE_NOT_SET)
-        self.salesforce_owner_id = kwargs.get('salesforce_owner_id', self.VALUE_NOT_SET)
-        self.description = kwargs.get('description', self.VALUE_NOT_SET)
-        self.birthdate = kwargs.get('birthdate', self.VALUE_NOT_SET)
-        self.lead_source = kwargs.get('lead_source', self.VALUE_NOT_SET)
-        self.assistant_name = kwargs.get('assistant_name', self.VALUE_NOT_SET)
-        self.department = kwargs.get('department', self.VALUE_NOT_SET)
-        self.title = kwargs.get('title', self.VALUE_NOT_SET)
-        self.email = kwargs.get('email', self.VALUE_NOT_SET)
-        self.reports_to_id = kwargs.get('reports_to_id', self.VALUE_NOT_SET)
-        self.assistant_phone = kwargs.get('assistant_phone', self.VALUE_NOT_SET)
-        self.other_phone = kwargs.get('other_phone', self.VALUE_NOT_SET)
-        self.home_phone = kwargs.get('home_phone', self.VALUE_NOT_SET)
-        self.mobile_phone = kwargs.get('mobile_phone', self.VALUE_NOT_SET)
-        self.fax = kwargs.get('fax', self.VALUE_NOT_SET)
-        self.phone = kwargs.get('phone', self.VALUE_NOT_SET)
-        self.mailing_address = kwargs.get('mailing_address', self.VALUE_NOT_SET)
-        self.mailing_street = kwargs.get('mailing_street', self.VALUE_NOT_SET)
-        self.mailing_country = kwargs.get('mailing_country', self.VALUE_NOT_SET)
-        self.mailing_postalcode = kwargs.get('mailing_postalcode', self.VALUE_NOT_SET)
-        self.mailing_state = kwargs.get('mailing_state', self.VALUE_NOT_SET)
-        self.mailing_city = kwargs.get('mailing_city', self.VALUE_NOT_SET)
-        self.other_address = kwargs.get('other_address', self.VALUE_NOT_SET)
-        self.other_country = kwargs.get('other_country', self.VALUE_NOT_SET)
-        self.other_postalcode = kwargs.get('other_postalcode', self.VALUE_NOT_SET)
-        self.other_state = kwargs.get('other_state', self.VALUE_NOT_SET)
-        self.other_city = kwargs.get('other_city', self.VALUE_NOT_SET)
-        self.other_street = kwargs.get('other_street', self.VALUE_NOT_SET)
-        self.salutation = kwargs.get('salutation', self.VALUE_NOT_SET)
-        self.first_name = kwargs.get('first_name', self.VALUE_NOT_SET)
-        self.last_name = kwargs.get('last_name', self.VALUE_NOT_SET)
-        self.account_salesforce_id = kwargs.get('account_salesforce_id', self.VALUE_NOT_SET)
-        self.is_deleted = kwargs.get('is_deleted', self.VALUE_NOT_SET)
-        self.attributes = {'type': 'Contact'}
+    fields = (
+        Field('uuid'),
+        Field('track_id'),  # to be removed once we are all on uuids
+        Field('click_to_call'),
+        Field('clickable_phone'),
+        Field('relation_score_id'),
+        Field('position'),
+        Field('old_position'),
+        Field('notes'),
+        Field('name'),
+        Field('account', model='Account'),
+        Field('no_longer_employed_at_facility'),
+        Field('marital_status'),
+        Field('is_marketer'),
+        Field('is_keycontact'),
+        Field('is_corporate'),
+        Field('gets_sr'),
+        Field('gets_referral_confirmation'),
+        Field('full_name'),
+        Field('extension'),
+        Field('jigsaw_contact_id'),
+        Field('jigsaw'),
+        Field('photo_url'),
+        Field('do_not_call'),
+        Field('has_opted_out_of_fax'),
+        Field('has_opted_out_of_email'),
+        Field('salesforce_owner_id'),
+        Field('description'),
+        Field('birthdate'),
+        Field('lead_source'),
+        Field('assistant_name'),
+        Field('department'),
+        Field('title'),
+        Field('email'),
+        Field('reports_to_id'),
+        Field('assistant_phone'),
+        Field('other_phone'),
+        Field('home_phone'),
+        Field('mobile_phone'),
+        Field('fax'),
+        Field('phone'),
+        Field('mailing_address'),
+        Field('mailing_street'),
+        Field('mailing_country'),
+        Field('mailing_postalcode'),
+        Field('mailing_state'),
+        Field('mailing_city'),
+        Field('other_address'),
+        Field('other_country'),
+        Field('other_postalcode'),
+        Field('other_state'),
+        Field('other_city'),
+        Field('other_street'),
+        Field('salutation'),
+        Field('first_name'),
+        Field('last_name'),
+        Field('account_salesforce_id'),
+        Field('is_deleted'),
+        Constant('attributes', {'type': 'Contact'}),
+    )
 
 
 # TODO pass each object or nested Referral?
 class Referral(StreamModel):
-    def __init__(self, **kwargs):
-        self.applicant: Applicant = Applicant(**kwargs.get('applicant')) if kwargs.get('applicant') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.referring_contact: Contact = Contact(**kwargs.get('referring_contact')) if kwargs.get('referring_contact') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.referring_party: Account = Account(**kwargs.get('referring_party')) if kwargs.get('referring_party') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.uuid = kwargs.get('uuid')
-        self.applicant_uuid = kwargs.get('applicant_uuid', self.VALUE_NOT_SET)
-        self.assigned_to_cm = kwargs.get('assigned_to_cm', self.VALUE_NOT_SET)
-        self.coverage_type = kwargs.get('coverage_type', self.VALUE_NOT_SET)
-        self.created_by: User = User(**kwargs.get('created_by')) if kwargs.get('created_by') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.created_date = kwargs.get('created_date', self.VALUE_NOT_SET)
-        self.follow_up_date = kwargs.get('follow_up_date', self.VALUE_NOT_SET)
-        self.date_referral_received = kwargs.get('date_referral_received', self.VALUE_NOT_SET)
-        self.deceased = kwargs.get('deceased', self.VALUE_NOT_SET)
-        self.expecting_our_call = kwargs.get('expecting_our_call', self.VALUE_NOT_SET)
-        self.facility_approval_date = kwargs.get('facility_approval_date', self.VALUE_NOT_SET)
-        self.facility_pay_amount = kwargs.get('facility_pay_amount', self.VALUE_NOT_SET)
+    fields = (
+        Field('applicant', model='Applicant'),
+        Field('referring_contact', model='Contact'),
+        Field('referring_party', model='Account'),
+        Field('uuid', default=None),
+        Field('applicant_uuid'),
+        Field('assigned_to_cm'),
+        Field('coverage_type'),
+        Field('created_by', model='User'),
+        Field('created_date'),
+        Field('follow_up_date'),
+        Field('date_referral_received'),
+        Field('deceased'),
+        Field('expecting_our_call'),
+        Field('facility_approval_date'),
+        Field('facility_pay_amount'),
         # TODO Is this a Model?
-        self.facility_pay_approver = User(**kwargs.get('facility_pay_approver', self.VALUE_NOT_SET))  if kwargs.get('facility_pay_approver') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.facility_pay_comment = kwargs.get('facility_pay_comment', self.VALUE_NOT_SET)
-        self.facility_pay_confirmed = kwargs.get('facility_pay_confirmed', self.VALUE_NOT_SET)
-        self.facility_payment_date = kwargs.get('facility_payment_date', self.VALUE_NOT_SET)
-        self.facility_pay_entered_by = User(**kwargs.get('facility_pay_entered_by', self.VALUE_NOT_SET))  if kwargs.get('facility_pay_entered_by') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.facility_pay_updated_at = kwargs.get('facility_pay_updated_at', self.VALUE_NOT_SET)
-        self.form_of_payment = kwargs.get('form_of_payment', self.VALUE_NOT_SET)
-        self.gifting = kwargs.get('gifting', self.VALUE_NOT_SET)
-        self.has_liquid_assets = kwargs.get('has_liquid_assets', self.VALUE_NOT_SET)
-        self.has_appointment = kwargs.get('has_appointment', self.VALUE_NOT_SET)
-        self.income = kwargs.get('income', self.VALUE_NOT_SET)
-        self.info_packet_shipping_company = kwargs.get('info_packet_shipping_company', self.VALUE_NOT_SET)
-        self.info_packet_tracking_number = kwargs.get('info_packet_tracking_number', self.VALUE_NOT_SET)
-        self.info_packet_track_status = kwargs.get('info_packet_track_status', self.VALUE_NOT_SET)
-        self.initial_contact_attempts = kwargs.get('initial_contact_attempts', self.VALUE_NOT_SET)
-        self.intake_rep: User = User(**kwargs.get('intake_rep')) if kwargs.get('intake_rep') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.is_community = kwargs.get('is_community', self.VALUE_NOT_SET)
-        self.is_confirmed = kwargs.get('is_confirmed', self.VALUE_NOT_SET)
-        self.field_appointment_datetime = kwargs.get('field_appointment_datetime', self.VALUE_NOT_SET)
-        self.is_deleted = kwargs.get('is_deleted', self.VALUE_NOT_SET)
-        self.last_modified_by: User = User(**kwargs.get('last_modified_by')) if kwargs.get('last_modified_by') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.last_modified_date = kwargs.get('last_modified_date', self.VALUE_NOT_SET)
-        self.liquid_assets_amount = kwargs.get('liquid_assets_amount', self.VALUE_NOT_SET)
-        self.long_term_care_plan = kwargs.get('long_term_care_plan', self.VALUE_NOT_SET)
-        self.marketing_rep: User = User(**kwargs.get('marketing_rep')) if kwargs.get('marketing_rep') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.medicaid_case_type = kwargs.get('medicaid_case_type', self.VALUE_NOT_SET)
-        self.needs_medicaid_urgently = kwargs.get('needs_medicaid_urgently', self.VALUE_NOT_SET)
-        self.non_liquid_assets = kwargs.get('non_liquid_assets', self.VALUE_NOT_SET)
-        self.no_status_reports = kwargs.get('no_status_reports', self.VALUE_NOT_SET)
-        self.not_pursuing_reason = kwargs.get('not_pursuing_reason', self.VALUE_NOT_SET)
-        self.other_amount = kwargs.get('other_amount', self.VALUE_NOT_SET)
-        self.owns_home = kwargs.get('owns_home', self.VALUE_NOT_SET)
-        self.pay_type = kwargs.get('pay_type', self.VALUE_NOT_SET)
-        self.pending_follow_up_date = kwargs.get('pending_follow_up_date', self.VALUE_NOT_SET)
-        self.pending_reason = kwargs.get('pending_reason', self.VALUE_NOT_SET)
-        self.pension_amount1 = kwargs.get('pension_amount1', self.VALUE_NOT_SET)
-        self.pension_amount2 = kwargs.get('pension_amount2', self.VALUE_NOT_SET)
-        self.prepaid_burial = kwargs.get('prepaid_burial', self.VALUE_NOT_SET)
-        self.private_pay_amount = kwargs.get('private_pay_amount', self.VALUE_NOT_SET)
-        self.private_pay_comment = kwargs.get('private_pay_comment', self.VALUE_NOT_SET)
-        self.private_pay_entered_by = User(**kwargs.get('private_pay_entered_by', self.VALUE_NOT_SET))  if kwargs.get('private_pay_entered_by') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.private_pay_updated_at = kwargs.get('private_pay_updated_at', self.VALUE_NOT_SET)
-        self.record_type_id = kwargs.get('record_type_id', self.VALUE_NOT_SET)
-        self.referral_confirmation = kwargs.get('referral_confirmation', self.VALUE_NOT_SET)
-        self.referral_link = kwargs.get('referral_link', self.VALUE_NOT_SET)
-        self.referral_method = kwargs.get('referral_method', self.VALUE_NOT_SET)
-        self.referrer_notes = kwargs.get('referrer_notes', self.VALUE_NOT_SET)
-        self.rental_amount = kwargs.get('rental_amount', self.VALUE_NOT_SET)
-        self.social_security_amount = kwargs.get('social_security_amount', self.VALUE_NOT_SET)
-        self.spend_down = kwargs.get('spend_down', self.VALUE_NOT_SET)
-        self.sps_fee_amount = kwargs.get('sps_fee_amount', self.VALUE_NOT_SET)
-        self.state_of_service: State = State(**kwargs.get('state_of_service')) if kwargs.get('state_of_service') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.status = kwargs.get('status', self.VALUE_NOT_SET)
-        self.status_track_style = kwargs.get('status_track_style', self.VALUE_NOT_SET)
-        self.status_report_comment = kwargs.get('status_report_comment', self.VALUE_NOT_SET)
-        self.time_to_call = kwargs.get('time_to_call', self.VALUE_NOT_SET)
-        self.track_id = kwargs.get('track_id', self.VALUE_NOT_SET)
-        self.unprocessed_applicant_name = kwargs.get('unprocessed_applicant_name', self.VALUE_NOT_SET)
-        self.unprocessed_facility_contact_email = kwargs.get('unprocessed_facility_contact_email', self.VALUE_NOT_SET)
-        self.unprocessed_referral_data = kwargs.get('unprocessed_referral_data', self.VALUE_NOT_SET)
-        self.who_is_not_pursuing = kwargs.get('who_is_not_pursuing', self.VALUE_NOT_SET)
-        self.attributes = {'type': 'Referral'}
+        Field('facility_pay_approver', model='User'),
+        Field('facility_pay_comment'),
+        Field('facility_pay_confirmed'),
+        Field('facility_payment_date'),
+        Field('facility_pay_entered_by', model='User'),
+        Field('facility_pay_updated_at'),
+        Field('form_of_payment'),
+        Field('gifting'),
+        Field('has_liquid_assets'),
+        Field('has_appointment'),
+        Field('income'),
+        Field('info_packet_shipping_company'),
+        Field('info_packet_tracking_number'),
+        Field('info_packet_track_status'),
+        Field('initial_contact_attempts'),
+        Field('intake_rep', model='User'),
+        Field('is_community'),
+        Field('is_confirmed'),
+        Field('field_appointment_datetime'),
+        Field('is_deleted'),
+        Field('last_modified_by', model='User'),
+        Field('last_modified_date'),
+        Field('liquid_assets_amount'),
+        Field('long_term_care_plan'),
+        Field('marketing_rep', model='User'),
+        Field('medicaid_case_type'),
+        Field('needs_medicaid_urgently'),
+        Field('non_liquid_assets'),
+        Field('no_status_reports'),
+        Field('not_pursuing_reason'),
+        Field('other_amount'),
+        Field('owns_home'),
+        Field('pay_type'),
+        Field('pending_follow_up_date'),
+        Field('pending_reason'),
+        Field('pension_amount1'),
+        Field('pension_amount2'),
+        Field('prepaid_burial'),
+        Field('private_pay_amount'),
+        Field('private_pay_comment'),
+        Field('private_pay_entered_by', model='User'),
+        Field('private_pay_updated_at'),
+        Field('record_type_id'),
+        Field('referral_confirmation'),
+        Field('referral_link'),
+        Field('referral_method'),
+        Field('referrer_notes'),
+        Field('rental_amount'),
+        Field('social_security_amount'),
+        Field('spend_down'),
+        Field('sps_fee_amount'),
+        Field('state_of_service', model='State'),
+        Field('status'),
+        Field('status_track_style'),
+        Field('status_report_comment'),
+        Field('time_to_call'),
+        Field('track_id'),
+        Field('unprocessed_applicant_name'),
+        Field('unprocessed_facility_contact_email'),
+        Field('unprocessed_referral_data'),
+        Field('who_is_not_pursuing'),
+        Constant('attributes', {'type': 'Referral'}),
+    )
 
 
 class Applicant(StreamModel):
-    def __init__(self, **kwargs):
-        self.related_applicant_contacts: List[RelatedApplicantContact] = [RelatedApplicantContact(**related_applicant_contact) for related_applicant_contact in kwargs.get('related_applicant_contacts')] if kwargs.get('related_applicant_contacts') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.cell_phone = kwargs.get('cell_phone', self.VALUE_NOT_SET)
-        self.city = kwargs.get('city', self.VALUE_NOT_SET)
-        self.created_by: User = User(**kwargs.get('created_by')) if kwargs.get('created_by') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.created_date = kwargs.get('created_date', self.VALUE_NOT_SET)
-        self.current_facility: Account = Account(**kwargs.get('current_facility')) if kwargs.get('current_facility') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.email = kwargs.get('email', self.VALUE_NOT_SET)
-        self.case_manager: User = User(**kwargs.get('case_manager')) if kwargs.get('case_manager') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.first_name = kwargs.get('first_name', self.VALUE_NOT_SET)
-        self.home_phone = kwargs.get('home_phone', self.VALUE_NOT_SET)
-        self.is_deleted = kwargs.get('is_deleted', self.VALUE_NOT_SET)
-        self.is_us_citizen = kwargs.get('is_us_citizen', self.VALUE_NOT_SET)
-        self.last_modified_by: User = User(**kwargs.get('last_modified_by')) if kwargs.get('last_modified_by') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.last_modified_date = kwargs.get('last_modified_date', self.VALUE_NOT_SET)
-        self.last_name = kwargs.get('last_name', self.VALUE_NOT_SET)
-        self.marital_status = kwargs.get('marital_status', self.VALUE_NOT_SET)
-        self.other_phone = kwargs.get('other_phone', self.VALUE_NOT_SET)
-        self.personality = kwargs.get('personality', self.VALUE_NOT_SET)
-        self.residency = kwargs.get('residency', self.VALUE_NOT_SET)
-        self.state: State = State(**kwargs.get('state')) if kwargs.get('state') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.status = kwargs.get('status', self.VALUE_NOT_SET)
-        self.street1 = kwargs.get('street1', self.VALUE_NOT_SET)
-        self.street2 = kwargs.get('street2', self.VALUE_NOT_SET)
-        self.track_id = kwargs.get('track_id', self.VALUE_NOT_SET)
-        self.zip = kwargs.get('zip', self.VALUE_NOT_SET)
-        self.attributes = {'type': 'Applicant'}
+    fields = (
+        Field('related_applicant_contacts', model='RelatedApplicantContact', many=True),
+        Field('uuid'),
+        Field('cell_phone'),
+        Field('city'),
+        Field('created_by', model='User'),
+        Field('created_date'),
+        Field('current_facility', model='Account'),
+        Field('email'),
+        Field('case_manager', model='User'),
+        Field('first_name'),
+        Field('home_phone'),
+        Field('is_deleted'),
+        Field('is_us_citizen'),
+        Field('last_modified_by', model='User'),
+        Field('last_modified_date'),
+        Field('last_name'),
+        Field('marital_status'),
+        Field('other_phone'),
+        Field('personality'),
+        Field('residency'),
+        Field('state', model='State'),
+        Field('status'),
+        Field('street1'),
+        Field('street2'),
+        Field('track_id'),
+        Field('zip'),
+        Constant('attributes', {'type': 'Applicant'}),
+    )
 
 
 class ApplicantContact(StreamModel):
-    def __init__(self, **kwargs):
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.applicant_uuid = kwargs.get('applicant_uuid', self.VALUE_NOT_SET)
-        self.cell_phone = kwargs.get('cell_phone', self.VALUE_NOT_SET)
-        self.city = kwargs.get('city', self.VALUE_NOT_SET)
-        self.created_by: User = User(**kwargs.get('created_by')) if kwargs.get('created_by') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.created_date = kwargs.get('created_date', self.VALUE_NOT_SET)
-        self.email = kwargs.get('email', self.VALUE_NOT_SET)
-        self.fax = kwargs.get('fax', self.VALUE_NOT_SET)
-        self.first_name = kwargs.get('first_name', self.VALUE_NOT_SET)
-        self.name = kwargs.get('first_name', self.VALUE_NOT_SET)
-        self.home_phone = kwargs.get('home_phone', self.VALUE_NOT_SET)
-        self.is_deleted = kwargs.get('is_deleted', self.VALUE_NOT_SET)
-        self.last_modified_by: User = User(**kwargs.get('last_modified_by')) if kwargs.get('last_modified_by') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.last_modified_date = kwargs.get('last_modified_date', self.VALUE_NOT_SET)
-        self.last_name = kwargs.get('last_name', self.VALUE_NOT_SET)
-        self.other_phone = kwargs.get('other_phone', self.VALUE_NOT_SET)
-        self.state: State = State(**kwargs.get('state')) if kwargs.get('state') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.street1 = kwargs.get('street1', self.VALUE_NOT_SET)
-        self.street2 = kwargs.get('street2', self.VALUE_NOT_SET)
-        self.zip = kwargs.get('zip', self.VALUE_NOT_SET)
-        self.attributes = {'type': 'ApplicantContact'}
+    fields = (
+        Field('uuid'),
+        Field('applicant_uuid'),
+        Field('cell_phone'),
+        Field('city'),
+        Field('created_by', model='User'),
+        Field('created_date'),
+        Field('email'),
+        Field('fax'),
+        Field('first_name'),
+        Field('name', source='first_name'),
+        Field('home_phone'),
+        Field('is_deleted'),
+        Field('last_modified_by', model='User'),
+        Field('last_modified_date'),
+        Field('last_name'),
+        Field('other_phone'),
+        Field('state', model='State'),
+        Field('street1'),
+        Field('street2'),
+        Field('zip'),
+        Constant('attributes', {'type': 'ApplicantContact'}),
+    )
 
 
 class RelatedApplicantContact(StreamModel):
-    def __init__(self, **kwargs):
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.applicant: Applicant = Applicant(**kwargs.get('applicant')) if kwargs.get('applicant') not in (
-            None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.applicant_contact: ApplicantContact = ApplicantContact(**kwargs.get('applicant_contact')) if kwargs.get(
-            'applicant_contact') not in (
-              None,
-              self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.created_by: User = User(**kwargs.get('created_by')) if kwargs.get('created_by') not in (
-            None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-
-        self.created_date = kwargs.get('created_date', self.VALUE_NOT_SET)
-        self.is_deleted = kwargs.get('is_deleted', self.VALUE_NOT_SET)
-        self.is_power_of_attorney = kwargs.get('is_power_of_attorney', self.VALUE_NOT_SET)
-        self.is_primary = kwargs.get('is_primary', self.VALUE_NOT_SET)
-        self.is_spouse = kwargs.get('is_spouse', self.VALUE_NOT_SET)
-        self.last_modified_by: User = User(**kwargs.get('last_modified_by')) if kwargs.get('last_modified_by') not in (
-            None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-
-        self.last_modified_date = kwargs.get('last_modified_date', self.VALUE_NOT_SET)
-        self.relationship = kwargs.get('relationship', self.VALUE_NOT_SET)
-        self.applicant_uuid = kwargs.get('applicant_uuid', self.VALUE_NOT_SET)
-        self.attributes = {'type': 'RelatedApplicantContact'}
+    fields = (
+        Field('uuid'),
+        Field('applicant', model='Applicant'),
+        Field('applicant_contact', model='ApplicantContact'),
+        Field('created_by', model='User'),
+        Field('created_date'),
+        Field('is_deleted'),
+        Field('is_power_of_attorney'),
+        Field('is_primary'),
+        Field('is_spouse'),
+        Field('last_modified_by', model='User'),
+        Field('last_modified_date'),
+        Field('relationship'),
+        Field('applicant_uuid'),
+        Constant('attributes', {'type': 'RelatedApplicantContact'}),
+    )
 
 
 class State(StreamModel):
-    def __init__(self, **kwargs):
-        self.name = kwargs.get('name', self.VALUE_NOT_SET)
-        self.abbreviation = kwargs.get('abbreviation', self.VALUE_NOT_SET)
-
-        self.set_from_alias('abbreviation', ['abbr'], kwargs=kwargs)
+    fields = (
+        Field('name'),
+        Field('abbreviation', aliases=('abbr',)),
+    )
 
 
 class User(StreamModel):
-    def __init__(self, **kwargs):
-        self.track_id = kwargs.get('track_id', self.VALUE_NOT_SET)
-        self.mobile = kwargs.get('mobile', self.VALUE_NOT_SET)
-        self.extension = kwargs.get('extension', self.VALUE_NOT_SET)
-        self.fax = kwargs.get('fax', self.VALUE_NOT_SET)
-        self.alias = kwargs.get('nickname', self.VALUE_NOT_SET)
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.first_name = kwargs.get('first_name', self.VALUE_NOT_SET)
-        self.last_name = kwargs.get('last_name', self.VALUE_NOT_SET)
-        self.email = kwargs.get('email', self.VALUE_NOT_SET)
-        self.phone = kwargs.get('phone', self.VALUE_NOT_SET)
+    fields = (
+        Field('track_id'),
+        Field('mobile'),
+        Field('extension'),
+        Field('fax'),
+        Field('alias', source='nickname'),
+        Field('uuid'),
+        Field('first_name'),
+        Field('last_name'),
+        Field('email'),
+        Field('phone'),
+    )
 
 
 class Task(StreamModel):
-    def __init__(self, **kwargs):
-        self.assignee_uuid = kwargs.get('assignee_uuid', self.VALUE_NOT_SET)
-        self.attributes = {'type': 'Task'}
-        self.created_by = kwargs.get('created_by') if kwargs.get('created_by') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.deleted_by = kwargs.get('deleted_by') if kwargs.get('deleted_by') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.last_modified_by = kwargs.get('last_modified_by') if kwargs.get('last_modified_by') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.description = kwargs.get('description', self.VALUE_NOT_SET)
-        self.subject = kwargs.get('subject', self.VALUE_NOT_SET)
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.what_uuid = kwargs.get('what_uuid', self.VALUE_NOT_SET)
-        self.what_type = kwargs.get('what_type', self.VALUE_NOT_SET)
-        self.status = kwargs.get('status', self.VALUE_NOT_SET)
+    fields = (
+        Field('assignee_uuid'),
+        Constant('attributes', {'type': 'Task'}),
+        Field('created_by', none_as_not_set=True),
+        Field('deleted_by', none_as_not_set=True),
+        Field('last_modified_by', none_as_not_set=True),
+        Field('description'),
+        Field('subject'),
+        Field('uuid'),
+        Field('what_uuid'),
+        Field('what_type'),
+        Field('status'),
+    )
 
 
 class Event(StreamModel):
-    def __init__(self, **kwargs):
-        self.attributes = {'type': 'Event'}
-        self.description = kwargs.get('description', self.VALUE_NOT_SET)
-        self.duration_in_minutes = kwargs.get('duration_in_minutes', self.VALUE_NOT_SET)
-        self.end_date_time_utc = kwargs.get('end_date_time_utc', self.VALUE_NOT_SET)
-        self.owner_uuid = kwargs.get('owner_uuid', self.VALUE_NOT_SET)
-        self.subject = kwargs.get('subject', self.VALUE_NOT_SET)
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.what_uuid = kwargs.get('what_uuid', self.VALUE_NOT_SET)
-        self.what_type = kwargs.get('what_type', self.VALUE_NOT_SET)
-        self.who_uuids = kwargs.get('who_uuids', self.VALUE_NOT_SET)
-        self.date_completed = kwargs.get('date_completed', self.VALUE_NOT_SET)
+    fields = (
+        Constant('attributes', {'type': 'Event'}),
+        Field('description'),
+        Field('duration_in_minutes'),
+        Field('end_date_time_utc'),
+        Field('owner_uuid'),
+        Field('subject'),
+        Field('uuid'),
+        Field('what_uuid'),
+        Field('what_type'),
+        Field('who_uuids'),
+        Field('date_completed'),
+    )
 
 
 class FieldRepAppointment(StreamModel):
-    def __init__(self, **kwargs):
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.created_at = kwargs.get('created_at', self.VALUE_NOT_SET)
-        self.updated_at = kwargs.get('updated_at', self.VALUE_NOT_SET)
-        self.in_person = kwargs.get('in_person', self.VALUE_NOT_SET)
-        self.day = kwargs.get('day', self.VALUE_NOT_SET)
-        self.is_private = kwargs.get('is_private', self.VALUE_NOT_SET)
-        self.description = kwargs.get('description', self.VALUE_NOT_SET)
-        self.end_datetime = kwargs.get('end_datetime', self.VALUE_NOT_SET)
-        self.start_datetime = kwargs.get('start_datetime', self.VALUE_NOT_SET)
-        self.duration_in_minutes = kwargs.get('duration_in_minutes', self.VALUE_NOT_SET)
-        self.activity_date = kwargs.get('activity_date', self.VALUE_NOT_SET)
-        self.activity_datetime = kwargs.get('activity_datetime', self.VALUE_NOT_SET)
-        self.location = kwargs.get('location', self.VALUE_NOT_SET)
-        self.subject = kwargs.get('subject', self.VALUE_NOT_SET)
-        self.application: FieldRepApplication = FieldRepApplication(**kwargs.get('application')) if kwargs.get('application') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.referral: Referral = Referral(**kwargs.get('referral')) if kwargs.get('referral') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.referring_party: Account = Account(**kwargs.get('referring_party')) if kwargs.get('referring_party') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.external_applicant_track_id = kwargs.get('external_applicant_track_id', self.VALUE_NOT_SET)
-        self.attributes = {'type': 'FieldRepAppointment'}
+    fields = (
+        Field('uuid'),
+        Field('created_at'),
+        Field('updated_at'),
+        Field('in_person'),
+        Field('day'),
+        Field('is_private'),
+        Field('description'),
+        Field('end_datetime'),
+        Field('start_datetime'),
+        Field('duration_in_minutes'),
+        Field('activity_date'),
+        Field('activity_datetime'),
+        Field('location'),
+        Field('subject'),
+        Field('application', model='FieldRepApplication'),
+        Field('referral', model='Referral'),
+        Field('referring_party', model='Account'),
+        Field('external_applicant_track_id'),
+        Constant('attributes', {'type': 'FieldRepAppointment'}),
+    )
 
 
 class FieldRepApplication(StreamModel):
-    def __init__(self, **kwargs):
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.external_applicant_uuid = kwargs.get('external_applicant_uuid', self.VALUE_NOT_SET)
-        self.county = kwargs.get('county', self.VALUE_NOT_SET)
-        self.state: State = State(**kwargs.get('state')) if kwargs.get('state') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.field_rep_user: User = User(**kwargs.get('field_rep_user')) if kwargs.get('field_rep_user') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.status = kwargs.get('status', self.VALUE_NOT_SET)
-        self.medicaid_details: List[MedicaidDetail] = [MedicaidDetail(**medicaid_detail) for medicaid_detail in kwargs.get('medicaid_details')] if kwargs.get('medicaid_details') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.created_at = kwargs.get('created_at', self.VALUE_NOT_SET)
-        self.updated_at = kwargs.get('updated_at', self.VALUE_NOT_SET)
-        self.attribute_name = {'type': 'FieldRepApplication'}
+    fields = (
+        Field('uuid'),
+        Field('external_applicant_uuid'),
+        Field('county'),
+        Field('state', model='State'),
+        Field('field_rep_user', model='User'),
+        Field('status'),
+        Field('medicaid_details', model='MedicaidDetail', many=True),
+        Field('created_at'),
+        Field('updated_at'),
+        Constant('attribute_name', {'type': 'FieldRepApplication'}),
+    )
 
 
 class TurbocaidApplication(StreamModel):
-    def __init__(self, **kwargs):
-        self.event_id = kwargs.get('event_id', self.VALUE_NOT_SET)
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.county = kwargs.get('county', self.VALUE_NOT_SET)
-        self.state: State = State(**kwargs.get('state')) if kwargs.get('state') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.status = kwargs.get('status', self.VALUE_NOT_SET)
-        self.medicaid_details: List[MedicaidDetail] = [MedicaidDetail(**medicaid_detail) for medicaid_detail in kwargs.get('medicaid_details')] if kwargs.get('medicaid_details') not in (None, self.VALUE_NOT_SET) else self.VALUE_NOT_SET
-        self.created_at = kwargs.get('created_at', self.VALUE_NOT_SET)
-        self.updated_at = kwargs.get('updated_at', self.VALUE_NOT_SET)
-        self.attribute_name = {'type': 'TurbocaidApplication'}
+    fields = (
+        Field('event_id'),
+        Field('uuid'),
+        Field('county'),
+        Field('state', model='State'),
+        Field('status'),
+        Field('medicaid_details', model='MedicaidDetail', many=True),
+        Field('created_at'),
+        Field('updated_at'),
+        Constant('attribute_name', {'type': 'TurbocaidApplication'}),
+    )
 
 
 class MedicaidDetail(StreamModel):
-    def __init__(self, **kwargs):
-        self.event_id = kwargs.get('event_id', self.VALUE_NOT_SET)
-        self.uuid = kwargs.get('uuid', self.VALUE_NOT_SET)
-        self.attribute_name = kwargs.get('attribute_name', self.VALUE_NOT_SET)
-        self.attribute_value = kwargs.get('attribute_value', self.VALUE_NOT_SET)
-        self.medicaid_detail_type = kwargs.get('medicaid_detail_type', self.VALUE_NOT_SET)
-        self.created_at = kwargs.get('created_at', self.VALUE_NOT_SET)
-        self.updated_at = kwargs.get('updated_at', self.VALUE_NOT_SET)
-        self.attributes = {'type': 'MedicaidDetail'}
+    fields = (
+        Field('event_id'),
+        Field('uuid'),
+        Field('attribute_name'),
+        Field('attribute_value'),
+        Field('medicaid_detail_type'),
+        Field('created_at'),
+        Field('updated_at'),
+        Constant('attributes', {'type': 'MedicaidDetail'}),
+    )
@@ -0,0 +1,28 @@
+import pytest
+
+import kinesis_client
+import retry
+from fake_kinesis import FakeKinesisClient
+from metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def no_metrics(monkeypatch):
+    monkeypatch.setattr(metrics, 'enabled', False)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(retry, 'backoff_delay', lambda attempt: 0.0)
+
+
+@pytest.fixture
+def kinesis():
+    """
+    a FakeKinesisClient every stream publishes to
+    """
+    client = FakeKinesisClient()
+    kinesis_client.reset_clients()
+    kinesis_client.set_client(client)
+    yield client
+    kinesis_client.reset_clients()
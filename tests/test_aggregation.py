@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from aggregation import KPL_MAGIC, aggregate_records, compress, deaggregate, zstandard
+from batching import record_size
+
+
+def records():
+    return [
+        {'Data': f'{{"sequence": {index}}}', 'PartitionKey': f'app{index % 2}'}
+        for index in range(6)
+    ]
+
+
+@pytest.mark.parametrize('compression', [None, 'gzip', pytest.param('zstd', marks=pytest.mark.skipif(zstandard is None, reason='needs zstandard'))])
+def test_aggregated_records_round_trip(compression):
+    original = records()
+
+    aggregated = aggregate_records(original, compression=compression)
+
+    assert [indices for _, indices in aggregated] == [[0, 2, 4], [1, 3, 5]]
+    for record, indices in aggregated:
+        user_records = deaggregate(record['Data'], record['PartitionKey'])
+        assert [user_record['Data'] for user_record in user_records] == [original[index]['Data'].encode('utf-8') for index in indices]
+        assert {user_record['PartitionKey'] for user_record in user_records} == {record['PartitionKey']}
+
+
+def test_explicit_hash_key_round_trips():
+    original = [{'Data': b'a', 'PartitionKey': 'app', 'ExplicitHashKey': '1'}, {'Data': b'b', 'PartitionKey': 'app', 'ExplicitHashKey': '1'}]
+
+    (record, indices), = aggregate_records(original)
+
+    assert record['ExplicitHashKey'] == '1'
+    assert deaggregate(record['Data'], record['PartitionKey'], record['ExplicitHashKey']) == original
+
+
+def test_records_beyond_max_bytes_start_a_new_aggregate():
+    original = [{'Data': b'x' * 40, 'PartitionKey': 'app'} for _ in range(4)]
+
+    aggregated = aggregate_records(original, max_bytes=150)
+
+    assert [indices for _, indices in aggregated] == [[0, 1], [2, 3]]
+
+
+def test_record_too_large_to_aggregate_passes_through():
+    large = {'Data': b'x' * 200, 'PartitionKey': 'app'}
+
+    assert aggregate_records([large], max_bytes=150) == [(large, [0])]
+
+
+def test_plain_data_deaggregates_to_itself():
+    assert deaggregate(compress(b'plain', 'gzip'), 'app') == [{'Data': b'plain', 'PartitionKey': 'app'}]
+
+
+@pytest.mark.parametrize('compression', ['gzip', pytest.param('zstd', marks=pytest.mark.skipif(zstandard is None, reason='needs zstandard'))])
+def test_incompressible_aggregates_are_split_to_fit_after_compression(compression):
+    original = [{'Data': os.urandom(1000), 'PartitionKey': 'app'} for _ in range(8)]
+    max_bytes = 8 * 1006 + 50
+
+    aggregated = aggregate_records(original, compression=compression, max_bytes=max_bytes)
+
+    assert len(aggregated) > 1
+    assert [index for _, indices in aggregated for index in indices] == list(range(8))
+    for record, indices in aggregated:
+        assert record_size(record) <= max_bytes
+        assert [user_record['Data'] for user_record in deaggregate(record['Data'], 'app')] == [original[index]['Data'] for index in indices]
+
+
+def test_single_record_grown_by_compression_is_sent_uncompressed():
+    original = [{'Data': os.urandom(1000), 'PartitionKey': 'app'}]
+
+    (record, indices), = aggregate_records(original, compression='gzip', max_bytes=1040)
+
+    assert record_size(record) <= 1040
+    assert record['Data'][:4] == KPL_MAGIC
+    assert deaggregate(record['Data'], 'app') == original
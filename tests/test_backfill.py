@@ -0,0 +1,88 @@
+import json
+from concurrent.futures import Future
+
+import backfill
+from benchmarks.synthetic import stream_record
+
+
+class Executor(object):
+    """
+    completes only the first batch submitted, the others stay pending
+    """
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, batch):
+        future = Future()
+        if not self.futures:
+            future.set_result(fn(batch))
+        self.futures.append(future)
+        return future
+
+
+def test_closing_iter_built_cancels_pending_batches():
+    executor = Executor()
+    batches = [(1, []), (2, []), (3, [])]
+
+    built = backfill.iter_built(iter(batches), executor, window=3)
+    assert next(built) == (1, 0, ([], []))
+    built.close()
+
+    assert [future.cancelled() for future in executor.futures] == [False, True, True]
+
+
+def test_backfill_publishes_and_checkpoints(tmp_path, kinesis):
+    path = str(tmp_path / 'stream.jsonl')
+    records = [stream_record(attribute_count=2) for _ in range(5)]
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    checkpoint = str(tmp_path / 'checkpoint.json')
+
+    totals = backfill.backfill([path], checkpoint, workers=0, batch_size=2)
+
+    assert totals == {'lines': 5, 'records': 5, 'build_failures': 0, 'publish_failures': 0}
+    assert kinesis.published['sps_data'] == 5
+    assert backfill.load_checkpoint(checkpoint) == {path: 5}
+    assert backfill.backfill([path], checkpoint, workers=0, batch_size=2)['lines'] == 0
+
+
+def test_build_batch_returns_the_lines_that_failed_to_build():
+    good = json.dumps(stream_record(attribute_count=1))
+    # the first record of the event builds, the second does not, so none of them are kept
+    partial = json.dumps({'Records': [stream_record(attribute_count=1), {'eventName': 'INSERT'}]})
+    batch = [('a:1', good + '\n'), ('a:2', 'not json\n'), ('a:3', partial + '\n')]
+
+    built, failed = backfill.build_batch(batch)
+
+    assert [source for _, source, _ in built] == ['a:1']
+    assert failed == ['not json\n', partial + '\n']
+
+
+def test_lines_that_failed_to_build_are_saved_for_a_replay(tmp_path, kinesis, monkeypatch):
+    path = str(tmp_path / 'stream.jsonl')
+    with open(path, 'w') as f:
+        f.write(json.dumps(stream_record(attribute_count=1)) + '\n')
+        f.write('{"eventName": "INSERT"}\n')
+        f.write(json.dumps(stream_record(attribute_count=1)) + '\n')
+        f.write('not json')
+    checkpoint = str(tmp_path / 'checkpoint.json')
+    monkeypatch.setattr('sys.argv', ['backfill', path, '--checkpoint', checkpoint, '--workers', '0', '--fake'])
+
+    assert backfill.main() == 1
+
+    with open(backfill.failed_path_for(checkpoint)) as f:
+        assert f.read() == '{"eventName": "INSERT"}\nnot json\n'
+    assert backfill.load_checkpoint(checkpoint) == {path: 4}
+
+
+def test_main_succeeds_when_every_line_is_published(tmp_path, kinesis, monkeypatch):
+    path = str(tmp_path / 'stream.jsonl')
+    with open(path, 'w') as f:
+        f.write(json.dumps(stream_record(attribute_count=1)) + '\n')
+    failed = str(tmp_path / 'failed.jsonl')
+    monkeypatch.setattr('sys.argv', ['backfill', path, '--workers', '0', '--failed', failed, '--fake'])
+
+    assert backfill.main() == 0
+    assert not (tmp_path / 'failed.jsonl').exists()
@@ -0,0 +1,47 @@
+from changes import changed_medicaid_details
+
+
+def detail(value, uuid='detail'):
+    return {'M': {'type': {'S': 'medicaid_detail'}, 'uuid': {'S': uuid}, 'value': {'S': value}}}
+
+
+def test_unchanged_details_are_skipped():
+    image = {'income': detail('100'), 'household': detail('3')}
+
+    assert list(changed_medicaid_details(image, dict(image))) == []
+
+
+def test_changed_details_are_emitted():
+    old_image = {'income': detail('100'), 'household': detail('3')}
+    new_image = {'income': detail('200'), 'household': detail('3')}
+
+    assert list(changed_medicaid_details(new_image, old_image)) == [('income', new_image['income'], old_image['income'])]
+
+
+def test_added_details_have_no_old_attribute():
+    new_image = {'income': detail('100')}
+
+    assert list(changed_medicaid_details(new_image, {})) == [('income', new_image['income'], None)]
+
+
+def test_removed_details_are_emitted_without_a_new_attribute():
+    old_image = {'income': detail('100'), 'household': detail('3')}
+    new_image = {'household': detail('3')}
+
+    assert list(changed_medicaid_details(new_image, old_image)) == [('income', None, old_image['income'])]
+
+
+def test_insert_without_old_image_emits_every_detail():
+    new_image = {'income': detail('100'), 'household': detail('3'), 'email': {'S': 'someone@example.com'}}
+
+    assert list(changed_medicaid_details(new_image, None)) == [
+        ('income', new_image['income'], None),
+        ('household', new_image['household'], None),
+    ]
+
+
+def test_attributes_that_are_not_details_are_ignored():
+    old_image = {'email': {'S': 'old@example.com'}, 'note': {'M': {'type': {'S': 'note'}, 'value': {'S': 'a'}}}}
+    new_image = {'email': {'S': 'new@example.com'}, 'note': {'M': {'type': {'S': 'note'}, 'value': {'S': 'b'}}}}
+
+    assert list(changed_medicaid_details(new_image, old_image)) == []
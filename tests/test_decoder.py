@@ -0,0 +1,79 @@
+import json
+from decimal import Decimal
+
+from decoder import MAX_RECURSION_DEPTH, json_default, parse_deep_value, parse_value
+
+
+def test_scalar_types():
+    assert parse_value({'S': 'text'}) == 'text'
+    assert parse_value({'N': '42'}) == 42
+    assert parse_value({'N': '1.50'}) == Decimal('1.50')
+    assert parse_value({'N': '1e3'}) == Decimal('1e3')
+    assert parse_value({'BOOL': False}) is False
+    assert parse_value({'NULL': True}) is None
+    assert parse_value({'B': 'aGk='}) == b'hi'
+    assert parse_value({'SS': ['b', 'a']}) == {'a', 'b'}
+    assert parse_value({'NS': ['1', '2.5']}) == {1, Decimal('2.5')}
+    assert parse_value({'BS': ['aGk=']}) == {b'hi'}
+    assert parse_value({'unknown': 'x'}) is None
+
+
+def test_nested_maps_and_lists():
+    value = {'M': {
+        'name': {'S': 'value'},
+        'items': {'L': [{'N': '1'}, {'M': {'flag': {'BOOL': True}}}, {'L': []}]},
+        'empty': {'M': {}},
+    }}
+
+    assert parse_value(value) == {'name': 'value', 'items': [1, {'flag': True}, []], 'empty': {}}
+
+
+def test_deep_nesting_does_not_hit_the_recursion_limit():
+    value = {'S': 'leaf'}
+    for _ in range(5000):
+        value = {'L': [value]}
+
+    decoded = parse_value(value)
+    for _ in range(5000):
+        decoded, = decoded
+    assert decoded == 'leaf'
+
+
+def test_json_default():
+    encoded = json.dumps({'bytes': b'hi', 'set': {'b', 'a'}, 'mixed': {1, 'a'}}, default=json_default)
+
+    decoded = json.loads(encoded)
+    assert decoded['bytes'] == 'aGk='
+    assert decoded['set'] == ['a', 'b']
+    assert sorted(decoded['mixed'], key=str) == [1, 'a']
+
+
+def test_json_default_writes_decimals_as_numbers():
+    encoded = json.dumps([
+        parse_value({'N': '0.1'}),
+        parse_value({'N': '12345678901234567890'}),
+        parse_value({'N': '1e3'}),
+        parse_value({'N': '2.0'}),
+        parse_value({'N': '-1250.75'}),
+    ], default=json_default)
+
+    decoded = json.loads(encoded)
+    assert decoded == [0.1, 12345678901234567890, 1000, 2, -1250.75]
+    assert [type(value) for value in decoded] == [float, int, int, int, float]
+
+
+def test_json_default_rounds_long_fractions():
+    value = parse_value({'N': '12345678901234567890.123456789'})
+
+    decoded = json.loads(json.dumps(value, default=json_default))
+    assert isinstance(decoded, float)
+    assert decoded == float('12345678901234567890.123456789')
+
+
+def test_documents_around_the_recursion_threshold_decode_like_the_stack_decoder():
+    for depth in (MAX_RECURSION_DEPTH - 1, MAX_RECURSION_DEPTH, MAX_RECURSION_DEPTH + 1, MAX_RECURSION_DEPTH * 3):
+        value = {'M': {'count': {'N': '1'}, 'tags': {'SS': ['a']}, 'leaf': {'S': 'bottom'}}}
+        for level in range(depth):
+            value = {'M': {'child': value, 'level': {'N': str(level)}, 'items': {'L': [{'S': 'x'}, {'BOOL': True}]}}} if level % 2 else {'L': [value, {'NULL': True}]}
+
+        assert parse_value(value) == parse_deep_value(value)
@@ -0,0 +1,91 @@
+import pytest
+
+from dedup import Deduplicator, SqliteStore, TTLCache, fingerprint
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_keys_expire_after_the_ttl():
+    clock = Clock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.add('a')
+
+    clock.now = 9.9
+    assert 'a' in cache
+    clock.now = 10
+    assert 'a' not in cache
+    assert len(cache) == 0
+
+
+def test_adding_a_key_again_renews_it():
+    clock = Clock()
+    cache = TTLCache(ttl=10, clock=clock)
+    cache.add('a')
+    clock.now = 5
+    cache.add('a')
+
+    clock.now = 12
+    assert 'a' in cache
+
+
+def test_least_recently_added_keys_are_evicted_beyond_max_size():
+    cache = TTLCache(max_size=2)
+    for key in ('a', 'b', 'c'):
+        cache.add(key)
+
+    assert 'a' not in cache
+    assert 'b' in cache and 'c' in cache
+
+
+def test_sqlite_store_expires_fingerprints(tmp_path):
+    store = SqliteStore(str(tmp_path / 'dedup.sqlite3'), ttl=60)
+    store.add(['a', 'b'])
+    expired = SqliteStore(str(tmp_path / 'expired.sqlite3'), ttl=0)
+    expired.add(['a'])
+
+    assert store.contains(['a', 'b', 'c']) == {'a', 'b'}
+    assert expired.contains(['a']) == set()
+
+
+def test_deduplicator_finds_fingerprints_in_the_store(tmp_path):
+    store = SqliteStore(str(tmp_path / 'dedup.sqlite3'))
+    Deduplicator(store=store).mark_published([fingerprint('event', 'detail')])
+
+    # a cold start has an empty cache but the same store
+    deduplicator = Deduplicator(store=store)
+    assert deduplicator.published([fingerprint('event', 'detail'), fingerprint('event')]) == {fingerprint('event', 'detail')}
+    assert fingerprint('event', 'detail') in deduplicator.cache
+
+
+def test_sqlite_store_needs_a_path():
+    with pytest.raises(ValueError):
+        SqliteStore(None)
+
+
+def test_sqlite_store_evicts_expired_fingerprints_periodically(tmp_path):
+    clock = Clock()
+    store = SqliteStore(str(tmp_path / 'dedup.sqlite3'), ttl=0, evict_seconds=60, clock=clock)
+
+    def rows():
+        return store._connection.execute('SELECT COUNT(*) FROM published').fetchone()[0]
+
+    store.add(['a', 'b'])
+    clock.now = 30
+    store.add(['c'])
+    assert rows() == 3
+
+    # the first add after evict_seconds deletes what expired, the fingerprints it adds included
+    clock.now = 60
+    store.add(['d'])
+    assert rows() == 0
+
+    clock.now = 90
+    store.add(['e'])
+    assert rows() == 1
@@ -0,0 +1,132 @@
+import json
+
+import handler
+import kinesis_client
+import spill
+from benchmarks.synthetic import stream_record
+from fake_kinesis import FakeKinesisClient
+from partitioning import get_partitioner
+
+
+def event(*records):
+    return {'Records': list(records)}
+
+
+def sequence_number(record):
+    return record['dynamodb']['SequenceNumber']
+
+
+def test_oversized_record_is_dropped_without_failing_its_stream_record(kinesis):
+    large = stream_record(attribute_count=300, value_size=4096)
+    small = stream_record(attribute_count=2)
+
+    response = handler.handler(event(large, small), None)
+
+    # it could never be published, failing it would block the shard
+    assert response == {'batchItemFailures': []}
+    assert kinesis.published['sps_data'] == 1
+
+
+def test_oversized_record_is_dropped_before_any_record_of_its_stream_record_is_added(kinesis, monkeypatch):
+    modified = stream_record(attribute_count=3, value_size=64, event_name='MODIFY', changed_ratio=1.0)
+    modified['dynamodb']['NewImage']['attribute_2']['M']['value'] = {'S': 'x' * (1024 * 1024)}
+    added = []
+    monkeypatch.setattr(handler.Publisher, 'add', lambda self, *args: added.append(args))
+
+    handler.handler(event(modified), None)
+
+    assert len(added) == 2
+
+
+def application_uuid(record):
+    return record['dynamodb']['Keys']['application_uuid']['S']
+
+
+def test_throttled_application_fails_only_its_stream_record(kinesis):
+    records = [stream_record(attribute_count=2) for _ in range(3)]
+    kinesis.throttled_keys = {application_uuid(records[1])}
+    kinesis.throttle_attempts = 100
+
+    response = handler.handler(event(*records), None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': sequence_number(records[1])}]}
+    assert kinesis.published['sps_data'] == 2
+
+
+def test_throttled_application_is_published_on_a_later_attempt(kinesis):
+    records = [stream_record(attribute_count=2) for _ in range(3)]
+    kinesis.throttled_keys = {application_uuid(records[1])}
+    kinesis.throttle_attempts = 2
+
+    response = handler.handler(event(*records), None)
+
+    assert response == {'batchItemFailures': []}
+    assert kinesis.published['sps_data'] == 3
+
+
+def test_non_retryable_error_is_not_retried():
+    client = FakeKinesisClient(failure_rate=1.0, failure_code='ValidationException')
+    kinesis_client.reset_clients()
+    kinesis_client.set_client(client)
+    records = [stream_record(attribute_count=2) for _ in range(2)]
+
+    try:
+        response = handler.handler(event(*records), None)
+    finally:
+        kinesis_client.reset_clients()
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': sequence_number(record)} for record in records]}
+    assert client.calls == [('sps_data', 2)]
+
+
+def test_build_failure_fails_only_its_stream_record(kinesis):
+    broken = stream_record(attribute_count=2, event_name='MODIFY', changed_ratio=1.0)
+    del broken['dynamodb']['NewImage']
+    records = [stream_record(attribute_count=2), broken, stream_record(attribute_count=2, event_name='MODIFY', changed_ratio=1.0)]
+
+    response = handler.handler(event(*records), None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': sequence_number(broken)}]}
+    # the INSERT as one application record, the MODIFY as one record per changed detail
+    assert kinesis.published['sps_data'] == 3
+
+
+def test_removed_events_are_skipped(kinesis):
+    removed = stream_record(attribute_count=2)
+    removed['eventName'] = 'REMOVE'
+
+    assert handler.handler(event(removed), None) == {'batchItemFailures': []}
+    assert kinesis.calls == []
+
+
+def test_rejected_records_are_not_spilled(tmp_path, kinesis, monkeypatch):
+    sink = spill.LocalSink(str(tmp_path))
+    monkeypatch.setattr(spill, '_sink', sink)
+    monkeypatch.setattr(spill, 'SPILL_ENABLED', True)
+    monkeypatch.setattr(handler, 'default_partitioner', get_partitioner('spread'))
+    modified = stream_record(attribute_count=3, event_name='MODIFY', changed_ratio=1.0)
+    throttled = stream_record(attribute_count=1, event_name='MODIFY', changed_ratio=1.0)
+    kinesis.rejected_keys = {f'{application_uuid(modified)}#0'}
+    kinesis.throttled_keys = {f'{application_uuid(modified)}#1', f'{application_uuid(throttled)}#0'}
+    kinesis.throttle_attempts = 100
+
+    response = handler.handler(event(modified, throttled), None)
+
+    assert response == {'batchItemFailures': [{'itemIdentifier': sequence_number(modified)}]}
+    assert kinesis.published['sps_data'] == 1
+    segment, = sink.segment_ids()
+    spilled = [record['PartitionKey'] for _, entries in spill.decode_frames(sink.read(segment)) for record, _ in entries]
+    assert sorted(spilled) == sorted(kinesis.throttled_keys)
+
+
+def test_records_are_routed_by_email_in_a_mixed_batch(kinesis, monkeypatch):
+    monkeypatch.setattr(handler, 'TEST_USER_EMAIL', 'test@example.com')
+    records = [stream_record(attribute_count=1, email=email) for email in ('someone@example.com', 'test@example.com', 'other@example.com', 'test@example.com')]
+
+    assert handler.handler(event(*records), None) == {'batchItemFailures': []}
+
+    published = {stream: [json.loads(record['Data'])['uuid'] for record in stream_records] for stream, stream_records in kinesis.streams.items()}
+    assert published == {
+        'sps_data': [application_uuid(records[0]), application_uuid(records[2])],
+        'sps-data-integration-test': [application_uuid(records[1]), application_uuid(records[3])],
+    }
@@ -0,0 +1,34 @@
+import kinesis_client
+from fake_kinesis import FakeKinesisClient
+
+
+def test_set_client_replaces_clients_of_streams_already_used():
+    first, second = FakeKinesisClient(), FakeKinesisClient()
+    kinesis_client.reset_clients()
+    kinesis_client.set_client(first)
+    assert kinesis_client.get_client(stream_name='sps_data') is first
+
+    kinesis_client.set_client(second)
+    assert kinesis_client.get_client(stream_name='sps_data') is second
+    kinesis_client.reset_clients()
+
+
+def test_set_client_for_a_stream_keeps_the_region_client():
+    region, stream = FakeKinesisClient(), FakeKinesisClient()
+    kinesis_client.reset_clients()
+    kinesis_client.set_client(region)
+    kinesis_client.set_client(stream, stream_name='sps_data')
+
+    assert kinesis_client.get_client(stream_name='sps_data') is stream
+    assert kinesis_client.get_client(stream_name='other') is region
+    kinesis_client.reset_clients()
+
+
+def test_reset_clients_keeps_the_session_unless_asked():
+    session = object()
+    kinesis_client._session = session
+    kinesis_client.reset_clients()
+    assert kinesis_client._session is session
+
+    kinesis_client.reset_clients(session=True)
+    assert kinesis_client._session is None
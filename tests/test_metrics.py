@@ -0,0 +1,57 @@
+import json
+
+from metrics import BYTES, COUNT, MILLISECONDS, Metrics
+
+
+def test_flush_prints_one_emf_document(capsys):
+    metrics = Metrics(namespace='Test', enabled=True)
+    metrics.increment('RecordsOut', 3)
+    metrics.increment('RecordsOut', 2)
+    metrics.increment('BytesOut', 1024, BYTES)
+    metrics.add_time('PutRecordsTime', 0.25)
+
+    metrics.flush({'FunctionName': 'publisher'})
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    document = json.loads(lines[0])
+    assert isinstance(document['_aws']['Timestamp'], int)
+    assert document['_aws']['CloudWatchMetrics'] == [{
+        'Namespace': 'Test',
+        'Dimensions': [['FunctionName']],
+        'Metrics': [
+            {'Name': 'RecordsOut', 'Unit': COUNT},
+            {'Name': 'BytesOut', 'Unit': BYTES},
+            {'Name': 'PutRecordsTime', 'Unit': MILLISECONDS},
+        ],
+    }]
+    assert document['FunctionName'] == 'publisher'
+    assert document['RecordsOut'] == 5
+    assert document['BytesOut'] == 1024
+    assert document['PutRecordsTime'] == 250.0
+
+
+def test_flush_starts_over(capsys):
+    metrics = Metrics(namespace='Test', enabled=True)
+    metrics.increment('RecordsOut')
+    metrics.flush()
+    capsys.readouterr()
+
+    metrics.flush()
+    assert capsys.readouterr().out == ''
+
+    metrics.increment('RecordsFailed')
+    metrics.flush()
+    document = json.loads(capsys.readouterr().out)
+    assert document['_aws']['CloudWatchMetrics'][0]['Dimensions'] == [[]]
+    assert 'RecordsOut' not in document
+    assert document['RecordsFailed'] == 1
+
+
+def test_disabled_metrics_print_nothing(capsys):
+    metrics = Metrics(enabled=False)
+    metrics.increment('RecordsOut')
+    metrics.flush()
+
+    assert metrics.get('RecordsOut') == 0
+    assert capsys.readouterr().out == ''
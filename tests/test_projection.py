@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+import dedup
+import handler
+import projection
+from benchmarks.synthetic import stream_record
+from dedup import Deduplicator, fingerprint
+from partitioning import get_partitioner
+from projection import Member, Meta, Projection, register_projection
+
+
+ARN = 'arn:aws:dynamodb:us-east-1:123456789012:table/applications-v2/stream/2020-01-01T00:00:00.000'
+
+
+@pytest.fixture(autouse=True)
+def projections(monkeypatch):
+    monkeypatch.setattr(projection, 'PROJECTIONS', {})
+
+
+def test_fields_that_are_not_medicaid_detail_fields_are_rejected():
+    with pytest.raises(ValueError):
+        register_projection('applications-v2', Projection('medicaid_detail', (Meta('event_id'), Member('answer', source='value'))))
+
+    assert projection.PROJECTIONS == {}
+
+
+@pytest.mark.parametrize('event_name', ['INSERT', 'MODIFY'])
+def test_registered_projection_is_published(event_name):
+    register_projection('applications-v2', Projection('medicaid_detail', (
+        Meta('event_id'),
+        Member('uuid', required=True),
+        Meta('attribute_name'),
+        Member('updated_at', source='created_date'),
+    )))
+    record = stream_record(attribute_count=1, event_name=event_name, changed_ratio=1.0)
+    record['eventSourceARN'] = ARN
+
+    data = json.loads(handler.get_stream_records(record)[0]['Data'])
+
+    detail = data['medicaid_details'][0] if event_name == 'INSERT' else data
+    assert detail['event_id'] == record['eventID']
+    assert detail['updated_at'] == record['dynamodb']['NewImage']['attribute_0']['M']['created_date']['S']
+
+
+def test_projection_without_attribute_name_is_rejected():
+    with pytest.raises(ValueError):
+        register_projection('applications-v2', Projection('medicaid_detail', (Meta('event_id'), Member('uuid'))))
+
+
+def test_details_are_fingerprinted_by_their_image_attribute(monkeypatch):
+    # bypasses register_projection, the fingerprint must not depend on the projected attribute_name
+    monkeypatch.setitem(projection.PROJECTIONS, 'applications-v2', Projection('medicaid_detail', (Meta('event_id'), Member('uuid'))))
+    record = stream_record(attribute_count=2, event_name='MODIFY', changed_ratio=1.0)
+    record['eventSourceARN'] = ARN
+
+    keys = [key for key, _ in handler.iter_fingerprinted_records(record)]
+
+    assert sorted(keys) == [fingerprint(record['eventID'], 'attribute_0'), fingerprint(record['eventID'], 'attribute_1')]
+
+
+def test_every_changed_detail_is_published_again_after_a_partial_failure(kinesis, monkeypatch):
+    monkeypatch.setitem(projection.PROJECTIONS, 'applications-v2', Projection('medicaid_detail', (Meta('event_id'), Member('uuid'))))
+    monkeypatch.setattr(handler, 'default_partitioner', get_partitioner('spread'))
+    monkeypatch.setattr(dedup, '_deduplicator', Deduplicator())
+    monkeypatch.setattr(dedup, 'DEDUP_ENABLED', True)
+    record = stream_record(attribute_count=2, event_name='MODIFY', changed_ratio=1.0)
+    record['eventSourceARN'] = ARN
+    app_id = record['dynamodb']['Keys']['application_uuid']['S']
+    kinesis.throttled_keys = {f'{app_id}#1'}
+    kinesis.throttle_attempts = 100
+
+    assert handler.handler({'Records': [record]}, None)['batchItemFailures']
+    kinesis.throttled_keys = set()
+    assert handler.handler({'Records': [record]}, None) == {'batchItemFailures': []}
+
+    assert kinesis.published['sps_data'] == 2
@@ -0,0 +1,90 @@
+from publisher import Publisher
+from retry import AdaptiveRateLimiter
+
+
+def records(stream_name, count):
+    return [{'Data': f'{stream_name}-{index}'.encode(), 'PartitionKey': f'{stream_name}-{index % 7}'} for index in range(count)]
+
+
+def fast_limiter():
+    return AdaptiveRateLimiter(initial_rate=1e6, min_rate=1e6, max_rate=1e6)
+
+
+def test_concurrent_chunks_report_the_sources_of_their_own_records(kinesis):
+    kinesis.latency = 0.01
+    kinesis.rejected_keys = {'a-3', 'b-5'}
+    publisher = Publisher(max_in_flight=4, rate_limiter=fast_limiter())
+
+    for stream_name in ('a', 'b'):
+        for index, record in enumerate(records(stream_name, 1200)):
+            publisher.add(stream_name, record, (f'{stream_name}:{index // 10}',))
+    failed = publisher.wait()
+
+    # the stream records holding a rejected record fail, and only those
+    expected = {f'a:{index // 10}' for index in range(1200) if index % 7 == 3} | {f'b:{index // 10}' for index in range(1200) if index % 7 == 5}
+    assert failed == expected
+    assert publisher.rejected == expected
+    assert kinesis.published['a'] == sum(1 for index in range(1200) if index % 7 != 3)
+    assert kinesis.published['b'] == sum(1 for index in range(1200) if index % 7 != 5)
+    assert len(kinesis.calls) > 4
+
+
+def test_publish_keeps_the_sources_of_each_chunk(kinesis):
+    kinesis.latency = 0.01
+    kinesis.throttled_keys = {'a-0'}
+    kinesis.throttle_attempts = 10 ** 6
+    publisher = Publisher(max_in_flight=3, max_attempts=2, rate_limiter=fast_limiter(), keep_unsent=True)
+
+    publisher.publish('a', records('a', 1400), [(index,) for index in range(1400)])
+
+    assert publisher.wait() == {index for index in range(1400) if index % 7 == 0}
+    assert sorted(sources for _, _, sources, _ in publisher.unsent) == [(index,) for index in range(0, 1400, 7)]
+    assert publisher.rejected == set()
+
+
+def test_fingerprints_of_published_records_are_marked(kinesis):
+    marked = []
+
+    class Deduplicator(object):
+        def mark_published(self, keys):
+            marked.extend(keys)
+
+    kinesis.rejected_keys = {'a-1'}
+    publisher = Publisher(max_in_flight=2, rate_limiter=fast_limiter(), deduplicator=Deduplicator())
+    for index, record in enumerate(records('a', 1400)):
+        publisher.add('a', record, (index,), (f'key-{index}',))
+    publisher.wait()
+
+    assert sorted(marked) == sorted(f'key-{index}' for index in range(1400) if index % 7 != 1)
+
+
+def test_ordered_publishes_each_key_in_order_across_chunks(kinesis):
+    kinesis.latency = 0.001
+    publisher = Publisher(max_in_flight=4, rate_limiter=None, ordered=True)
+
+    for stream_name in ('a', 'b'):
+        for index, record in enumerate(records(stream_name, 1200)):
+            publisher.add(stream_name, record, (index,))
+    assert publisher.wait() == set()
+
+    for stream_name in ('a', 'b'):
+        published = [record['Data'].decode() for record in kinesis.streams[stream_name]]
+        for key in range(7):
+            in_key = [data for data in published if int(data.split('-')[1]) % 7 == key]
+            assert in_key == [f'{stream_name}-{index}' for index in range(key, 1200, 7)]
+
+
+def test_ordered_sends_nothing_after_a_failed_record_of_its_key(kinesis):
+    kinesis.throttled_keys = {'a-2'}
+    kinesis.throttle_attempts = 1
+    publisher = Publisher(rate_limiter=None, max_attempts=1, ordered=True, keep_unsent=True)
+
+    for index, record in enumerate(records('a', 1400)):
+        publisher.add('a', record, (index,))
+
+    # the first record of a-2 is throttled once, every later one of the key is held back, in later chunks too
+    failed = {index for index in range(1400) if index % 7 == 2}
+    assert publisher.wait() == failed
+    assert {sources[0] for _, _, sources, _ in publisher.unsent} == failed
+    assert not any(record['PartitionKey'] == 'a-2' for record in kinesis.streams['a'])
+    assert kinesis.published['a'] == 1400 - len(failed)
@@ -0,0 +1,146 @@
+import pytest
+
+from fake_kinesis import FakeKinesisClient
+from retry import AdaptiveRateLimiter, put_records_with_retry
+
+
+def test_only_failed_records_are_retried():
+    client = FakeKinesisClient(throttled_keys=['hot'], throttle_attempts=1)
+    records = [{'Data': b'a', 'PartitionKey': 'cold'}, {'Data': b'b', 'PartitionKey': 'hot'}]
+
+    assert put_records_with_retry(client, records, 'sps_data', sleep=lambda seconds: None) == ([], [])
+    assert client.calls == [('sps_data', 2), ('sps_data', 1)]
+
+
+def test_non_retryable_records_are_returned_without_a_retry():
+    client = FakeKinesisClient(failure_rate=1.0, failure_code='ValidationException')
+    records = [{'Data': b'a', 'PartitionKey': 'app'}]
+
+    assert put_records_with_retry(client, records, 'sps_data', sleep=lambda seconds: None) == ([], [0])
+    assert client.calls == [('sps_data', 1)]
+
+
+def test_records_still_throttled_after_the_last_attempt_are_unsent():
+    client = FakeKinesisClient(throttled_keys=['hot'], throttle_attempts=100)
+    records = [{'Data': b'a', 'PartitionKey': 'hot'}, {'Data': b'b', 'PartitionKey': 'cold'}]
+
+    assert put_records_with_retry(client, records, 'sps_data', max_attempts=2, sleep=lambda seconds: None) == ([0], [])
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_throttled_key_is_slowed_on_its_next_send():
+    clock = Clock()
+    limiter = AdaptiveRateLimiter(initial_rate=20, decrease=0.5, burst_seconds=0, clock=clock)
+    limiter.throttled(['hot'])
+    client = FakeKinesisClient()
+    records = [{'Data': b'a', 'PartitionKey': 'hot'} for _ in range(3)] + [{'Data': b'b', 'PartitionKey': 'cold'}]
+
+    assert put_records_with_retry(client, records, 'sps_data', rate_limiter=limiter, sleep=clock.sleep) == ([], [])
+
+    # the first attempt is paced too: one hot record per call, 0.1 seconds apart at 10 per second
+    assert client.calls == [('sps_data', 2), ('sps_data', 1), ('sps_data', 1)]
+    assert client.streams['sps_data'][0]['PartitionKey'] == 'hot' and client.streams['sps_data'][1]['PartitionKey'] == 'cold'
+    assert clock.now == pytest.approx(0.2)
+
+
+def test_throttling_halves_the_rate_once_per_call():
+    limiter = AdaptiveRateLimiter(initial_rate=1000, decrease=0.5)
+    limiter.throttled(['hot'] * 20)
+
+    assert limiter.rate('hot') == 500
+
+
+def test_rate_increases_at_most_once_per_interval():
+    clock = Clock()
+    limiter = AdaptiveRateLimiter(initial_rate=1000, decrease=0.5, increase=50, increase_interval=1.0, clock=clock)
+    limiter.throttled(['hot'])
+    for _ in range(20):
+        limiter.succeeded(['hot'] * 20)
+    assert limiter.rate('hot') == 500
+
+    clock.now = 1.0
+    limiter.succeeded(['hot'] * 20)
+    limiter.succeeded(['hot'])
+    assert limiter.rate('hot') == 550
+
+
+def test_keys_back_at_full_speed_are_forgotten():
+    clock = Clock()
+    limiter = AdaptiveRateLimiter(initial_rate=1000, max_rate=1000, increase=500, clock=clock)
+    limiter.throttled(['hot'])
+    clock.now = 1.0
+    limiter.succeeded(['hot'])
+
+    assert len(limiter) == 0
+
+
+def test_tracked_keys_are_bounded():
+    limiter = AdaptiveRateLimiter(max_keys=100)
+    for sequence in range(1000):
+        limiter.throttled([f'app#{sequence}'])
+
+    assert len(limiter) == 100
+
+
+def test_idle_keys_are_dropped():
+    clock = Clock()
+    limiter = AdaptiveRateLimiter(idle_seconds=60, clock=clock)
+    limiter.throttled(['old'])
+    clock.now = 30
+    limiter.throttled(['recent'])
+    clock.now = 61
+    limiter.throttled(['new'])
+
+    assert limiter.rate('old') == limiter.max_rate
+    assert len(limiter) == 2
+
+
+def test_records_deferred_by_the_limiter_are_unsent_at_the_deadline():
+    clock = Clock()
+    limiter = AdaptiveRateLimiter(initial_rate=20, min_rate=20, burst_seconds=0, clock=clock)
+    limiter.throttled(['hot'])
+    client = FakeKinesisClient()
+    records = [{'Data': b'a', 'PartitionKey': 'hot'} for _ in range(3)]
+
+    unsent, rejected = put_records_with_retry(client, records, 'sps_data', deadline=0, rate_limiter=limiter, sleep=clock.sleep)
+
+    assert (unsent, rejected) == ([1, 2], [])
+
+
+def test_ordered_sends_one_record_of_a_key_per_call():
+    client = FakeKinesisClient()
+    records = [{'Data': str(index).encode(), 'PartitionKey': key} for index, key in enumerate('aabab')]
+
+    assert put_records_with_retry(client, records, 'sps_data', ordered=True) == ([], [])
+
+    assert client.calls == [('sps_data', 2), ('sps_data', 2), ('sps_data', 1)]
+    assert [record['Data'] for record in client.streams['sps_data']] == [b'0', b'2', b'1', b'4', b'3']
+
+
+def test_ordered_holds_back_the_records_after_a_failed_one():
+    client = FakeKinesisClient(throttled_keys=['a'], throttle_attempts=2)
+    records = [{'Data': str(index).encode(), 'PartitionKey': key} for index, key in enumerate('abab')]
+
+    unsent, rejected = put_records_with_retry(client, records, 'sps_data', max_attempts=2, ordered=True)
+
+    assert (unsent, rejected) == ([0, 2], [])
+    assert [record['Data'] for record in client.streams['sps_data']] == [b'1', b'3']
+
+
+def test_ordered_holds_back_the_records_after_a_rejected_one():
+    client = FakeKinesisClient(rejected_keys=['a'])
+    records = [{'Data': str(index).encode(), 'PartitionKey': key} for index, key in enumerate('aab')]
+
+    assert put_records_with_retry(client, records, 'sps_data', ordered=True) == ([1], [0])
+    assert client.calls == [('sps_data', 2)]
@@ -0,0 +1,27 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+from serialization import ENCODERS
+
+
+@pytest.mark.parametrize('name', sorted(ENCODERS))
+def test_encoders_handle_large_ints(name):
+    value = {'id': 2 ** 70, 'negative': -2 ** 64, 'small': 1}
+
+    assert json.loads(ENCODERS[name](value)) == value
+
+
+@pytest.mark.parametrize('name', sorted(ENCODERS))
+def test_encoders_agree(name):
+    value = {'text': 'naïve', 'bytes': b'hi', 'set': {'b', 'a'}, 'nested': [{'n': None, 'flag': True}]}
+
+    assert json.loads(ENCODERS[name](value)) == json.loads(ENCODERS['json'](value))
+
+
+@pytest.mark.parametrize('name', sorted(ENCODERS))
+def test_encoders_write_decimals_as_numbers(name):
+    value = {'integral': Decimal('1e3'), 'fraction': Decimal('1250.75'), 'numbers': {Decimal('2.0')}}
+
+    assert json.loads(ENCODERS[name](value)) == {'integral': 1000, 'fraction': 1250.75, 'numbers': [2]}
@@ -0,0 +1,162 @@
+import io
+
+import pytest
+
+import spill
+from dedup import Deduplicator
+from publisher import Publisher
+
+
+def entries():
+    return [
+        ({'Data': b'{"a": 1}', 'PartitionKey': 'app1'}, ('event:a',)),
+        ({'Data': b'{"b": 2}', 'PartitionKey': 'app2', 'ExplicitHashKey': '12345'}, ('event:b', 'event:c')),
+    ]
+
+
+def test_frames_round_trip():
+    segment = spill.encode_frame('sps_data', entries()) + spill.encode_frame('other', entries()[:1], compression=None)
+
+    assert list(spill.decode_frames(segment)) == [('sps_data', entries()), ('other', entries()[:1])]
+
+
+def test_torn_frame_ends_the_segment():
+    good = spill.encode_frame('sps_data', entries())
+    torn = spill.encode_frame('other', entries())
+
+    assert list(spill.decode_frames(good + torn[:len(torn) // 2])) == [('sps_data', entries())]
+    assert list(spill.decode_frames(good + torn[:spill.FRAME_HEADER.size - 1])) == [('sps_data', entries())]
+
+
+def test_corrupt_frame_ends_the_segment():
+    good = spill.encode_frame('sps_data', entries())
+    corrupt = bytearray(spill.encode_frame('other', entries()))
+    corrupt[-1] ^= 0xff
+
+    assert list(spill.decode_frames(bytes(corrupt) + good)) == []
+    assert list(spill.decode_frames(good + bytes(corrupt) + good)) == [('sps_data', entries())]
+
+
+def test_spilled_records_are_drained(tmp_path, kinesis):
+    sink = spill.LocalSink(str(tmp_path))
+    unsent = [('sps_data', record, ('1',), fingerprints) for record, fingerprints in entries()]
+    spill.spill(sink, unsent)
+
+    replayed = spill.drain(sink, lambda: Publisher(keep_unsent=True))
+
+    assert replayed == 2
+    assert kinesis.streams['sps_data'] == [record for record, _ in entries()]
+    assert sink.segment_ids() == []
+
+
+def test_records_still_unsent_are_spilled_again(tmp_path, kinesis):
+    sink = spill.LocalSink(str(tmp_path))
+    spill.spill(sink, [('sps_data', record, ('1',), fingerprints) for record, fingerprints in entries()])
+    first, = sink.segment_ids()
+    kinesis.throttled_keys = {'app2'}
+    kinesis.throttle_attempts = 100
+
+    spill.drain(sink, lambda: Publisher(max_attempts=1, keep_unsent=True))
+
+    assert kinesis.streams['sps_data'] == [entries()[0][0]]
+    second, = sink.segment_ids()
+    assert second != first
+    assert list(spill.decode_frames(sink.read(second))) == [('sps_data', entries()[1:])]
+
+
+class ClientError(Exception):
+
+    def __init__(self, code):
+        self.response = {'Error': {'Code': code}}
+
+
+class Paginator(object):
+
+    def __init__(self, objects):
+        self.objects = objects
+
+    def paginate(self, Bucket, Prefix):
+        yield {'Contents': [{'Key': key} for key in sorted(self.objects) if key.startswith(Prefix)]}
+
+
+class FakeS3Client(object):
+    """
+    the object calls of the s3 client S3Sink makes, against a dict
+    """
+
+    class exceptions(object):
+        ClientError = ClientError
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = Body
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self.objects[Key])}
+
+    def copy_object(self, Bucket, Key, CopySource):
+        if CopySource['Key'] not in self.objects:
+            raise ClientError('NoSuchKey')
+        self.objects[Key] = self.objects[CopySource['Key']]
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+    def get_paginator(self, name):
+        return Paginator(self.objects)
+
+
+def test_s3_segments_are_claimed_once():
+    client = FakeS3Client()
+    sink = spill.S3Sink('bucket', 'spill/', client)
+    sink.write(spill.encode_frame('sps_data', entries()))
+    segment_id, = sink.segment_ids()
+
+    claimed = sink.claim(segment_id)
+
+    assert claimed.startswith('spill/inflight/')
+    assert sink.read(claimed) == spill.encode_frame('sps_data', entries())
+    assert sink.segment_ids() == []
+    assert sink.claim(segment_id) is None
+
+
+def test_expired_s3_claims_are_claimed_again():
+    client = FakeS3Client()
+    sink = spill.S3Sink('bucket', 'spill/', client, claim_seconds=0)
+    sink.write(b'segment')
+    claimed = sink.claim(sink.segment_ids()[0])
+
+    assert sink.segment_ids() == [claimed]
+    assert sink.claim(claimed) != claimed
+    assert len(client.objects) == 1
+
+
+def test_drain_replays_claimed_s3_segments(kinesis):
+    sink = spill.S3Sink('bucket', 'spill/', FakeS3Client())
+    spill.spill(sink, [('sps_data', record, ('1',), fingerprints) for record, fingerprints in entries()])
+
+    assert spill.drain(sink, lambda: Publisher(keep_unsent=True)) == 2
+    assert kinesis.streams['sps_data'] == [record for record, _ in entries()]
+    assert sink.client.objects == {}
+
+
+def test_drain_skips_records_already_published(tmp_path, kinesis):
+    sink = spill.LocalSink(str(tmp_path))
+    deduplicator = Deduplicator()
+    deduplicator.mark_published(['event:a'])
+    spill.spill(sink, [('sps_data', record, ('1',), fingerprints) for record, fingerprints in entries()])
+
+    spill.drain(sink, lambda: Publisher(keep_unsent=True, deduplicator=deduplicator))
+
+    assert kinesis.streams['sps_data'] == [entries()[1][0]]
+
+
+def test_a_sink_has_to_be_chosen(monkeypatch):
+    monkeypatch.setattr(spill, '_sink', None)
+    monkeypatch.setattr(spill, 'SPILL_ENABLED', True)
+    monkeypatch.setattr(spill, 'SPILL_SINK', None)
+
+    with pytest.raises(ValueError):
+        spill.get_sink()
@@ -0,0 +1,98 @@
+import pytest
+
+from benchmarks.lazy import referral_payload
+from stream import Account, Referral
+
+
+def test_lazy_to_dict_matches_eager():
+    payload = referral_payload(contacts=3)
+    payload['created_by']['nickname'] = 'not a field'
+
+    assert Referral.lazy(**payload).to_dict() == Referral(**payload).to_dict()
+
+
+def test_lazy_to_dict_matches_eager_after_reading_nested_entities():
+    payload = referral_payload(contacts=3)
+    referral = Referral.lazy(**payload)
+    referral.applicant.related_applicant_contacts[0].created_by
+
+    assert referral.to_dict() == Referral(**payload).to_dict()
+
+
+@pytest.mark.parametrize('value', [None, Referral.VALUE_NOT_SET])
+def test_unset_nested_entities(value):
+    payload = referral_payload(contacts=0)
+    payload['referring_party'] = value
+
+    assert Referral.lazy(**payload).to_dict() == Referral(**payload).to_dict()
+
+
+def test_lazy_json_matches_eager():
+    payload = {'uuid': 'account', 'name': 'Facility', 'state': {'name': 'New York', 'abbr': 'NY'}, 'parent_account': {'uuid': 'parent'}}
+
+    assert Account.lazy(**payload).to_json() == Account(**payload).to_json()
+
+
+DATETIME_FIELDS = ('created_date', 'follow_up_date')
+INT_FIELDS = ('income', 'track_id')
+
+
+def bulk_rows():
+    rows = [referral_payload(contacts=index % 3) for index in range(6)]
+    for index, row in enumerate(rows):
+        row['created_date'] = f'2020-01-{index + 1:02}T10:00:00.000+0000'
+        row['income'] = str(index * 100)
+        row['track_id'] = str(index)
+    # unset, None and empty values are left as they are by the per-object conversion
+    del rows[1]['created_date']
+    rows[2]['created_date'] = None
+    rows[3]['follow_up_date'] = '2021-06-30T23:59:59.000+0000'
+    del rows[4]['income']
+    rows[4]['track_id'] = ''
+    rows[5]['income'] = None
+    return rows
+
+
+def per_object(row):
+    referral = Referral(**row)
+    for name in DATETIME_FIELDS:
+        if getattr(referral, name) != Referral.VALUE_NOT_SET:
+            setattr(referral, name, referral.datetimeify(getattr(referral, name)))
+    for name in INT_FIELDS:
+        if getattr(referral, name) != Referral.VALUE_NOT_SET:
+            setattr(referral, name, referral.intify(getattr(referral, name)))
+    return referral
+
+
+def test_to_dicts_matches_to_dict():
+    rows = bulk_rows()
+
+    assert Referral.to_dicts(rows) == [Referral(**row).to_dict() for row in rows]
+    dicts = Referral.to_dicts(rows, DATETIME_FIELDS, INT_FIELDS)
+    assert dicts == [per_object(row).to_dict() for row in rows]
+    assert (dicts[3]['created_date'], dicts[3]['follow_up_date'], dicts[3]['income']) == ('2020-01-04 10:00:00', '2021-06-30 23:59:59', 300)
+
+
+def test_to_json_many_matches_to_json():
+    rows = bulk_rows()
+
+    assert Referral.to_json_many(rows) == [Referral(**row).to_json() for row in rows]
+    assert Referral.to_json_many(rows, DATETIME_FIELDS, INT_FIELDS) == [per_object(row).to_json() for row in rows]
+
+
+def test_iter_json_matches_to_json_per_chunk():
+    rows = bulk_rows()
+    chunks = [rows[:4], rows[4:], []]
+
+    assert list(Referral.iter_json(iter(chunks), DATETIME_FIELDS, INT_FIELDS)) == [
+        [per_object(row).to_json() for row in chunk] for chunk in chunks
+    ]
+
+
+def test_to_dicts_leaves_the_rows_untouched():
+    rows = bulk_rows()
+    before = [dict(row) for row in rows]
+
+    Referral.to_dicts(rows, DATETIME_FIELDS, INT_FIELDS)
+
+    assert rows == before
@@ -0,0 +1,54 @@
+from stream import Field, Referral, State, StreamModel, Task, User, VALUE_NOT_SET
+
+
+def test_missing_fields_are_not_set_and_defaults_apply():
+    referral = Referral()
+
+    assert referral.uuid is None
+    assert referral.status == VALUE_NOT_SET
+    assert referral.applicant == VALUE_NOT_SET
+
+
+def test_fields_are_read_from_their_source():
+    user = User(nickname='Pat', alias='ignored')
+
+    assert user.alias == 'Pat'
+    assert 'nickname' not in user.to_dict()
+
+
+def test_an_alias_takes_precedence_over_the_source():
+    assert State(abbreviation='New York', abbr='NY').abbreviation == 'NY'
+    assert State(abbreviation='NY').abbreviation == 'NY'
+    assert State(abbreviation='NY', abbr=VALUE_NOT_SET).abbreviation == 'NY'
+
+
+def test_none_is_stored_as_not_set():
+    task = Task(created_by=None, deleted_by='someone')
+
+    assert task.created_by == VALUE_NOT_SET
+    assert task.deleted_by == 'someone'
+    assert task.last_modified_by == VALUE_NOT_SET
+
+
+def test_constants_are_set_on_every_instance():
+    assert Task().attributes == {'type': 'Task'}
+    assert Task(attributes='ignored').to_dict()['attributes'] == {'type': 'Task'}
+
+
+def test_nested_models_are_built_and_serialized():
+    referral = Referral(created_by={'nickname': 'Pat'}, applicant={'uuid': 'applicant', 'state': {'abbr': 'NY'}})
+
+    assert isinstance(referral.created_by, User)
+    data = referral.to_dict()
+    assert data['created_by']['alias'] == 'Pat'
+    assert data['applicant']['state'] == {'name': VALUE_NOT_SET, 'abbreviation': 'NY'}
+
+
+def test_fields_become_slots():
+    class Thing(StreamModel, register=False):
+        fields = (Field('name'),)
+
+    thing = Thing(name='a', other='b')
+    assert Thing.__slots__ == ('name',)
+    assert thing.to_dict() == {'name': 'a'}
+    assert not hasattr(thing, '__dict__')
@@ -0,0 +1,41 @@
+import pytest
+
+from exceptions import InvalidEntityException, MissingEntityException
+from stream import Account, StreamModel
+
+
+def stream_data(entity_type, **data):
+    return {'action': 'update', 'recordSource': 'salesforce', 'data': dict(data, attributes={'type': entity_type})}
+
+
+def test_entity_types_are_dispatched_to_their_model():
+    entity = StreamModel.get_entity(stream_data('Account', uuid='account'))
+
+    assert type(entity) is Account
+    assert entity.uuid == 'account'
+
+
+@pytest.mark.parametrize('entity_type', ['List', 'datetime', 'StreamModel', 'Field', 'VALUE_NOT_SET', 'serialization', '__class__'])
+def test_module_names_that_are_not_entity_types_are_rejected(entity_type):
+    with pytest.raises(InvalidEntityException):
+        StreamModel.get_entity(stream_data(entity_type))
+
+
+def test_a_missing_type_is_rejected():
+    with pytest.raises(MissingEntityException):
+        StreamModel.get_entity(stream_data(''))
+
+
+def test_registered_entity_types_are_used(monkeypatch):
+    monkeypatch.setattr(StreamModel, 'entity_types', dict(StreamModel.entity_types))
+    StreamModel.register_entity_type('Facility', lambda **data: ('facility', data['uuid']))
+
+    assert StreamModel.get_entity(stream_data('Facility', uuid='facility')) == ('facility', 'facility')
+
+
+def test_a_registered_decoder_replaces_the_model_where_it_is_nested(monkeypatch):
+    monkeypatch.setitem(StreamModel.entity_types, 'State', lambda **data: data['abbr'])
+
+    account = Account(state={'abbr': 'NY'})
+
+    assert account.state == 'NY'
@@ -0,0 +1,50 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+
+
+SALESFORCE_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f%z'
+MYSQL_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+CACHE_SIZE = 4096
+
+# the salesforce format as strptime accepts it: 1-6 fraction digits and a Z, +HHMM or +HH:MM offset
+SALESFORCE_DATETIME = re.compile(r'[0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2}\.[0-9]{1,6}(?:Z|[+-](?:[01][0-9]|2[0-3]):?[0-5][0-9])')
+
+
+def parse_salesforce_datetime(datetime_string: str) -> str:
+    """
+    convert a salesforce datetime to the mysql format, the same as strptime/strftime with the two formats
+
+    strings in the usual shape are sliced after fromisoformat has validated the date and time. anything else,
+    including years before 1000 that strftime does not zero pad, goes through strptime so it fails the same way.
+    """
+    if SALESFORCE_DATETIME.fullmatch(datetime_string) and datetime_string[0] != '0':
+        datetime.fromisoformat(datetime_string[:19])
+        return f'{datetime_string[:10]} {datetime_string[11:19]}'
+
+    return datetime.strptime(datetime_string, SALESFORCE_DATETIME_FORMAT).strftime(MYSQL_DATETIME_FORMAT)
+
+
+salesforce_to_mysql_datetime = lru_cache(maxsize=CACHE_SIZE)(parse_salesforce_datetime)
+
+
+def salesforce_to_mysql_datetimes(datetime_strings) -> list:
+    """
+    convert a column of salesforce datetimes, None stays None
+
+    each distinct value is converted once, repeats within the column are looked up.
+
+    :param datetime_strings: iterable of str or None
+    :return: list
+    """
+    converted = {None: None}
+    result = []
+    append = result.append
+    for datetime_string in datetime_strings:
+        try:
+            append(converted[datetime_string])
+        except KeyError:
+            value = converted[datetime_string] = salesforce_to_mysql_datetime(datetime_string)
+            append(value)
+
+    return result